@@ -0,0 +1,92 @@
+"""
+Microbenchmark: per-tile pygame blits vs the single-remap TileCompositor.
+
+Both paths draw from a PuzzleGrid, as main.py does, and a random swap lands
+every --swap-every frames so the compositor's version-keyed map cache is
+rebuilt about as often as in play.
+
+    python bench_compositor.py --grids 4 8 10 --frames 300
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from compositor import TileCompositor
+from frame_path import SurfaceSink
+from grid import PuzzleGrid
+from shuffle import PermutationGenerator
+
+VIDEO_SIZE = 600
+SWAP_EVERY = 30         # Frames between swaps (~2 swaps/s at 60 FPS)
+
+
+def blit_path(screen, sink, frame, order, cols, tile):
+    surf = sink.update(frame)
+    for i, val in enumerate(order):
+        dst = ((i % cols) * tile, (i // cols) * tile, tile, tile)
+        screen.blit(surf, dst[:2], ((val % cols) * tile, (val // cols) * tile, tile, tile))
+        pygame.draw.rect(screen, (0, 0, 0), dst, 1)
+
+
+def remap_path(screen, sink, frame, board, compositor):
+    compositor.compose(frame, board, out=sink.buffer)
+    screen.blit(sink.surface, (0, 0))
+
+
+def timed(fn, frames, board, swap_every):
+    """ms per frame of fn(frame), swapping two random tiles of `board` every `swap_every` frames."""
+    for f in frames[:10]:
+        fn(f)
+    rng = random.Random(0)
+    t0 = time.perf_counter()
+    for i, f in enumerate(frames):
+        if swap_every and i % swap_every == 0:
+            board.swap(rng.randrange(board.size), rng.randrange(board.size))
+        fn(f)
+    return (time.perf_counter() - t0) * 1000 / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tile compositing strategies")
+    parser.add_argument('--grids', type=int, nargs='+', default=[4, 8, 10])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--swap-every', type=int, default=SWAP_EVERY, help="Frames between swaps (0: never)")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((VIDEO_SIZE, VIDEO_SIZE))
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (VIDEO_SIZE, VIDEO_SIZE, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+    sink = SurfaceSink(VIDEO_SIZE)
+
+    print(f"{'grid':>6} {'blits ms':>10} {'remap ms':>10} {'speedup':>8} {'max diff':>9} {'rebuilds':>9}")
+    for n in args.grids:
+        tile = VIDEO_SIZE // n
+        board = PuzzleGrid(n)
+        board.set_order(PermutationGenerator(n * n, seed=n).generate())
+        compositor = TileCompositor(VIDEO_SIZE, n)
+
+        # Both paths must put the same pixels on screen
+        blit_path(screen, sink, frames[0], board, n, tile)
+        a = pygame.surfarray.array3d(screen)
+        remap_path(screen, sink, frames[0], board, compositor)
+        b = pygame.surfarray.array3d(screen)
+        diff = int(np.abs(a.astype(np.int16) - b).max()) if (VIDEO_SIZE % n == 0) else 'n/a'
+
+        blit_ms = timed(lambda f: blit_path(screen, sink, f, board, n, tile), frames, board, args.swap_every)
+        compositor.rebuilds = 0
+        remap_ms = timed(lambda f: remap_path(screen, sink, f, board, compositor), frames, board, args.swap_every)
+        print(f"{n:>3}x{n:<2} {blit_ms:10.3f} {remap_ms:10.3f} {blit_ms / remap_ms:7.2f}x {diff:>9} "
+              f"{compositor.rebuilds:>9}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
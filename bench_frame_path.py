@@ -0,0 +1,87 @@
+"""
+Microbenchmark: old vs preallocated camera -> pygame frame path.
+
+Feeds synthetic camera frames through both paths and reports ms/frame, the
+peak transient Python/NumPy allocation per frame (tracemalloc) and how many
+Surfaces each path creates per frame (their pixels live in SDL's heap, which
+tracemalloc can't see).
+
+    python bench_frame_path.py --frames 300 --camera 1280x720
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import cv2
+import numpy as np
+import pygame
+
+from frame_path import FramePath, SurfaceSink
+
+VIDEO_SIZE = 600
+
+
+def old_path(frame):
+    frame = cv2.flip(frame, 1)
+    frame = cv2.resize(frame, (VIDEO_SIZE, VIDEO_SIZE))
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return pygame.surfarray.make_surface(np.rot90(frame_rgb))
+
+
+def make_new_path():
+    path, sink = FramePath(VIDEO_SIZE, crop=False), SurfaceSink(VIDEO_SIZE)  # Squash like the old path
+    return lambda frame: sink.update(path.prepare(frame))
+
+
+def bench(name, fn, frames, surfaces_per_frame):
+    for f in frames[:10]:  # Warm-up (first-touch page faults, OpenCV dispatch)
+        fn(f)
+
+    t0 = time.perf_counter()
+    for f in frames:
+        fn(f)
+    ms = (time.perf_counter() - t0) * 1000 / len(frames)
+
+    tracemalloc.start()
+    peaks = []
+    for f in frames[:50]:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn(f)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    print(f"{name:<10} {ms:8.3f} ms/frame   peak alloc {max(peaks) / 1024:9.1f} KiB/frame   "
+          f"new Surfaces {surfaces_per_frame}/frame")
+    return ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the camera -> pygame frame path")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--camera', default='1280x720', help="Synthetic camera resolution WxH")
+    args = parser.parse_args()
+
+    w, h = (int(v) for v in args.camera.split('x'))
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+    pygame.init()
+    # Sanity check: both paths must put the same pixels on screen
+    a = pygame.surfarray.array3d(old_path(frames[0]))
+    b = pygame.surfarray.array3d(make_new_path()(frames[0]))
+    print(f"camera {w}x{h} -> {VIDEO_SIZE}x{VIDEO_SIZE}, max pixel diff old/new: "
+          f"{int(np.abs(a.astype(np.int16) - b).max())}")
+
+    old_ms = bench("old", old_path, frames, 1)
+    new_ms = bench("prealloc", make_new_path(), frames, 0)
+    print(f"speedup: {old_ms / new_ms:.2f}x")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Many sessions, few models: dedicated MediaPipe instance per session vs the
+shared hand_service.
+
+Each simulated session is a thread feeding synthetic camera frames through
+its own AdaptiveHandTracker at the game's frame rate. Reports inferences/s
+actually served, per-call latency percentiles, shed/replaced frames and how
+many models were loaded.
+
+    python bench_hand_service.py --sessions 16 --workers 2 --backend process
+"""
+import argparse
+import threading
+import time
+
+from frame_path import FramePath
+from frame_source import SyntheticSource
+from hand_service import HandInferenceService
+from hand_tracking import AdaptiveHandTracker
+from profiler import percentile
+
+VIDEO_SIZE = 600
+
+
+def run_session(hands, seconds, fps, latencies, counts, priority_label):
+    source = SyntheticSource(1280, 720)
+    path = FramePath(VIDEO_SIZE)
+    tracker = AdaptiveHandTracker(hands, mode='every_n', every_n=1)  # Worst case: infer every frame
+    period = 1 / fps
+    end = time.perf_counter() + seconds
+    next_at = time.perf_counter()
+    while time.perf_counter() < end:
+        _, frame = source.read()
+        t0 = time.perf_counter()
+        tracker.update(path.prepare(frame), t0)
+        latencies.append(time.perf_counter() - t0)
+        next_at += period
+        delay = next_at - time.perf_counter()
+        if delay > 0: time.sleep(delay)
+    counts.append((priority_label, tracker.inferences))
+
+
+def bench(label, make_hands, args):
+    latencies, per_session = [], []
+    threads = []
+    for i in range(args.sessions):
+        hands, prio = make_hands(i)
+        threads.append(threading.Thread(target=run_session,
+                                        args=(hands, args.seconds, args.fps, latencies, per_session, prio)))
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    counts = {}
+    for prio, n in per_session:
+        counts[prio] = counts.get(prio, 0) + n
+    served = sum(counts.values())
+    print(f"{label:<28} {served / elapsed:8.1f} inferences/s   "
+          "latency p50={:.1f} p95={:.1f} p99={:.1f} ms".format(
+              *(percentile(latencies, p) * 1000 for p in (50, 95, 99))))
+    if len(counts) > 1:
+        print("    served by priority:", {k: counts[k] for k in sorted(counts)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared vs per-session hand inference")
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--backend', choices=('thread', 'process'), default='thread')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--skip-dedicated', action='store_true')
+    args = parser.parse_args()
+
+    if not args.skip_dedicated:
+        import mediapipe as mp
+        models = [mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
+                  for _ in range(args.sessions)]
+        bench(f"dedicated ({args.sessions} models)", lambda i: (models[i], 0), args)
+
+    service = HandInferenceService(workers=args.workers, backend=args.backend).start()
+    # Half the sessions at priority 1, to show the scheduler favouring them under load
+    bench(f"shared ({args.workers} {args.backend} models)",
+          lambda i: (service.client(f"s{i}", priority=i % 2), i % 2), args)
+    print("   ", service.report())
+    service.stop()
+
+
+if __name__ == "__main__":
+    main()
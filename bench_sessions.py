@@ -0,0 +1,103 @@
+"""
+Session store at scale: real memory per session (tracemalloc), sessions per
+MB, lookup latency, TTL expiry and budget eviction cost.
+
+    python bench_sessions.py --sessions 100000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from engine import PuzzleSession
+from profiler import percentile
+from session_store import SessionStore, session_size
+from shuffle import shuffle_pool
+
+
+def make_sessions(n, grid, playing):
+    """n sessions, about a `playing` share of them mid-attempt."""
+    now = time.time()
+    rng = random.Random(0)
+    sessions = []
+    for _ in range(n):
+        s = PuzzleSession(grid_size=grid)
+        if rng.random() < playing:
+            s.start(now)
+        sessions.append(s)
+    return sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the session store")
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--grid', type=int, default=4)
+    parser.add_argument('--lookups', type=int, default=200000)
+    parser.add_argument('--playing', type=float, default=0.5, help="Share of sessions mid-attempt")
+    args = parser.parse_args()
+    n = args.sessions
+    shuffle_pool(args.grid * args.grid, min(n, 4096))   # Boards pre-generated, as the engine does
+
+    # Footprint: everything the sessions and the store allocate
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    store = SessionStore(memory_budget=None)
+    for s in make_sessions(n, args.grid, args.playing):
+        store.add(s)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    per = used / n
+    print(f"sessions={n:,} grid={args.grid}x{args.grid}  measured {used / 2**20:.1f} MB "
+          f"({per:.0f} B/session, {2**20 / per:,.0f} sessions/MB)  estimate {store.bytes / n:.0f} B/session")
+
+    # Lookup latency: individually timed random hits (includes the LRU touch)
+    ids = list(store)
+    keys = [random.choice(ids) for _ in range(args.lookups)]
+    get, clock = store.get, time.perf_counter_ns
+    lat = []
+    for k in keys:
+        t0 = clock()
+        get(k)
+        lat.append(clock() - t0)
+    lat.sort()
+    t0 = time.perf_counter()
+    for k in keys:
+        get(k)
+    rate = len(keys) / (time.perf_counter() - t0)
+    print(f"lookup    p50={percentile(lat, 50):.0f}ns p99={percentile(lat, 99):.0f}ns "
+          f"p99.9={percentile(lat, 99.9):.0f}ns  {rate:,.0f} lookups/s")
+    miss_t0 = time.perf_counter()
+    for _ in range(len(keys)):
+        get('missing')
+    print(f"miss      {len(keys) / (time.perf_counter() - miss_t0):,.0f} lookups/s")
+
+    # TTL expiry: the least recently used 10% go idle (already at the front, so LRU order holds)
+    per_session = session_size(store.peek(ids[-1]))
+    for sid in list(store)[:n // 10]:
+        store.peek(sid).last_seen -= store.ttl + 1
+    t0 = time.perf_counter()
+    expired = store.expire(time.time())
+    print(f"expire    {len(expired):,} idle sessions in {(time.perf_counter() - t0) * 1000:.1f} ms, "
+          f"no-op sweep {timed_sweep(store) * 1e6:.1f} us")
+
+    # Budget: room for half the sessions; inserts evict LRU, preferring idle (non-PLAYING) ones
+    budget = per_session * (n // 2)
+    bounded = SessionStore(memory_budget=budget)
+    batch = make_sessions(n, args.grid, args.playing)
+    t0 = time.perf_counter()
+    for s in batch:
+        bounded.add(s)
+    elapsed = time.perf_counter() - t0
+    st = bounded.stats()
+    print(f"budget    {budget / 2**20:.1f} MB: kept {st['sessions']:,}, evicted {st['evicted']:,} "
+          f"({st['evicted_playing']:,} mid-attempt), {elapsed / n * 1e6:.2f} us/insert")
+
+
+def timed_sweep(store):
+    t0 = time.perf_counter()
+    store.expire(time.time())
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Headless pipeline benchmark suite.
+
+Runs the per-frame work of the game (camera frame -> resize/RGB -> optional
+hand tracking -> tile compositor) on an offline frame source for every
+combination of board resolution and grid size, and reports FPS, per-frame
+latency percentiles and peak RSS. Each configuration runs in a fresh worker
+process so peak RSS isn't inherited from the previous one.
+
+    python bench_suite.py                                  # synthetic 1280x720 camera
+    python bench_suite.py --source clips/session.mp4 --hands
+    python bench_suite.py --json results.json              # save a baseline
+    python bench_suite.py --baseline results.json          # exit 1 on regression
+
+No camera, display or pygame needed; --hands needs mediapipe.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from compositor import TileCompositor
+from frame_path import FramePath
+from frame_source import open_source
+from grid import PuzzleGrid, check_size
+from profiler import percentile
+from shuffle import PermutationGenerator
+
+RESOLUTIONS = (600, 720, 1080)
+GRID_SIZES = (3, 4, 6)
+WARMUP_FRAMES = 10
+TOLERANCE = 0.15        # Allowed slowdown vs the baseline before --baseline fails
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process in MiB, or None if the platform can't tell us."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # bytes vs KiB
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)  # Windows
+    except (ImportError, AttributeError):
+        return None
+
+
+def make_hand_stage(size):
+    import mediapipe as mp
+    from hand_tracking import AdaptiveHandTracker
+    hands = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.7,
+                                     min_tracking_confidence=0.7)
+    return AdaptiveHandTracker(hands, infer_size=min(256, size)).update
+
+
+def run_config(config):
+    """One resolution x grid size; runs in its own worker process."""
+    size, grid, args = config['size'], config['grid'], config['args']
+    source = open_source(args['source'], loop=True)
+    path = FramePath(size)
+    detect = make_hand_stage(size) if args['hands'] else None
+    # Same compositor and grid object the game renders with (maps cached per permutation)
+    board = PuzzleGrid(grid)
+    board.set_order(PermutationGenerator(grid * grid, seed=0).generate())
+    compositor = TileCompositor(size, grid)
+    out = np.empty((size, size, 3), dtype=np.uint8)
+
+    latencies = []
+    total = args['frames'] + WARMUP_FRAMES
+    t_start = None
+    for i in range(total):
+        ok, frame = source.read()
+        if not ok:
+            break
+        if i == WARMUP_FRAMES:
+            t_start = time.perf_counter()
+        t0 = time.perf_counter()
+        frame_rgb = path.prepare(frame)
+        if detect:
+            detect(frame_rgb, t0)
+        compositor.compose(frame_rgb, board, out=out)
+        if i >= WARMUP_FRAMES:
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - t_start if t_start else 0
+    source.release()
+
+    latencies.sort()
+    return {
+        'size': size,
+        'grid': grid,
+        'frames': len(latencies),
+        'fps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'peak_rss_mib': peak_rss_mib(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of human-readable regressions against a previous --json run."""
+    previous = {(r['size'], r['grid']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        old = previous.get((r['size'], r['grid']))
+        if old is None:
+            continue
+        name = f"{r['size']}px {r['grid']}x{r['grid']}"
+        if r['fps'] < old['fps'] * (1 - tolerance):
+            regressions.append(f"{name}: fps {old['fps']:.0f} -> {r['fps']:.0f}")
+        if r['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old['p95_ms']:.2f}ms -> {r['p95_ms']:.2f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark of the frame pipeline and tile compositor")
+    parser.add_argument('--source', default='synthetic:1280x720', help="See frame_source.open_source()")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(RESOLUTIONS))
+    parser.add_argument('--grids', type=int, nargs='+', default=list(GRID_SIZES))
+    parser.add_argument('--hands', action='store_true', help="Include MediaPipe hand tracking")
+    parser.add_argument('--json', metavar='PATH', help="Write the results as JSON")
+    parser.add_argument('--baseline', metavar='PATH', help="Compare against a previous --json run")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args()
+    for grid in args.grids:
+        try:
+            check_size(grid, grid)
+        except ValueError as e:
+            parser.error(str(e))
+
+    shared = {'source': args.source, 'frames': args.frames, 'hands': args.hands}
+    configs = [{'size': s, 'grid': g, 'args': shared} for s in args.sizes for g in args.grids]
+
+    print(f"source {args.source}, {args.frames} frames per config, hands {'on' if args.hands else 'off'}")
+    print(f"{'board':>6} {'grid':>5} {'fps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak RSS':>10}")
+    results = []
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        for r in pool.imap(run_config, configs):
+            rss = f"{r['peak_rss_mib']:7.1f}MiB" if r['peak_rss_mib'] is not None else "n/a"
+            print(f"{r['size']:>6} {r['grid']:>2}x{r['grid']:<2} {r['fps']:8.1f} {r['p50_ms']:8.2f} "
+                  f"{r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {rss:>10}")
+            results.append(r)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'source': args.source, 'hands': args.hands, 'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
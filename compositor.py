@@ -0,0 +1,72 @@
+"""
+Vectorized tile compositor.
+
+Drawing the scrambled board with one blit + one outline per tile costs
+2 * cols * rows pygame calls a frame, which dominates at 8x8 / 10x10. Here the
+permutation is turned into a per-pixel source map and the whole board is
+produced by a single cv2.remap (nearest neighbour) on the frame array, so the
+per-frame cost depends on the board's pixel count, not the tile count.
+
+The map is rebuilt only when the permutation changes (a swap or reshuffle):
+given a PuzzleGrid, that's one check of its version counter per frame.
+Grid lines and any margin the tiles don't cover are baked in as static
+"outside the image" entries, which remap fills with black (COLOR_GRID_LINES),
+so they cost nothing per frame either.
+"""
+import cv2
+import numpy as np
+
+from engine import as_pair
+from grid import PuzzleGrid
+
+
+class TileCompositor:
+    def __init__(self, board_size, grid_size, grid_lines=True):
+        self.w, self.h = as_pair(board_size)
+        self.cols, self.rows = as_pair(grid_size)
+        self.tw, self.th = self.w // self.cols, self.h // self.rows
+
+        # Static per-pixel geometry: which grid position a pixel is in, and its offset inside the tile
+        ys, xs = np.arange(self.h), np.arange(self.w)
+        row, dy = ys // self.th, ys % self.th
+        col, dx = xs // self.tw, xs % self.tw
+        self._pos = (np.minimum(row, self.rows - 1)[:, None] * self.cols +
+                     np.minimum(col, self.cols - 1)[None, :]).astype(np.int32)
+        self._dx = dx.astype(np.float32)[None, :]
+        self._dy = dy.astype(np.float32)[:, None]
+        black = (row >= self.rows)[:, None] | (col >= self.cols)[None, :]
+        if grid_lines:
+            # Same pixels pygame.draw.rect(..., 1) outlines: first/last row and column of each tile
+            black = black | ((dy == 0) | (dy == self.th - 1))[:, None] | ((dx == 0) | (dx == self.tw - 1))[None, :]
+        self._black = black
+
+        self._order = None          # Permutation the maps were built for (plain sequences)
+        self._grid = None           # ...or the PuzzleGrid and its version
+        self._version = None
+        self._map1 = self._map2 = None
+        self.rebuilds = 0
+
+    def _rebuild(self, order):
+        src = np.asarray(order, dtype=np.int32)[self._pos]
+        map_x = (src % self.cols).astype(np.float32) * self.tw + self._dx
+        map_y = (src // self.cols).astype(np.float32) * self.th + self._dy
+        map_x[self._black] = -1
+        map_y[self._black] = -1
+        # Fixed-point maps make remap noticeably faster than float maps
+        self._map1, self._map2 = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2, nninterpolation=True)
+        self.rebuilds += 1
+
+    def compose(self, frame, order, out=None):
+        """
+        Writes the board for `order` (order[pos] = tile shown at pos) into `out` and returns it.
+        `order` is a PuzzleGrid (change check: its version) or any sequence (compared in full).
+        """
+        if isinstance(order, PuzzleGrid):
+            if order is not self._grid or order.version != self._version:
+                self._rebuild(order.order)
+                self._grid, self._version, self._order = order, order.version, None
+        elif self._order is None or self._order != list(order):
+            self._rebuild(order)
+            self._grid, self._order = None, list(order)
+        return cv2.remap(frame, self._map1, self._map2, cv2.INTER_NEAREST, dst=out,
+                         borderMode=cv2.BORDER_CONSTANT, borderValue=0)
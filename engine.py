@@ -0,0 +1,361 @@
+import time
+import uuid
+
+from grid import PuzzleGrid, check_size
+from session_store import MEMORY_BUDGET, SessionStore
+from shuffle import POOL_SIZE, shuffle_pool, shuffler
+from telemetry import SessionTelemetry
+
+# --- DEFAULTS (mirror main.py) ---
+BOARD_SIZE = 600        # Puzzle area in pixels (square)
+GRID_SIZE = 4
+TIME_LIMIT = 60         # Seconds to solve
+SESSION_IDLE_TIMEOUT = 300  # Seconds without a message before a session is dropped
+MAX_COMPENSATION = 15   # Seconds of stall time an attempt can get back on its countdown
+
+
+def as_pair(value):
+    """Accepts N or (a, b); returns (a, b)."""
+    if isinstance(value, (tuple, list)):
+        a, b = value
+        return int(a), int(b)
+    return int(value), int(value)
+
+
+class PuzzleSession:
+    """
+    One verification attempt, independent of pygame/cv2:
+    grid permutation, countdown and drag state.
+    States: 'MENU', 'PLAYING', 'WON', 'LOST'
+
+    grid_size is N (N x N) or (cols, rows); board_size is pixels, N or (width, height).
+    Slotted (no per-instance __dict__) so a server can hold ~100k of them; see session_store.py.
+    """
+    __slots__ = ('session_id', 'board_w', 'board_h', 'grid', 'shuffler', 'tile_w', 'tile_h', 'time_limit',
+                 'state', 'selected_tile', 'dragging', 'mouse_offset', 'start_time', 'elapsed_time', 'swaps',
+                 'compensated', 'attempts', 'liveness', 'token', 'last_seen')
+
+    def __init__(self, session_id=None, grid_size=GRID_SIZE, board_size=BOARD_SIZE, time_limit=TIME_LIMIT):
+        self.session_id = session_id or uuid.uuid4().hex
+        cols, rows = as_pair(grid_size)
+        self.board_w, self.board_h = as_pair(board_size)
+        self.grid = PuzzleGrid(cols, rows)
+        self.tile_w = self.board_w // cols
+        self.tile_h = self.board_h // rows
+        if self.tile_w < 1 or self.tile_h < 1:
+            raise ValueError(f"{cols}x{rows} tiles don't fit a {self.board_w}x{self.board_h} board")
+        self.shuffler = shuffler(self.grid.size)  # Pre-generated boards if this size has a pool
+        self.time_limit = time_limit
+
+        self.state = 'MENU'
+
+        self.selected_tile = None
+        self.dragging = False
+        self.mouse_offset = (0, 0)
+
+        self.start_time = 0
+        self.elapsed_time = 0
+        self.swaps = 0
+        self.compensated = 0.0  # Stall time credited back to this attempt's countdown
+        self.attempts = 0
+        self.liveness = None  # Score dict attached on WON by a liveness.LivenessScorer, if one runs
+        self.token = None     # Signed result token issued on WON (see tokens.py), if tokens are enabled
+        self.last_seen = time.time()
+
+    @property
+    def current_order(self):
+        """order[pos] = tile shown at grid position pos (compact array, do not mutate directly)."""
+        return self.grid.order
+
+    def shuffle_grid(self):
+        self.grid.set_order(self.shuffler.take())
+
+    def start(self, now=None, order=None):
+        """Begins an attempt on a fresh shuffle, or on `order` (e.g. a recorded board being replayed)."""
+        self.state = 'PLAYING'
+        self.attempts += 1
+        if order is None:
+            self.shuffle_grid()
+        else:
+            self.grid.set_order(order)
+        self.start_time = time.time() if now is None else now
+        self.elapsed_time = 0
+        self.swaps = 0
+        self.compensated = 0.0
+        self.liveness = None
+        self.token = None
+        self.selected_tile = None
+        self.dragging = False
+
+    def tick(self, now=None):
+        """Advances the countdown; a session that runs out of time is LOST."""
+        if self.state != 'PLAYING':
+            return
+        self.elapsed_time = (time.time() if now is None else now) - self.start_time
+        if max(0, self.time_limit - int(self.elapsed_time)) == 0:
+            self.state = 'LOST'
+
+    def compensate(self, seconds):
+        """
+        Gives a PLAYING attempt back time it lost to a stall (frozen loop, dead
+        camera feed). Capped at MAX_COMPENSATION per attempt, so stalling the feed
+        on purpose can't buy unlimited time. Returns the seconds actually credited.
+        """
+        if self.state != 'PLAYING' or seconds <= 0:
+            return 0.0
+        seconds = min(seconds, MAX_COMPENSATION - self.compensated)
+        if seconds <= 0:
+            return 0.0
+        self.start_time += seconds
+        self.compensated += seconds
+        return seconds
+
+    def remaining(self):
+        return max(0, self.time_limit - int(self.elapsed_time))
+
+    def tile_rect(self, pos):
+        """(x, y, w, h) of a grid position on the board."""
+        col, row = self.grid.position(pos)
+        return col * self.tile_w, row * self.tile_h, self.tile_w, self.tile_h
+
+    def tile_at(self, x, y):
+        """Grid index under a board pixel, or None if outside the puzzle."""
+        if x < 0 or y < 0:
+            return None
+        col, row = x // self.tile_w, y // self.tile_h
+        if col >= self.grid.cols or row >= self.grid.rows:
+            return None
+        return row * self.grid.cols + col
+
+    def handle_pointer(self, pos, is_click_start, is_click_release, index=False):
+        """
+        Drag/drop logic shared by mouse, hand and remote pointers. Returns True on a swap.
+        `index` is the grid position under `pos` if the caller already knows it
+        (e.g. from a gestures.HitMap); None means outside the puzzle.
+        """
+        if self.state != 'PLAYING':
+            return False
+        mx, my = pos
+        if index is False:
+            index = self.tile_at(mx, my)
+
+        # Start Drag
+        if is_click_start:
+            if index is not None:
+                x, y, _, _ = self.tile_rect(index)
+                self.dragging = True
+                self.selected_tile = index
+                self.mouse_offset = (mx - x, my - y)
+            return False
+
+        # Drop / Swap
+        if is_click_release and self.dragging:
+            swapped = False
+            if index is not None and self.selected_tile is not None:
+                self.swap(self.selected_tile, index)
+                swapped = True
+            self.dragging = False
+            self.selected_tile = None
+            return swapped
+        return False
+
+    def swap(self, a, b):
+        self.grid.swap(a, b)
+        self.swaps += 1
+        if self.grid.solved:
+            self.state = 'WON'
+
+    def snapshot(self):
+        snap = {
+            'session': self.session_id,
+            'state': self.state,
+            'grid': [self.grid.cols, self.grid.rows],
+            'tile': [self.tile_w, self.tile_h],
+            'order': self.grid.tolist(),
+            'in_place': self.grid.in_place,
+            'remaining': self.remaining(),
+            'swaps': self.swaps,
+        }
+        if self.liveness is not None:
+            snap['liveness'] = self.liveness
+        if self.token is not None:
+            snap['token'] = self.token
+        if self.compensated:
+            snap['compensated'] = round(self.compensated, 3)
+        return snap
+
+
+def render_scrambled(frame, order, cols, rows=None, out=None):
+    """Headless tile compositor: returns `frame` (H, W, C) rearranged by `order`."""
+    rows = cols if rows is None else rows
+    h, w = frame.shape[:2]
+    th, tw = h // rows, w // cols
+    if out is None:
+        out = frame.copy()
+    for i, val in enumerate(order):
+        dy, dx = (i // cols) * th, (i % cols) * tw
+        sy, sx = (val // cols) * th, (val % cols) * tw
+        out[dy:dy + th, dx:dx + tw] = frame[sy:sy + th, sx:sx + tw]
+    return out
+
+
+class SessionEngine:
+    """Holds many concurrent PuzzleSessions and dispatches protocol messages to them."""
+
+    def __init__(self, grid_size=GRID_SIZE, board_size=BOARD_SIZE, time_limit=TIME_LIMIT,
+                 idle_timeout=SESSION_IDLE_TIMEOUT, pool_size=POOL_SIZE, telemetry=None, tokens=None,
+                 memory_budget=MEMORY_BUDGET):
+        # Pre-generate a batch of boards for the default grid so session starts don't shuffle
+        cols, rows = as_pair(grid_size)
+        check_size(cols, rows)
+        shuffle_pool(cols * rows, pool_size)
+        self.grid_size = grid_size
+        self.board_size = board_size  # N or (width, height)
+        self.time_limit = time_limit
+        self.idle_timeout = idle_timeout
+        # LRU-ordered, TTL-expired, memory-bounded (memory_budget bytes, None for unbounded)
+        self.sessions = SessionStore(ttl=idle_timeout, memory_budget=memory_budget, on_evict=self._release)
+        self.frames = {}  # session_id -> latest decoded frame (only for clients that stream video)
+        self.telemetry = telemetry  # Optional TelemetrySink; attempts in progress live in self.tracks
+        self.tracks = {}
+        self.tokens = tokens  # Optional tokens.ResultTokens: signs WON results and serves "verify"
+
+        # Counters
+        self.messages = 0
+        self.created = 0
+        self.verified = 0
+        self.expired = 0
+
+    # --- SESSION LIFECYCLE ---
+    def create(self, grid_size=None, session_id=None):
+        """New session; raises ValueError for a grid outside grid.MAX_SIDE or too fine for the board."""
+        session = PuzzleSession(session_id, grid_size or self.grid_size, self.board_size, self.time_limit)
+        self.sessions.add(session)
+        self.created += 1
+        return session
+
+    def close(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self._release(session_id, session)
+        return session
+
+    def _release(self, session_id, session):
+        """Drops what the engine holds for a session that left the store (closed, expired or evicted)."""
+        self.frames.pop(session_id, None)
+        self.finish_telemetry(session_id, session.state if session.state in ('WON', 'LOST') else 'ABANDONED')
+
+    def set_frame(self, session_id, frame):
+        """Stores a client's latest decoded frame, counted against the memory budget."""
+        if session_id in self.sessions:
+            self.frames[session_id] = frame
+            self.sessions.charge(session_id, frame.nbytes)
+
+    def finish_telemetry(self, session_id, state):
+        track = self.tracks.pop(session_id, None)
+        if track is not None:
+            self.telemetry.submit(track.record(state))
+
+    def reap(self, now=None):
+        """Finishes timed-out attempts that have telemetry running and drops idle sessions. Returns how many were dropped."""
+        now = time.time() if now is None else now
+        # Other sessions' countdowns are ticked lazily on their next message
+        for sid in list(self.tracks):
+            session = self.sessions.peek(sid)
+            if session is None:
+                continue
+            session.tick(now)
+            if session.state == 'LOST':
+                self.finish_telemetry(sid, 'LOST')
+        stale = self.sessions.expire(now)   # O(expired): the store is in last-use order
+        for sid, session in stale:
+            self._release(sid, session)
+        self.expired += len(stale)
+        if self.tokens: self.tokens.cache.prune(now)
+        return len(stale)
+
+    # --- PROTOCOL ---
+    def handle(self, msg):
+        """
+        Dispatches one JSON-style message and returns the reply dict.
+          {"op": "create", "grid_size": 4 | [cols, rows]}
+          {"op": "start",   "session": id}
+          {"op": "pointer", "session": id, "x": .., "y": .., "event": "down"|"up"|"move"}
+          {"op": "state",   "session": id}
+          {"op": "close",   "session": id}
+          {"op": "verify",  "token": str}    -> claims with "valid": true, or {"valid": false, "error": ..}
+          {"op": "stats"}
+        Frame ingest/render ops need cv2 and are handled by the server (see server.py).
+        """
+        self.messages += 1
+        op = msg.get('op')
+
+        if op == 'create':
+            try:
+                session = self.create(msg.get('grid_size'))
+            except (TypeError, ValueError) as e:
+                return {'error': f'bad grid_size: {e}'}
+            return session.snapshot()
+        if op == 'stats':
+            return self.stats()
+        if op == 'verify':
+            if self.tokens is None:
+                return {'error': 'tokens are not enabled'}
+            return self.tokens.verify(msg.get('token'))
+
+        now = time.time()
+        session = self.sessions.get(msg.get('session'), now=now)
+        if session is None:
+            return {'error': 'unknown session'}
+        session.tick(now)
+
+        if op == 'start':
+            if session.state != 'PLAYING':
+                session.start(now)
+                if self.telemetry:
+                    self.tracks[session.session_id] = SessionTelemetry(session.session_id, session.attempts)
+            return session.snapshot()
+        if op == 'pointer':
+            event = msg.get('event')
+            was_won = session.state == 'WON'
+            x, y = int(msg['x']), int(msg['y'])
+            # Off-board stays off-board (tile_at -> None), but within telemetry's int16 samples
+            x, y = min(max(x, -1), session.board_w), min(max(y, -1), session.board_h)
+            track = self.tracks.get(session.session_id)
+            picked = session.selected_tile
+            swapped = session.handle_pointer((x, y), event == 'down', event == 'up')
+            if track:
+                t = time.perf_counter()
+                track.pointer(t, x, y, pressed=session.dragging)
+                if event in ('down', 'up'): track.press(t, event == 'down')
+                if event == 'down' and session.dragging: track.drag_start(t)
+                elif event == 'up' and picked is not None: track.drop(t)
+                if swapped: track.swap(t, picked, session.tile_at(x, y))
+            if session.state == 'WON' and not was_won:
+                self.verified += 1
+                if track: self.finish_telemetry(session.session_id, 'WON')
+                if self.tokens: session.token = self.tokens.issue(session, now)
+            reply = {'state': session.state, 'swapped': swapped}
+            if session.token is not None:
+                reply['token'] = session.token
+            if swapped:
+                reply['order'] = session.grid.tolist()
+                reply['in_place'] = session.grid.in_place
+            return reply
+        if op == 'state':
+            return session.snapshot()
+        if op == 'close':
+            self.close(session.session_id)
+            return {'closed': session.session_id}
+        return {'error': f'unknown op {op!r}'}
+
+    def stats(self):
+        return {
+            'sessions': len(self.sessions),
+            'created': self.created,
+            'verified': self.verified,
+            'expired': self.expired,
+            'messages': self.messages,
+            'tokens': self.tokens.stats() if self.tokens else None,
+            'store': self.sessions.stats(),
+        }
@@ -0,0 +1,69 @@
+"""
+Allocation-free camera -> pygame frame path.
+
+The old path was flip -> resize -> cvtColor -> np.rot90 -> make_surface, i.e.
+four full-frame allocations plus a fresh Surface per frame. Two observations
+make most of that disappear:
+
+  * cv2.flip(x, 1) followed by np.rot90 is just a transpose, and pygame's
+    surfarray is indexed [x][y], so make_surface(rot90(flip(f))) shows f[y, x].
+    A Surface built with pygame.image.frombuffer() over a row-major (H, W, 3)
+    buffer reads exactly f[y, x] as well, so mirror + rotation fold into the
+    memory layout and cost nothing.
+  * resize and cvtColor accept dst= buffers, so both write into memory we
+    allocated once up front.
+
+Non-square camera frames are centre-cropped to a square view (a slice, no
+copy) before resizing, instead of being squashed into the square board.
+"""
+import cv2
+import numpy as np
+import pygame
+
+
+class FramePath:
+    """Capture-side half: resize + BGR->RGB into a small ring of preallocated buffers."""
+
+    def __init__(self, size, pool_size=5, crop=True):
+        self.size = size
+        self.crop = crop
+        self._resized = np.empty((size, size, 3), dtype=np.uint8)  # Scratch, capture thread only
+        # Ring of output buffers. A buffer is reused `pool_size` frames later, so
+        # consumers (render copy, hand tracker downscale) must read it promptly.
+        self._pool = [np.empty((size, size, 3), dtype=np.uint8) for _ in range(pool_size)]
+        self._next = 0
+
+    def prepare(self, frame_bgr):
+        """Returns an (H, W, 3) RGB view in display layout (no flip / rotate needed)."""
+        out = self._pool[self._next]
+        self._next = (self._next + 1) % len(self._pool)
+        h, w = frame_bgr.shape[:2]
+        if self.crop and h != w:
+            s = min(h, w)
+            y0, x0 = (h - s) // 2, (w - s) // 2
+            frame_bgr = frame_bgr[y0:y0 + s, x0:x0 + s]  # Square ROI view
+        if frame_bgr.shape[:2] == (self.size, self.size):
+            cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=out)
+        else:
+            cv2.resize(frame_bgr, (self.size, self.size), dst=self._resized)
+            cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=out)
+        return out
+
+
+class SurfaceSink:
+    """Render-side half: one persistent Surface whose pixels live in a numpy buffer we own."""
+
+    def __init__(self, size):
+        self._buf = np.zeros((size, size, 3), dtype=np.uint8)
+        self.surface = pygame.image.frombuffer(self._buf, (size, size), 'RGB')
+
+    @property
+    def buffer(self):
+        """The Surface's pixels as an (H, W, 3) array, for writers that fill it directly (dst=)."""
+        return self._buf
+
+    def update(self, frame_rgb):
+        """Copies the frame into the Surface's pixel buffer in place and returns the Surface."""
+        np.copyto(self._buf, frame_rgb)
+        return self.surface
+
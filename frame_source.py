@@ -0,0 +1,250 @@
+"""
+Pluggable frame sources.
+
+Every source has the cv2.VideoCapture surface the pipeline already uses:
+read() -> (ok, bgr_frame) and release(), so the game loop, FramePipeline and
+the benchmarks can run on a webcam, a recorded clip, a folder of stills or
+generated frames without caring which.
+
+    open_source('camera:0')            # default webcam
+    open_source('clips/session.mp4')   # video file
+    open_source('frames/*.png')        # image sequence (glob or directory)
+    open_source('synthetic:1280x720')  # NumPy generator, no camera needed
+"""
+import glob
+import os
+import time
+
+from collections import deque
+
+import numpy as np
+
+from profiler import percentile
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+CAMERA_MODES = ((640, 480), (800, 600), (960, 720), (1280, 720), (1280, 960), (1920, 1080))
+CAMERA_FOURCC = 'MJPG'
+STATS_WINDOW = 300      # Recent reads kept for the delivered-FPS / latency figures
+
+
+class CameraSource:
+    """
+    Live webcam via OpenCV, tuned for latency:
+      * negotiates the smallest mode whose short side covers `target` (so we
+        don't decode 1080p to show 600x600), verifying what the driver accepted;
+      * requests a compressed FOURCC (MJPG) so high modes still reach full rate;
+      * asks for a 1-frame driver buffer so read() returns a fresh frame, not a stale queued one.
+    Also measures the FPS actually delivered and how long read() blocks.
+    """
+
+    def __init__(self, index=0, target=None, fourcc=CAMERA_FOURCC, buffer_size=1, modes=CAMERA_MODES):
+        import cv2
+        self.cap = cv2.VideoCapture(index)
+        self.fourcc = None
+        self.mode = None
+        if self.cap.isOpened():
+            self._configure(cv2, target, fourcc, buffer_size, modes)
+
+        self._intervals = deque(maxlen=STATS_WINDOW)
+        self._reads = deque(maxlen=STATS_WINDOW)
+        self._last_at = None
+        self.frames = 0
+
+    def _configure(self, cv2, target, fourcc, buffer_size, modes):
+        if fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        if target:
+            for w, h in sorted(modes, key=lambda m: m[0] * m[1]):
+                if min(w, h) < target:
+                    continue
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
+                got = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+                if min(got) >= target:
+                    break  # Drivers silently substitute modes: trust only what they report back
+        # Not every backend honours this (it's a no-op on some); harmless to ask
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+        code = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        self.fourcc = ''.join(chr((code >> (8 * i)) & 0xFF) for i in range(4)) if code else None
+        self.mode = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def read(self):
+        t0 = time.perf_counter()
+        ok, frame = self.cap.read()
+        t1 = time.perf_counter()
+        if ok:
+            self._reads.append(t1 - t0)
+            if self._last_at is not None:
+                self._intervals.append(t1 - self._last_at)
+            self._last_at = t1
+            self.frames += 1
+        return ok, frame
+
+    def release(self):
+        self.cap.release()
+
+    def stats(self):
+        intervals = sorted(self._intervals)
+        reads = sorted(self._reads)
+        mean = sum(intervals) / len(intervals) if intervals else 0.0
+        return {
+            'mode': self.mode,
+            'fourcc': self.fourcc,
+            'fps': 1 / mean if mean else 0.0,
+            'read_p50_ms': percentile(reads, 50) * 1000,
+            'read_p95_ms': percentile(reads, 95) * 1000,
+            'interval_p95_ms': percentile(intervals, 95) * 1000,
+        }
+
+    def report(self):
+        s = self.stats()
+        mode = f"{s['mode'][0]}x{s['mode'][1]}" if s['mode'] else "?"
+        return (f"mode={mode} {s['fourcc'] or '?'} delivered={s['fps']:.1f} FPS | "
+                f"read p50={s['read_p50_ms']:.1f}ms p95={s['read_p95_ms']:.1f}ms | "
+                f"frame interval p95={s['interval_p95_ms']:.1f}ms")
+
+
+class VideoFileSource:
+    """Frames from a video file, optionally looped and paced to the file's own FPS."""
+
+    def __init__(self, path, loop=False, realtime=False):
+        import cv2
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"cannot open video {path!r}")
+        self.loop = loop
+        self._pos_prop = cv2.CAP_PROP_POS_FRAMES
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self._period = 1 / fps if realtime else 0
+        self._next_at = 0
+
+    def read(self):
+        ok, frame = self.cap.read()
+        if not ok and self.loop:
+            self.cap.set(self._pos_prop, 0)
+            ok, frame = self.cap.read()
+        if ok and self._period:
+            self._next_at = pace(self._next_at, self._period)
+        return ok, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageSequenceSource:
+    """Still images (a directory or glob pattern) played back in name order."""
+
+    def __init__(self, pattern, loop=False, preload=True):
+        import cv2
+        self._imread = cv2.imread
+        if os.path.isdir(pattern):
+            paths = [os.path.join(pattern, p) for p in os.listdir(pattern)
+                     if p.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            paths = glob.glob(pattern)
+        self.paths = sorted(paths)
+        if not self.paths:
+            raise IOError(f"no images match {pattern!r}")
+        self.loop = loop
+        # Decoding is not what we want to measure: load everything up front by default
+        self._frames = [self._load(p) for p in self.paths] if preload else None
+        self._index = 0
+
+    def _load(self, path):
+        frame = self._imread(path)
+        if frame is None:
+            raise IOError(f"cannot read image {path!r}")
+        return frame
+
+    def read(self):
+        if self._index >= len(self.paths):
+            if not self.loop:
+                return False, None
+            self._index = 0
+        i = self._index
+        self._index += 1
+        return True, (self._frames[i] if self._frames is not None else self._load(self.paths[i]))
+
+    def release(self):
+        self._frames = None
+
+
+class SyntheticSource:
+    """
+    Deterministic generated frames: a scrolling gradient with a bright disc
+    orbiting the centre, so consecutive frames differ like real video does.
+    `count` frames (None = endless); `fps` paces reads like a camera would.
+    """
+
+    def __init__(self, width=1280, height=720, count=None, fps=None, seed=0, variants=16):
+        self.width, self.height = width, height
+        self.count = count
+        self._period = 1 / fps if fps else 0
+        self._next_at = 0
+        self._served = 0
+        # A small bank of frames reused round-robin, so generation cost stays out of the numbers
+        rng = np.random.default_rng(seed)
+        yy, xx = np.mgrid[0:height, 0:width]
+        base = np.empty((height, width, 3), dtype=np.uint8)
+        base[..., 0] = (xx * 255 // max(1, width - 1)).astype(np.uint8)
+        base[..., 1] = (yy * 255 // max(1, height - 1)).astype(np.uint8)
+        base[..., 2] = rng.integers(0, 64, (height, width), dtype=np.uint8)
+        r = min(width, height) // 10
+        self._frames = []
+        for i in range(variants):
+            frame = np.roll(base, i * width // variants, axis=1)
+            angle = 2 * np.pi * i / variants
+            cx = int(width / 2 + np.cos(angle) * width / 4)
+            cy = int(height / 2 + np.sin(angle) * height / 4)
+            frame[(xx - cx) ** 2 + (yy - cy) ** 2 < r * r] = (200, 220, 255)
+            self._frames.append(frame)
+
+    def read(self):
+        if self.count is not None and self._served >= self.count:
+            return False, None
+        frame = self._frames[self._served % len(self._frames)]
+        self._served += 1
+        if self._period:
+            self._next_at = pace(self._next_at, self._period)
+        return True, frame
+
+    def release(self):
+        self._frames = []
+
+
+def pace(next_at, period):
+    """Sleeps until `next_at` (perf_counter time); returns when the following frame is due."""
+    now = time.perf_counter()
+    if next_at > now:
+        time.sleep(next_at - now)
+        return next_at + period
+    return now + period  # Running late: don't try to catch up with a burst
+
+
+def parse_size(text, default=(1280, 720)):
+    if not text:
+        return default
+    w, h = text.lower().split('x')
+    return int(w), int(h)
+
+
+def open_source(spec, loop=False, realtime=False, target=None):
+    """
+    Builds a source from a string:
+      'camera' / 'camera:N' / 'N'       -> CameraSource(N), negotiated to cover `target` pixels
+      'synthetic' / 'synthetic:WxH'     -> SyntheticSource (paced at 30 FPS when realtime)
+      directory, or pattern with * ?    -> ImageSequenceSource
+      anything else                     -> VideoFileSource
+    """
+    kind, _, arg = str(spec).partition(':')
+    if spec is None or kind == 'camera':
+        return CameraSource(int(arg or 0), target)
+    if str(spec).isdigit():
+        return CameraSource(int(spec), target)
+    if kind == 'synthetic':
+        w, h = parse_size(arg)
+        return SyntheticSource(w, h, fps=30 if realtime else None)
+    if os.path.isdir(spec) or glob.has_magic(spec):
+        return ImageSequenceSource(spec, loop=loop)
+    return VideoFileSource(spec, loop=loop, realtime=realtime)
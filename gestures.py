@@ -0,0 +1,121 @@
+"""
+Hand gestures and constant-time hit-testing.
+
+PinchDetector replaces the fixed `distance < 40` px test with a small state
+machine: the thumb-index gap is divided by the hand's size (wrist to middle
+knuckle), so the gesture means the same near and far from the camera, and
+separate engage/release thresholds plus a short debounce stop a wobbling
+pinch from dropping the tile mid-drag. A hand that blinks out of tracking for
+a few frames keeps its pinch.
+
+HitMap precomputes, for every window pixel, which grid tile or UI control is
+under it, so pointer hit-tests are one array read.
+"""
+import math
+from array import array
+
+import numpy as np
+
+PINCH_ENGAGE = 0.30     # Pinch starts below this gap / hand size...
+PINCH_RELEASE = 0.45    # ...and only ends above this one
+DEBOUNCE_FRAMES = 2     # Consecutive hand results needed to flip state
+LOST_GRACE_FRAMES = 6   # Frames without a hand before a held pinch is released
+MIN_HAND_SIZE = 20      # px; guards the ratio when the hand is tiny or edge-on
+
+# HitMap targets besides tile indices
+HIT_NONE = 0xFFFF
+HIT_BUTTON = 0xFFFE
+HIT_SIDEBAR = 0xFFFD
+
+
+def frame_to_screen(point):
+    """
+    Maps a landmark in frame pixels to screen pixels. The old path mirrored the
+    frame (x -> W - x) and rotated it for surfarray (New_X = Old_Y,
+    New_Y = W - Old_X); together that is just an axis swap, and it's the only
+    place the mapping lives.
+    """
+    x, y = point
+    return y, x
+
+
+class PinchDetector:
+    def __init__(self, engage=PINCH_ENGAGE, release=PINCH_RELEASE, debounce=DEBOUNCE_FRAMES,
+                 lost_grace=LOST_GRACE_FRAMES):
+        if release < engage:
+            raise ValueError("release threshold must not be below the engage threshold")
+        self.engage = engage
+        self.release = release
+        self.debounce = max(1, debounce)
+        self.lost_grace = lost_grace
+        self.pinching = False
+        self.ratio = None       # Last gap / hand size, for debugging overlays
+        self._streak = 0
+        self._lost = 0
+
+        # Counters
+        self.engaged = 0
+        self.released = 0
+        self.suppressed = 0     # Flips that didn't survive the debounce
+
+    def update(self, index_tip, thumb_tip, wrist, middle_mcp):
+        """Feeds one hand result (frame pixels); returns whether the hand is pinching."""
+        self._lost = 0
+        size = max(math.dist(wrist, middle_mcp), MIN_HAND_SIZE)
+        self.ratio = math.dist(index_tip, thumb_tip) / size
+        want = self.ratio <= self.release if self.pinching else self.ratio < self.engage
+        if want == self.pinching:
+            if self._streak: self.suppressed += 1
+            self._streak = 0
+            return self.pinching
+        self._streak += 1
+        if self._streak >= self.debounce:
+            self._flip(want)
+        return self.pinching
+
+    def lost(self):
+        """No hand this frame: hold a pinch through short dropouts, then let go."""
+        self._streak = 0
+        self._lost += 1
+        if self.pinching and self._lost > self.lost_grace:
+            self._flip(False)
+        return self.pinching
+
+    def _flip(self, pinching):
+        self.pinching = pinching
+        self._streak = 0
+        if pinching: self.engaged += 1
+        else: self.released += 1
+
+    def report(self):
+        return f"engaged={self.engaged} released={self.released} suppressed flickers={self.suppressed}"
+
+
+class HitMap:
+    """Per-pixel lookup of what's under the pointer: a tile index, HIT_BUTTON, HIT_SIDEBAR or HIT_NONE."""
+
+    def __init__(self, width, height, board_w, board_h, cols, rows, tile_w, tile_h, buttons=()):
+        self.width, self.height = width, height
+        table = np.full((height, width), HIT_NONE, dtype=np.uint16)
+        ys, xs = np.arange(board_h), np.arange(board_w)
+        row, col = ys // tile_h, xs // tile_w
+        tiles = row[:, None] * cols + col[None, :]
+        inside = (row < rows)[:, None] & (col < cols)[None, :]
+        board = table[:board_h, :board_w]
+        board[inside] = tiles[inside]
+        table[:, board_w:] = HIT_SIDEBAR
+        for x, y, w, h in buttons:
+            table[y:y + h, x:x + w] = HIT_BUTTON
+        # Plain array: indexing it from Python is cheaper than indexing a numpy array
+        self._table = array('H')
+        self._table.frombytes(table.tobytes())
+
+    @classmethod
+    def for_session(cls, session, width, height, buttons=()):
+        return cls(width, height, session.board_w, session.board_h, session.grid.cols, session.grid.rows,
+                   session.tile_w, session.tile_h, buttons)
+
+    def at(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self._table[y * self.width + x]
+        return HIT_NONE
@@ -0,0 +1,137 @@
+"""
+Runtime quality governor and stall compensation.
+
+On a busy or weak machine the game loop used to just slow down while the
+countdown kept running on wall time. QualityGovernor watches the render
+loop's own work time per frame (excluding the frame-cap sleep), the FPS
+pygame's clock measures and the hand-inference stage cost, and steps through
+TIERS: smaller MediaPipe input, a longer inference stride, the lighter hand
+model, then a lower frame-rate target. It steps down quickly when a tier is
+over budget and back up only after UP_AFTER seconds of clear headroom, so it
+doesn't oscillate.
+
+Independently, track() measures how long the player couldn't see or move the
+board - the loop froze, or the camera stopped delivering frames - and returns
+that time so the caller can credit it back to the countdown
+(PuzzleSession.compensate, capped per attempt).
+"""
+from collections import deque
+
+from profiler import percentile
+
+# Cheapest last. Every tier must be cheaper than the one before it in every knob it changes.
+TIERS = (
+    {'name': 'HIGH',    'fps': 60, 'infer_size': 256, 'every_n': 3, 'model_complexity': 1},
+    {'name': 'MEDIUM',  'fps': 60, 'infer_size': 224, 'every_n': 4, 'model_complexity': 1},
+    {'name': 'LOW',     'fps': 45, 'infer_size': 192, 'every_n': 4, 'model_complexity': 0},
+    {'name': 'MINIMAL', 'fps': 30, 'infer_size': 160, 'every_n': 6, 'model_complexity': 0},
+)
+
+EVAL_INTERVAL = 1.0     # Seconds between decisions
+MIN_SAMPLES = 20        # Frames needed before a decision
+WINDOW = 120            # Frame work times kept
+DOWN_LOAD = 0.9         # Step down if work p95 exceeds this share of the frame budget...
+DOWN_FPS = 0.85         # ...or delivered FPS falls below this share of the target...
+HAND_BUDGET_MS = 40.0   # ...or hand inference p95 exceeds this
+UP_LOAD = 0.5           # Step up only if the better tier's budget would be at most half used
+UP_AFTER = 5.0          # ...continuously for this long
+COOLDOWN = 2.0          # Seconds after a change before stepping down again
+
+STALL_GAP = 0.25        # A loop iteration longer than this means the app itself froze
+STALL_AFTER = 0.5       # No new camera frame for this long means the feed stalled
+
+
+class QualityGovernor:
+    def __init__(self, tiers=TIERS, tier=0, auto=True, profiler=None):
+        self.tiers = tiers
+        self.profiler = profiler    # StageProfiler timing the 'hands' stage, if any
+        self.index = tier
+        self.auto = auto
+        self._work = deque(maxlen=WINDOW)
+        self._hands_mark = 0        # profiler.count('hands') at the last switch
+        self._next_eval = 0.0
+        self._cooldown_until = 0.0
+        self._headroom_since = None
+
+        # Stall tracking
+        self._last_loop = None
+        self._last_frame_at = None
+        self.stalled = 0.0      # Seconds of stall seen in total
+
+        # Counters
+        self.steps_down = 0
+        self.steps_up = 0
+
+    @property
+    def tier(self):
+        return self.tiers[self.index]
+
+    # --- QUALITY ---
+    def update(self, now, work_s, fps):
+        """Feeds one frame's work time; returns the new tier dict when the tier changes, else None."""
+        self._work.append(work_s)
+        if not self.auto or now < self._next_eval or len(self._work) < MIN_SAMPLES:
+            return None
+        self._next_eval = now + EVAL_INTERVAL
+
+        p95 = percentile(sorted(self._work), 95)
+        hands_p95_ms = self._hands_p95_ms()
+        target = self.tier['fps']
+        over = p95 > DOWN_LOAD / target or fps < DOWN_FPS * target or hands_p95_ms > HAND_BUDGET_MS
+        if over:
+            self._headroom_since = None
+            if self.index < len(self.tiers) - 1 and now >= self._cooldown_until:
+                self.steps_down += 1
+                return self._switch(self.index + 1, now)
+            return None
+
+        if self.index == 0:
+            return None
+        better = self.tiers[self.index - 1]
+        if p95 < UP_LOAD / better['fps'] and hands_p95_ms < UP_LOAD * HAND_BUDGET_MS:
+            if self._headroom_since is None:
+                self._headroom_since = now
+            elif now - self._headroom_since >= UP_AFTER:
+                self.steps_up += 1
+                return self._switch(self.index - 1, now)
+        else:
+            self._headroom_since = None
+        return None
+
+    def _hands_p95_ms(self):
+        """Hand-inference p95 over samples taken since the last switch (the profiler's window spans ~10 s)."""
+        if not self.profiler:
+            return 0.0
+        fresh = self.profiler.count('hands') - self._hands_mark
+        return self.profiler.stats('hands', last=fresh)[1] if fresh > 0 else 0.0
+
+    def _switch(self, index, now):
+        self.index = index
+        self._work.clear()      # Old samples describe the old tier
+        if self.profiler:
+            self._hands_mark = self.profiler.count('hands')
+        self._headroom_since = None
+        self._cooldown_until = now + COOLDOWN
+        return self.tier
+
+    # --- STALLS ---
+    def track(self, now, new_frame):
+        """Call once per loop iteration; returns seconds the player lost to a stall since the last call."""
+        last, self._last_loop = self._last_loop, now
+        if new_frame or self._last_frame_at is None:
+            self._last_frame_at = now
+        if last is None:
+            return 0.0
+        dt = now - last
+        if dt > STALL_GAP:
+            lost = dt - 1.0 / self.tier['fps']          # The whole loop froze
+        elif now - self._last_frame_at > STALL_AFTER:
+            lost = dt                                   # Camera feed stalled: nothing to solve from
+        else:
+            return 0.0
+        self.stalled += lost
+        return lost
+
+    def report(self):
+        return (f"tier={self.tier['name']} down={self.steps_down} up={self.steps_up} "
+                f"stalls={self.stalled:.2f}s")
@@ -0,0 +1,78 @@
+from array import array
+
+MAX_SIDE = 16   # Tiles per side; result tokens and the tile stream store cols / rows in one byte
+
+
+def check_size(cols, rows):
+    """Raises ValueError unless cols x rows is a grid the renderer, tokens and stream can encode."""
+    if not (2 <= cols <= MAX_SIDE and 1 <= rows <= MAX_SIDE):
+        raise ValueError(f"grid must be between 2x1 and {MAX_SIDE}x{MAX_SIDE}, got {cols}x{rows}")
+
+
+class PuzzleGrid:
+    """
+    Tile permutation for a cols x rows board, stored in a compact typed array.
+    order[pos] is the tile currently shown at grid position `pos`; the board is
+    solved when order[pos] == pos everywhere. A running count of tiles in place
+    is kept up to date by swap(), so win checks and progress are O(1).
+    `version` goes up on every change, so renderers can cache per permutation.
+    """
+    __slots__ = ('cols', 'rows', 'size', 'typecode', 'order', 'in_place', 'version')
+
+    def __init__(self, cols, rows=None):
+        rows = cols if rows is None else rows
+        check_size(cols, rows)
+        self.cols = cols
+        self.rows = rows
+        self.size = cols * rows
+        self.typecode = 'H' if self.size <= 0xFFFF else 'I'
+        self.order = array(self.typecode, range(self.size))
+        self.in_place = self.size
+        self.version = 0
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, pos):
+        return self.order[pos]
+
+    def __iter__(self):
+        return iter(self.order)
+
+    @property
+    def solved(self):
+        return self.in_place == self.size
+
+    def progress(self):
+        """Fraction of tiles in their home position."""
+        return self.in_place / self.size
+
+    def set_order(self, order):
+        """Replaces the permutation (O(n), only on shuffle/reset)."""
+        order = array(self.typecode, order)
+        if len(order) != self.size:
+            raise ValueError(f"expected {self.size} tiles, got {len(order)}")
+        self.order = order
+        self.in_place = sum(1 for pos, tile in enumerate(order) if pos == tile)
+        self.version += 1
+
+    def reset(self):
+        self.set_order(range(self.size))
+
+    def swap(self, a, b):
+        """Swaps the tiles at positions a and b, updating the in-place count in O(1)."""
+        if a == b:
+            return
+        order = self.order
+        ta, tb = order[a], order[b]
+        self.in_place -= (ta == a) + (tb == b)
+        order[a], order[b] = tb, ta
+        self.in_place += (tb == a) + (ta == b)
+        self.version += 1
+
+    def position(self, pos):
+        """(col, row) of a grid position."""
+        return pos % self.cols, pos // self.cols
+
+    def tolist(self):
+        return self.order.tolist()
@@ -0,0 +1,341 @@
+"""
+Shared hand-inference service.
+
+One LiveJigsawCaptcha per station means one MediaPipe model per session. The
+service instead owns a small, fixed set of models (worker threads, or worker
+processes to sidestep the GIL) and multiplexes frames from any number of
+sessions through them:
+
+  * each session has at most one frame queued - a newer frame replaces the
+    older one, which is answered with None (the tracker keeps predicting);
+  * sessions are served highest priority first, round-robin within a priority;
+  * when more than `max_pending` sessions are waiting, the lowest-priority,
+    oldest request is shed instead of letting latency grow without bound;
+  * a model worker takes up to `batch_size` requests at a time, so one IPC
+    round trip carries several frames.
+
+Shared models run in static-image mode: interleaving frames from different
+people would confuse MediaPipe's cross-frame tracking. Smoothing and
+prediction stay per session in AdaptiveHandTracker.
+
+    service = HandInferenceService(workers=2, backend='process').start()
+    tracker = AdaptiveHandTracker(service.client('station-7', priority=1))
+
+Sessions in other processes (stations.py) get a PipeHandClient; a
+serve_client() thread next to the service answers it over a Pipe.
+"""
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+MAX_PENDING = 64        # Sessions allowed to wait before the service starts shedding
+BATCH_SIZE = 4          # Frames handed to a model worker per round trip
+CLIENT_TIMEOUT = 0.5    # Seconds a client waits for its result before giving up
+
+Landmark = namedtuple('Landmark', 'x y z')
+
+
+class HandLandmarks:
+    __slots__ = ('landmark',)
+
+    def __init__(self, points):
+        self.landmark = [Landmark(*p) for p in points]
+
+
+class HandResults:
+    """Quacks like MediaPipe's result object for the fields the tracker reads."""
+    __slots__ = ('multi_hand_landmarks',)
+
+    def __init__(self, hands):
+        self.multi_hand_landmarks = [HandLandmarks(h) for h in hands] if hands else None
+
+
+def create_hands(max_num_hands=1, min_detection_confidence=0.7):
+    """Default model factory (module level so worker processes can unpickle it)."""
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=max_num_hands,
+                                    min_detection_confidence=min_detection_confidence)
+
+
+def run_model(hands, frame):
+    """Raw result of one frame: a list of hands, each 21 (x, y, z) tuples, or None."""
+    results = hands.process(frame)
+    if not results.multi_hand_landmarks:
+        return None
+    return [[(p.x, p.y, p.z) for p in h.landmark] for h in results.multi_hand_landmarks]
+
+
+def _process_worker(conn, model_factory):
+    hands = model_factory()
+    conn.send('ready')
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        conn.send([run_model(hands, frame) for frame in batch])
+
+
+class _Request:
+    __slots__ = ('session', 'priority', 'frame', 'future', 'queued_at', 'live')
+
+    def __init__(self, session, priority, frame):
+        self.session = session
+        self.priority = priority
+        self.frame = frame
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+        self.live = True   # False once replaced, shed or taken (lazy heap deletion)
+
+
+class HandClient:
+    """Per-session handle with the `process(image)` call AdaptiveHandTracker expects from a model."""
+
+    def __init__(self, service, session, priority=0, timeout=CLIENT_TIMEOUT):
+        self.service = service
+        self.session = session
+        self.priority = priority
+        self.timeout = timeout
+
+    def submit(self, image):
+        return self.service.submit(self.session, image, self.priority)
+
+    def process(self, image):
+        """Blocking inference. None means the service shed or timed out this frame."""
+        try:
+            raw = self.submit(image).result(self.timeout)
+        except FutureTimeout:
+            return None
+        return None if raw is None else HandResults(raw)
+
+    def close(self):
+        self.service.forget(self.session)
+
+
+class PipeHandClient:
+    """HandClient for a session in another process: frames go over a Pipe to serve_client()."""
+
+    def __init__(self, conn, timeout=CLIENT_TIMEOUT):
+        self.conn = conn
+        self.timeout = timeout
+        self._seq = 0
+
+    def process(self, image):
+        """Blocking inference. None means the service shed or timed out this frame, or has gone away."""
+        self._seq += 1
+        deadline = time.perf_counter() + self.timeout
+        try:
+            self.conn.send((self._seq, image))
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self.conn.poll(remaining):
+                    return None
+                seq, raw = self.conn.recv()
+                if seq == self._seq:
+                    break       # Older answers arrive late when a previous call timed out
+        except (EOFError, OSError):
+            return None
+        return None if raw is None else HandResults(raw)
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+
+def serve_client(client, conn):
+    """
+    Answers the PipeHandClient at the other end of `conn` through `client` (a HandClient)
+    until it closes. Run one per remote session, on its own thread.
+    """
+    try:
+        while True:
+            msg = conn.recv()
+            while msg is not None and conn.poll():
+                msg = conn.recv()   # Only the newest frame is worth inferring
+            if msg is None:
+                break
+            seq, image = msg
+            conn.send((seq, client.submit(image).result()))
+    except (EOFError, OSError):
+        pass
+    finally:
+        client.close()
+        conn.close()
+
+
+class HandInferenceService:
+    def __init__(self, workers=1, backend='thread', model_factory=create_hands,
+                 batch_size=BATCH_SIZE, max_pending=MAX_PENDING):
+        if backend not in ('thread', 'process'):
+            raise ValueError(f"unknown backend {backend!r}")
+        self.workers = workers
+        self.backend = backend
+        self.model_factory = model_factory
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+
+        self._heap = []                 # (-priority, seq, request)
+        self._pending = {}              # session -> live request
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._threads = []
+        self._procs = []
+
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.replaced = 0
+        self.shed = 0
+        self.batches = 0
+        self.wait_total = 0.0
+
+    # --- LIFECYCLE ---
+    def start(self):
+        for i in range(self.workers):
+            if self.backend == 'process':
+                parent, child = multiprocessing.Pipe()
+                proc = multiprocessing.Process(target=_process_worker, args=(child, self.model_factory),
+                                               name=f"hands-{i}", daemon=True)
+                proc.start()
+                child.close()  # So a worker that dies while loading reads as EOF here, not a hang
+                parent.recv()  # Model loaded
+                self._procs.append(proc)
+                infer = self._remote_infer(parent)
+            else:
+                infer = self._local_infer(self.model_factory())
+            t = threading.Thread(target=self._dispatch_loop, args=(infer,), name=f"hands-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            for req in self._pending.values():
+                req.future.set_result(None)
+            self._pending.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        for p in self._procs:
+            p.join(timeout=1.0)
+            if p.is_alive(): p.terminate()
+
+    @staticmethod
+    def _local_infer(hands):
+        return lambda frames: [run_model(hands, f) for f in frames]
+
+    @staticmethod
+    def _remote_infer(conn):
+        def infer(frames):
+            if frames is None:
+                conn.send(None)
+                return None
+            conn.send(frames)
+            return conn.recv()
+        return infer
+
+    # --- SESSIONS ---
+    def client(self, session, priority=0, timeout=CLIENT_TIMEOUT):
+        return HandClient(self, session, priority, timeout)
+
+    def forget(self, session):
+        with self._cond:
+            req = self._pending.pop(session, None)
+            if req:
+                req.live = False
+                req.future.set_result(None)
+
+    def submit(self, session, image, priority=0):
+        """Queues a frame for `session`; the Future resolves to the raw result (or None if dropped)."""
+        req = _Request(session, priority, np.array(image, copy=True))  # Callers reuse their buffers
+        with self._cond:
+            self.submitted += 1
+            old = self._pending.get(session)
+            if old is not None:
+                old.live = False
+                old.future.set_result(None)
+                self.replaced += 1
+            elif len(self._pending) >= self.max_pending:
+                victim = self._lowest_pending()
+                if victim.priority > priority:
+                    self.shed += 1
+                    req.future.set_result(None)
+                    return req.future
+                victim.live = False
+                del self._pending[victim.session]
+                victim.future.set_result(None)
+                self.shed += 1
+            self._pending[session] = req
+            heapq.heappush(self._heap, (-priority, next(self._seq), req))
+            self._cond.notify()
+        return req.future
+
+    def _lowest_pending(self):
+        # Only runs while saturated; max_pending keeps this scan small
+        return min(self._pending.values(), key=lambda r: (r.priority, r.queued_at))
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._stop and not self._pending:
+                self._cond.wait()
+            batch = []
+            while self._heap and len(batch) < self.batch_size:
+                _, _, req = heapq.heappop(self._heap)
+                if req.live:
+                    req.live = False
+                    del self._pending[req.session]
+                    batch.append(req)
+            return batch
+
+    def _dispatch_loop(self, infer):
+        while True:
+            batch = self._take_batch()
+            if self._stop:
+                for req in batch:
+                    req.future.set_result(None)
+                if self.backend == 'process': infer(None)  # Let the worker process exit
+                return
+            if not batch:
+                continue
+            now = time.perf_counter()
+            self.wait_total += sum(now - r.queued_at for r in batch)
+            try:
+                results = infer([r.frame for r in batch])
+            except Exception as e:
+                for req in batch:
+                    req.future.set_exception(e)
+                continue
+            self.batches += 1
+            self.completed += len(batch)
+            for req, raw in zip(batch, results):
+                req.future.set_result(raw)
+
+    # --- STATS ---
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'backend': self.backend,
+            'pending': len(self._pending),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'replaced': self.replaced,
+            'shed': self.shed,
+            'avg_batch': self.completed / self.batches if self.batches else 0.0,
+            'avg_wait_ms': self.wait_total * 1000 / self.completed if self.completed else 0.0,
+        }
+
+    def report(self):
+        s = self.stats()
+        return (f"{s['backend']} x{s['workers']} completed={s['completed']} replaced={s['replaced']} "
+                f"shed={s['shed']} avg batch={s['avg_batch']:.1f} avg wait={s['avg_wait_ms']:.1f}ms")
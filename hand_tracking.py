@@ -0,0 +1,224 @@
+import math
+import threading
+import time
+
+import cv2
+import numpy as np
+
+INDEX_TIP = 8
+THUMB_TIP = 4
+WRIST = 0
+MIDDLE_MCP = 9      # With the wrist, gives a hand-size scale that doesn't change with finger pose
+TRACKED_LANDMARKS = (INDEX_TIP, THUMB_TIP, WRIST, MIDDLE_MCP)
+
+MOTION_THUMB_SIZE = 32  # Motion is measured on a tiny grayscale thumbnail
+
+
+class OneEuroFilter:
+    """
+    One-Euro low-pass filter (Casiez et al.) for a single scalar signal.
+    Smooths jitter at low speed, follows quickly at high speed, and keeps a
+    filtered derivative we reuse for constant-velocity prediction.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.02, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.x_prev = None
+        self.raw_prev = None
+        self.dx_prev = 0.0
+        self.t_prev = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self):
+        self.x_prev = None
+        self.raw_prev = None
+        self.dx_prev = 0.0
+        self.t_prev = None
+
+    def __call__(self, x, t):
+        if self.x_prev is None:
+            self.x_prev = self.raw_prev = x
+            self.t_prev = t
+            return x
+
+        dt = max(t - self.t_prev, 1e-6)
+        a_d = self._alpha(self.d_cutoff, dt)
+        # Derivative from raw samples so prediction isn't biased by the smoothing lag
+        dx = (x - self.raw_prev) / dt
+        self.dx_prev = a_d * dx + (1 - a_d) * self.dx_prev
+
+        cutoff = self.min_cutoff + self.beta * abs(self.dx_prev)
+        a = self._alpha(cutoff, dt)
+        self.x_prev = a * x + (1 - a) * self.x_prev
+        self.raw_prev = x
+        self.t_prev = t
+        return self.x_prev
+
+    def predict(self, t, max_horizon):
+        """Constant-velocity extrapolation from the last filtered sample."""
+        if self.x_prev is None:
+            return None
+        dt = min(max(t - self.t_prev, 0.0), max_horizon)
+        return self.x_prev + self.dx_prev * dt
+
+
+class LazyHands:
+    """
+    Drop-in for mp.solutions.hands.Hands that keeps MediaPipe off the startup path:
+    the import, model construction and one warm-up inference on a blank frame all
+    happen on a background thread. Until `ready` is set, process() returns None,
+    which AdaptiveHandTracker treats as "no result" (the game stays mouse-only).
+    """
+
+    def __init__(self, warmup_size=256, **hands_kwargs):
+        self.warmup_size = warmup_size
+        self.hands_kwargs = hands_kwargs
+        self.ready = threading.Event()
+        self.error = None
+        self.timings = {}   # Seconds spent in import / model / warmup
+        self._hands = None
+        threading.Thread(target=self._load, name="hands-loader", daemon=True).start()
+
+    def _load(self):
+        try:
+            t0 = time.perf_counter()
+            import mediapipe as mp
+            t1 = time.perf_counter()
+            hands = mp.solutions.hands.Hands(**self.hands_kwargs)
+            t2 = time.perf_counter()
+            # The first process() call builds the graph; pay for it here, not mid-game
+            hands.process(np.zeros((self.warmup_size, self.warmup_size, 3), dtype=np.uint8))
+            t3 = time.perf_counter()
+        except Exception as e:  # Missing/broken mediapipe: stay mouse-only
+            self.error = e
+            return
+        self.timings = {'import': t1 - t0, 'model': t2 - t1, 'warmup': t3 - t2}
+        self._hands = hands
+        self.ready.set()
+
+    def process(self, image):
+        hands = self._hands
+        return hands.process(image) if hands is not None else None
+
+
+class AdaptiveHandTracker:
+    """
+    Runs MediaPipe on a downscaled frame only when needed and predicts the
+    index tip (8), thumb tip (4), wrist (0) and middle knuckle (9) in between.
+
+    Modes:
+      'every_n'  - infer every `every_n` frames
+      'motion'   - infer when the scene moves (or after `max_skip` frames)
+      'adaptive' - every_n while a hand is tracked, motion-gated otherwise
+    """
+
+    def __init__(self, hands, infer_size=256, mode='adaptive', every_n=3, max_skip=15,
+                 motion_threshold=3.0, max_predict=0.15, min_cutoff=1.0, beta=0.02):
+        self.hands = hands
+        self.infer_size = infer_size
+        self.mode = mode
+        self.every_n = max(1, every_n)
+        self.base_max_skip = max_skip  # Configured ceiling; max_skip never drops below every_n
+        self.max_skip = max(self.every_n, max_skip)
+        self.motion_threshold = motion_threshold
+        self.max_predict = max_predict
+
+        self._filters = {lm: (OneEuroFilter(min_cutoff, beta), OneEuroFilter(min_cutoff, beta))
+                         for lm in TRACKED_LANDMARKS}
+        self._infer_buf = np.empty((infer_size, infer_size, 3), dtype=np.uint8)
+        self._prev_thumb = None
+        self._since_infer = self.max_skip  # Force inference on the first frame
+        self.has_hand = False
+        # (inference count, raw index tip in frame pixels or None): real inferences only, never
+        # smoothed or predicted, for signals that need the hand's own jitter (liveness.py)
+        self.last_inference = (0, None)
+
+        # Counters
+        self.frames = 0
+        self.inferences = 0
+
+    def _motion(self, frame_rgb):
+        thumb = cv2.resize(frame_rgb, (MOTION_THUMB_SIZE, MOTION_THUMB_SIZE), interpolation=cv2.INTER_AREA)
+        thumb = cv2.cvtColor(thumb, cv2.COLOR_RGB2GRAY).astype(np.int16)
+        prev, self._prev_thumb = self._prev_thumb, thumb
+        if prev is None:
+            return float('inf')
+        return float(np.abs(thumb - prev).mean())
+
+    def _should_infer(self, frame_rgb):
+        if self._since_infer >= self.max_skip:
+            return True
+        if self.mode == 'every_n':
+            return self._since_infer >= self.every_n
+        if self.mode == 'adaptive' and self.has_hand:
+            return self._since_infer >= self.every_n
+        return self._motion(frame_rgb) > self.motion_threshold
+
+    def set_quality(self, infer_size=None, every_n=None):
+        """Retunes inference size / stride at runtime (e.g. from governor.QualityGovernor)."""
+        if infer_size and infer_size != self.infer_size:
+            # Swapped in one assignment; _infer sizes from the buffer it picked up
+            self._infer_buf = np.empty((infer_size, infer_size, 3), dtype=np.uint8)
+            self.infer_size = infer_size
+        if every_n:
+            self.every_n = max(1, every_n)
+            self.max_skip = max(self.every_n, self.base_max_skip)
+
+    def _infer(self, frame_rgb, now):
+        buf = self._infer_buf
+        cv2.resize(frame_rgb, buf.shape[1::-1], dst=buf, interpolation=cv2.INTER_AREA)
+        results = self.hands.process(buf)
+        if results is None:
+            # Model still loading (LazyHands) or a shared model (hand_service.py) shed
+            # this frame: coast on the prediction
+            return self._predict(now) if self.has_hand else None
+        self.inferences += 1
+        self._since_infer = 0
+
+        if not results.multi_hand_landmarks:
+            self.has_hand = False
+            self.last_inference = (self.inferences, None)
+            for fx, fy in self._filters.values():
+                fx.reset(); fy.reset()
+            return None
+
+        # Landmarks are normalized, so scaling by the full frame undoes the downscale
+        h, w = frame_rgb.shape[:2]
+        lm = results.multi_hand_landmarks[0].landmark
+        self.has_hand = True
+        tip = lm[TRACKED_LANDMARKS[0]]
+        self.last_inference = (self.inferences, (tip.x * w, tip.y * h))  # One assignment: read by the render loop
+        points = []
+        for idx in TRACKED_LANDMARKS:
+            fx, fy = self._filters[idx]
+            points.append((int(fx(lm[idx].x * w, now)), int(fy(lm[idx].y * h, now))))
+        return tuple(points)
+
+    def _predict(self, now):
+        points = []
+        for idx in TRACKED_LANDMARKS:
+            fx, fy = self._filters[idx]
+            points.append((int(fx.predict(now, self.max_predict)), int(fy.predict(now, self.max_predict))))
+        return tuple(points)
+
+    def update(self, frame_rgb, now=None):
+        """Returns one (x, y) per TRACKED_LANDMARKS (index, thumb, wrist, middle MCP) in frame pixels, or None if no hand."""
+        now = time.perf_counter() if now is None else now
+        self.frames += 1
+        self._since_infer += 1
+
+        if self._should_infer(frame_rgb):
+            return self._infer(frame_rgb, now)
+        if not self.has_hand:
+            return None
+        return self._predict(now)
+
+    def report(self):
+        ratio = self.inferences / self.frames if self.frames else 0.0
+        return f"frames={self.frames} inferences={self.inferences} ({ratio:.0%} of frames)"
@@ -0,0 +1,112 @@
+"""
+Compact binary input traces.
+
+A trace is a small header followed by fixed 14-byte records, each stamped
+with seconds since the recording started (perf_counter):
+
+  FRAME    one render-loop tick          x = frame counter (mod 2^16)
+  HAND     latest hand-tracking result   x, y; t = capture time of its camera frame
+  POINTER  input handed to the session   x, y; flags = start / release / holding / hand
+  START    session (re)started           x = tile count, followed by the board order
+  SWAP     a swap reached the screen     x = tiles in place, y = swaps so far
+  END      recording closed              flags = final state
+  COMPENSATE stall time credited back    x = ms, y = remaining us of the attempt's total credit
+
+replay.py feeds POINTER/START/COMPENSATE/FRAME back through PuzzleSession and compares
+its swaps with the recorded SWAP records.
+"""
+import struct
+import time
+from array import array
+
+MAGIC = b'JGTR'
+VERSION = 1
+HEADER = struct.Struct('<4sBHHHHH')     # magic, version, cols, rows, board_w, board_h, time_limit
+RECORD = struct.Struct('<BdhhB')        # kind, t, x, y, flags
+
+FRAME, HAND, POINTER, START, SWAP, END, COMPENSATE = range(1, 8)
+
+# POINTER flags
+PTR_START = 1
+PTR_RELEASE = 2
+PTR_HOLDING = 4
+PTR_HAND = 8        # Came from the hand tracker rather than the mouse
+# HAND flags
+HAND_PRESENT = 1
+HAND_PINCHING = 2
+
+STATES = ('MENU', 'PLAYING', 'WON', 'LOST')
+
+
+class TraceRecorder:
+    """Appends records for one run of the game; writes go through a buffered file."""
+
+    def __init__(self, path, session):
+        self.path = path
+        self._f = open(path, 'wb')
+        self._t0 = time.perf_counter()
+        self._tile_code = '<%dH' if session.grid.size <= 0xFFFF else '<%dI'
+        self._f.write(HEADER.pack(MAGIC, VERSION, session.grid.cols, session.grid.rows,
+                                  session.board_w, session.board_h, session.time_limit))
+        self.records = 0
+
+    def _write(self, kind, t, x=0, y=0, flags=0):
+        t = (time.perf_counter() if t is None else t) - self._t0
+        self._f.write(RECORD.pack(kind, t, x, y, flags))
+        self.records += 1
+
+    def frame(self, count, t=None):
+        self._write(FRAME, t, count & 0x7FFF)
+
+    def hand(self, pos, pinching, t=None):
+        if pos is None:
+            self._write(HAND, t)
+        else:
+            self._write(HAND, t, pos[0], pos[1], HAND_PRESENT | (HAND_PINCHING if pinching else 0))
+
+    def pointer(self, pos, is_click_start, is_click_release, is_holding, from_hand, t=None):
+        flags = ((PTR_START if is_click_start else 0) | (PTR_RELEASE if is_click_release else 0) |
+                 (PTR_HOLDING if is_holding else 0) | (PTR_HAND if from_hand else 0))
+        self._write(POINTER, t, pos[0], pos[1], flags)
+
+    def start(self, order, t=None):
+        self._write(START, t, len(order))
+        self._f.write(struct.pack(self._tile_code % len(order), *order))
+
+    def swap(self, in_place, swaps, t=None):
+        self._write(SWAP, t, in_place, swaps)
+
+    def compensate(self, total, t=None):
+        """Records the attempt's total stall credit so far (PuzzleSession.compensated), to the microsecond."""
+        ms, us = divmod(int(round(total * 1e6)), 1000)
+        self._write(COMPENSATE, t, ms, us)
+
+    def close(self, state='MENU'):
+        if self._f.closed:
+            return
+        self._write(END, None, flags=STATES.index(state))
+        self._f.close()
+
+
+def load_trace(path):
+    """Returns (header dict, list of (kind, t, x, y, flags, order-or-None))."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, cols, rows, board_w, board_h, time_limit = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path!r} is not a v{VERSION} input trace")
+    header = {'cols': cols, 'rows': rows, 'board': (board_w, board_h), 'time_limit': time_limit}
+    tile_code = 'H' if cols * rows <= 0xFFFF else 'I'
+    tile_size = struct.calcsize(tile_code)
+
+    records = []
+    offset = HEADER.size
+    while offset + RECORD.size <= len(data):
+        kind, t, x, y, flags = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        order = None
+        if kind == START:
+            order = array(tile_code, struct.unpack_from(f'<{x}{tile_code}', data, offset))
+            offset += x * tile_size
+        records.append((kind, t, x, y, flags, order))
+    return header, records
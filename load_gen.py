@@ -0,0 +1,145 @@
+"""
+Load generator for server.py.
+
+Each simulated user creates a session, starts it and solves the puzzle by
+dragging every misplaced tile home (pointer down/up pairs), then closes it.
+Reports sessions/s, messages/s and round-trip latency percentiles.
+
+    python server.py &
+    python load_gen.py --sessions 500 --connections 50
+    python load_gen.py --sessions 20000 --inproc     # engine only, no sockets
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from engine import SessionEngine, as_pair
+from grid import check_size
+from profiler import percentile
+
+
+def solve_moves(snapshot):
+    """Pointer events that put each tile back in place (selection-sort style swaps)."""
+    order = list(snapshot['order'])
+    cols = snapshot['grid'][0]
+    tw, th = snapshot['tile']
+    centre = lambda i: ((i % cols) * tw + tw // 2, (i // cols) * th + th // 2)
+    events = []
+    for target in range(len(order)):
+        if order[target] == target:
+            continue
+        src = order.index(target)
+        (sx, sy), (tx, ty) = centre(src), centre(target)
+        events.append({'op': 'pointer', 'x': sx, 'y': sy, 'event': 'down'})
+        events.append({'op': 'pointer', 'x': tx, 'y': ty, 'event': 'up'})
+        order[src], order[target] = order[target], order[src]
+    return events
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.latencies = []
+
+    async def call(self, msg):
+        t0 = time.perf_counter()
+        self.writer.write(json.dumps(msg).encode() + b'\n')
+        await self.writer.drain()
+        reply = json.loads(await self.reader.readline())
+        self.latencies.append(time.perf_counter() - t0)
+        return reply
+
+
+async def run_user(client, grid_size):
+    created = await client.call({'op': 'create', 'grid_size': grid_size})
+    sid = created['session']
+    started = await client.call({'op': 'start', 'session': sid})
+    state = started['state']
+    for event in solve_moves(started):
+        event['session'] = sid
+        state = (await client.call(event))['state']
+    await client.call({'op': 'close', 'session': sid})
+    return state == 'WON'
+
+
+async def run_connection(host, port, n_users, grid_size):
+    reader, writer = await asyncio.open_connection(host, port)
+    client = Client(reader, writer)
+    won = 0
+    for _ in range(n_users):
+        won += await run_user(client, grid_size)
+    writer.close()
+    return won, client.latencies
+
+
+async def run_network(args):
+    per_conn = [args.sessions // args.connections + (i < args.sessions % args.connections)
+                for i in range(args.connections)]
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(run_connection(args.host, args.port, n, args.grid_size)
+                                     for n in per_conn if n))
+    elapsed = time.perf_counter() - t0
+    won = sum(r[0] for r in results)
+    latencies = sorted(l for r in results for l in r[1])
+    return elapsed, won, latencies
+
+
+def run_inproc(args):
+    """Drives SessionEngine.handle() directly: the per-core ceiling without socket/JSON overhead."""
+    engine = SessionEngine(grid_size=args.grid_size, pool_size=args.sessions)
+    latencies = []
+    won = 0
+
+    def call(msg):
+        t0 = time.perf_counter()
+        reply = engine.handle(msg)
+        latencies.append(time.perf_counter() - t0)
+        return reply
+
+    t0 = time.perf_counter()
+    # Open every session first so they are all live concurrently
+    sids = [call({'op': 'create'})['session'] for _ in range(args.sessions)]
+    for sid in sids:
+        started = call({'op': 'start', 'session': sid})
+        state = started['state']
+        for event in solve_moves(started):
+            event['session'] = sid
+            state = call(event)['state']
+        won += state == 'WON'
+    peak = len(engine.sessions)
+    for sid in sids:
+        call({'op': 'close', 'session': sid})
+    elapsed = time.perf_counter() - t0
+    print(f"[inproc] peak concurrent sessions: {peak}")
+    return elapsed, won, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the headless CAPTCHA server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--grid-size', type=int, nargs='+', default=[4], help="N, or COLS ROWS")
+    parser.add_argument('--inproc', action='store_true', help="Benchmark the engine without the network layer")
+    args = parser.parse_args()
+    args.grid_size = args.grid_size[0] if len(args.grid_size) == 1 else args.grid_size[:2]
+    try:
+        check_size(*as_pair(args.grid_size))
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.inproc:
+        elapsed, won, latencies = run_inproc(args)
+    else:
+        elapsed, won, latencies = asyncio.run(run_network(args))
+
+    print(f"sessions: {args.sessions} ({won} verified) in {elapsed:.2f}s "
+          f"-> {args.sessions / elapsed:.0f} sessions/s, {len(latencies) / elapsed:.0f} msgs/s")
+    print("latency ms: p50={:.3f} p95={:.3f} p99={:.3f}".format(
+        *(percentile(latencies, p) * 1000 for p in (50, 95, 99))))
+
+
+if __name__ == "__main__":
+    main()
@@ -255,24 +255,43 @@
 #     game = LiveJigsawCaptcha()
 #     game.run()
 
-import cv2
 import pygame
-import numpy as np
 import sys
 import time
-import mediapipe as mp
-import math
+import argparse
+
+from pipeline import FramePipeline
+from hand_tracking import AdaptiveHandTracker, LazyHands
+from gestures import HIT_BUTTON, HitMap, PinchDetector, frame_to_screen
+from engine import PuzzleSession, as_pair
+from frame_path import FramePath, SurfaceSink
+from compositor import TileCompositor
+from text_cache import TextCache, DigitAtlas
+from profiler import StageProfiler
+from frame_source import open_source
+from input_trace import TraceRecorder
+from liveness import LivenessScorer
+from telemetry import SessionTelemetry, TelemetrySink
+from tile_stream import StreamServer, TileStreamer
+from tokens import ResultTokens, load_secret
+from governor import TIERS, QualityGovernor
+from shuffle import shuffle_pool
 
 # --- CONFIGURATION & COLORS ---
 VIDEO_SIZE = 600        # The puzzle area (Square)
 UI_WIDTH = 250          # The side panel width
 WINDOW_WIDTH = VIDEO_SIZE + UI_WIDTH
 WINDOW_HEIGHT = VIDEO_SIZE
-GRID_SIZE = 4           # 4x4 Grid
-TILE_SIZE = VIDEO_SIZE // GRID_SIZE
+GRID_SIZE = 4           # 4x4 Grid, or (cols, rows) for a non-square layout
 FPS = 60
 TIME_LIMIT = 60         # Seconds to solve
 
+# Hand Tracking
+HAND_TRACKING_MODE = 'adaptive'  # 'every_n', 'motion' or 'adaptive'
+HAND_INFER_SIZE = 256            # MediaPipe runs on a downscaled square frame
+HAND_INFER_EVERY = 3             # Inference stride while a hand is tracked
+HAND_WARMUP_TIMEOUT = 15         # Seconds before INITIATE is enabled mouse-only if the model isn't ready
+
 # Cyberpunk Palette
 COLOR_BG = (10, 15, 20)           # Deep Dark Blue/Black
 COLOR_ACCENT = (0, 240, 255)      # Cyan Neon
@@ -282,210 +301,382 @@ COLOR_TEXT = (220, 220, 220)      # Off White
 COLOR_GRID_LINES = (0, 0, 0)
 COLOR_HAND_CURSOR = (255, 0, 255) # Magenta for hand cursor
 
+# Screen Regions (for dirty-rect updates)
+VIDEO_RECT = pygame.Rect(0, 0, VIDEO_SIZE, VIDEO_SIZE)
+SIDEBAR_RECT = pygame.Rect(VIDEO_SIZE, 0, UI_WIDTH, WINDOW_HEIGHT)
+TIMER_RECT = pygame.Rect(VIDEO_SIZE + 2, 195, UI_WIDTH - 2, 80)   # Countdown digits + bar
+HUD_RECT = pygame.Rect(VIDEO_SIZE + 2, 315, UI_WIDTH - 2, 170)    # Frame-time overlay (F3)
+
+# Profiling HUD
+HUD_STAGES = ('capture', 'prepare', 'hands', 'surface', 'input', 'tiles', 'sidebar', 'overlays', 'display', 'frame')
+HUD_INTERVAL = 0.25     # Seconds between HUD refreshes
+
 class LiveJigsawCaptcha:
-    def __init__(self):
+    def __init__(self, source='camera:0', hud=False, profile_out=None, record=None, hands=None, telemetry=None,
+                 station=None, stream_port=None, stream_host='127.0.0.1', stream_codec='jpeg', quality='auto'):
+        self.started_at = time.perf_counter()
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("IDENTITY VERIFICATION // LIVE CAPTCHA + GESTURES")
         self.clock = pygame.time.Clock()
+        self.startup = {'window': time.perf_counter() - self.started_at}  # Cold-start milestones (s)
         
         # Fonts
         self.font_header = pygame.font.SysFont("Consolas", 28, bold=True)
         self.font_body = pygame.font.SysFont("Consolas", 18)
         self.font_big = pygame.font.SysFont("Consolas", 50, bold=True)
-
-        # Camera Setup
-        self.cap = cv2.VideoCapture(0)
+        self.font_hud = pygame.font.SysFont("Consolas", 12)
+
+        # Rendered text is cached; the countdown is composed from pre-rendered digits
+        self.text = TextCache()
+        self.timer_digits = DigitAtlas(self.font_big, (COLOR_ACCENT, COLOR_FAIL))
+
+        # Camera Setup (or a video file / image folder / synthetic frames, see frame_source.py)
+        self.cap = open_source(source, loop=True, realtime=True, target=VIDEO_SIZE)
+        self.frame_path = FramePath(VIDEO_SIZE)    # Preallocated resize/convert buffers
+        self.video_sink = SurfaceSink(VIDEO_SIZE)  # Persistent video Surface, updated in place
+        # Scrambled board in one remap straight into the video Surface (grid lines baked in)
+        self.compositor = TileCompositor(VIDEO_SIZE, GRID_SIZE)
         
         # --- MEDIAPIPE HAND SETUP ---
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
+        # Loaded + warmed up in the background so the MENU shows at once (mouse-only meanwhile).
+        # `hands` may instead be a hand_service client, so several stations share a few models.
+        self.hand_kwargs = dict(max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.7)
+        self.hands = hands or LazyHands(warmup_size=HAND_INFER_SIZE, **self.hand_kwargs)
+        # Own models by model_complexity (MediaPipe's default is 1), so quality tiers can switch them
+        self.hand_models = {} if hands else {1: self.hands}
+        self.hand_status = self.check_hand_status()
+        # Skips/downscales inference and predicts landmarks 8 & 4 in between
+        self.tracker = AdaptiveHandTracker(
+            self.hands,
+            infer_size=HAND_INFER_SIZE,
+            mode=HAND_TRACKING_MODE,
+            every_n=HAND_INFER_EVERY
         )
         
-        # Game States: 'MENU', 'PLAYING', 'WON', 'LOST'
-        self.state = 'MENU'
-        
-        # Logic Variables
-        self.correct_order = list(range(GRID_SIZE * GRID_SIZE))
-        self.current_order = self.correct_order.copy()
-        
-        self.selected_tile = None
-        self.dragging = False
-        self.mouse_offset = (0, 0)
+        # Game State + Logic Variables ('MENU', 'PLAYING', 'WON', 'LOST'), shared with the headless server
+        cols, rows = as_pair(GRID_SIZE)
+        shuffle_pool(cols * rows)  # Pre-generated boards for the configured grid
+        self.session = PuzzleSession(grid_size=GRID_SIZE, board_size=VIDEO_SIZE, time_limit=TIME_LIMIT)
+        # Optional binary log of frames, hand results and pointer input (replay with replay.py)
+        self.recorder = TraceRecorder(record, self.session) if record else None
+        # Photo / replayed-video heuristics, scored over each attempt and attached to the WON result
+        self.liveness = LivenessScorer(GRID_SIZE)
+        # Pointer/hand kinematics per attempt, written in batches off the game loop
+        self.telemetry_sink = TelemetrySink(telemetry) if telemetry else None
+        self.telemetry = None          # SessionTelemetry of the attempt in progress
+        # Signed result token on WON for the backend, if $CAPTCHA_TOKEN_SECRET is set
+        secret = load_secret()
+        self.tokens = ResultTokens(secret) if secret else None
+        # When run under stations.py: publishes previews, outcomes and health to the supervisor
+        self.station = station
+        # Remote viewers get encoded tiles + permutation deltas instead of whole frames
+        self.stream = StreamServer(stream_host, stream_port).start() if stream_port else None
+        self.streamer = TileStreamer(VIDEO_SIZE, GRID_SIZE, self.stream, codec=stream_codec).start() if self.stream else None
+        self.unscrambled = list(range(self.session.grid.size))  # What the MENU preview shows
         
         # Hand Interaction State
         self.hand_cursor_pos = None  # (x, y)
         self.is_pinching = False
         self.was_pinching = False    # To detect state changes
-        
-        self.start_time = 0
-        self.elapsed_time = 0
+        self.pinch = PinchDetector()  # Runs on the hand worker thread
 
         # UI Rectangles
         self.btn_rect = pygame.Rect(VIDEO_SIZE + 25, WINDOW_HEIGHT - 100, 200, 50)
-
-    def shuffle_grid(self):
-        import random
-        random.shuffle(self.current_order)
+        # What's under every window pixel (tile index / button), so hit-tests are one lookup
+        self.hitmap = HitMap.for_session(self.session, WINDOW_WIDTH, WINDOW_HEIGHT, buttons=[self.btn_rect])
+
+        # Dark overlay for the MENU preview (built once, not per frame)
+        self.menu_overlay = pygame.Surface((VIDEO_SIZE, VIDEO_SIZE))
+        self.menu_overlay.set_alpha(100); self.menu_overlay.fill((0,0,0))
+
+        # Retained sidebar: static layer rendered once, full panel re-rendered only on change
+        self.sidebar_bg = self.build_sidebar_background()
+        self.sidebar_cache = pygame.Surface(SIDEBAR_RECT.size)  # Last drawn panel, to erase overlays
+        self.sidebar_key = None        # What the cached panel shows; None forces a redraw
+        self.overlay_rects = []        # Overlays drawn over the sidebar last frame
+
+        # Per-stage frame timers; a .json dump path also records a Chrome trace
+        self.profile_out = profile_out
+        self.profiler = StageProfiler(trace=bool(profile_out) and profile_out.lower().endswith('.json'))
+
+        # Steps quality down under load (and back up), and credits stalls back to the countdown
+        names = [t['name'].lower() for t in TIERS]
+        self.governor = QualityGovernor(tier=0 if quality == 'auto' else names.index(quality),
+                                        auto=quality == 'auto', profiler=self.profiler)
+        self.fps = FPS
+        if self.governor.index: self.apply_tier(self.governor.tier)
+        self.show_hud = hud
+        self.hud_drawn_at = 0
 
     def get_live_frame_and_hands(self):
-        """Captures frame, processes hands, returns Pygame surface + hand pos."""
+        """Captures frame, processes hands, returns the display-layout RGB frame + hand pos."""
         ret, frame = self.cap.read()
         if not ret: return None, None, False
 
-        # 1. Flip and Resize Standard
-        frame = cv2.flip(frame, 1)
-        frame = cv2.resize(frame, (VIDEO_SIZE, VIDEO_SIZE))
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # 2. Process Hands (MediaPipe works on the RGB image)
-        results = self.hands.process(frame_rgb)
-        
-        hand_pos = None # Default to None if no hand found
-        pinching = False
+        frame_rgb = self.prepare_frame(frame)
+        hand_pos, pinching = self.detect_hands(frame_rgb)
+        return frame_rgb, hand_pos, pinching
 
-        if results.multi_hand_landmarks:
-            lm = results.multi_hand_landmarks[0]
-            h, w, c = frame.shape
-            
-            # Get Raw Coordinates (0.0 - 1.0) -> Pixels
-            ix, iy = int(lm.landmark[8].x * w), int(lm.landmark[8].y * h)
-            tx, ty = int(lm.landmark[4].x * w), int(lm.landmark[4].y * h)
-            
-            # Pinch Detection
-            distance = math.hypot(ix - tx, iy - ty)
-            if distance < 40:
-                pinching = True
-            
-            # COORDINATE MAPPING FOR PYGAME
-            # We are about to rotate the image 90 degrees CCW for Pygame.
-            # We must map the hand coordinates to match that rotation.
-            # Formula: New_X = Old_Y, New_Y = Width - Old_X
-            mapped_x = iy
-            mapped_y = VIDEO_SIZE - ix
-            
-            hand_pos = (mapped_x, mapped_y)
+    def prepare_frame(self, frame):
+        """Capture stage: resize and convert a raw camera frame to RGB in preallocated buffers."""
+        # The old mirror + rot90 pair is a plain transpose, which SurfaceSink's row-major
+        # buffer already gives us (see frame_path.py), so no flip/rotate is done here.
+        return self.frame_path.prepare(frame)
 
-        # 3. Rotate Image for Pygame Display
-        # np.rot90 rotates 90 deg counter-clockwise
-        frame_rotated = np.rot90(frame_rgb)
-        
-        return frame_rotated, hand_pos, pinching
+    def detect_hands(self, frame_rgb):
+        """Inference stage: runs MediaPipe on an RGB frame, returns (hand_pos, pinching)."""
+        points = self.tracker.update(frame_rgb)
+        if not points:
+            self.pinch.lost()  # Short dropouts keep the pinch (and the dragged tile)
+            return None, False
 
-    def draw_sidebar(self):
-        """Draws the UI panel on the right."""
-        pygame.draw.rect(self.screen, COLOR_BG, (VIDEO_SIZE, 0, UI_WIDTH, WINDOW_HEIGHT))
-        pygame.draw.line(self.screen, COLOR_ACCENT, (VIDEO_SIZE, 0), (VIDEO_SIZE, WINDOW_HEIGHT), 2)
+        # Index tip, thumb tip, wrist, middle knuckle; already in frame pixels
+        index_tip, thumb_tip, wrist, middle_mcp = points
+
+        # Pinch Detection (hysteresis + debounce, scaled by hand size)
+        pinching = self.pinch.update(index_tip, thumb_tip, wrist, middle_mcp)
+
+        # COORDINATE MAPPING FOR PYGAME
+        return frame_to_screen(index_tip), pinching
+
+    def build_sidebar_background(self):
+        """Renders the parts of the sidebar that never change."""
+        bg = pygame.Surface(SIDEBAR_RECT.size)
+        bg.fill(COLOR_BG)
+        pygame.draw.line(bg, COLOR_ACCENT, (0, 0), (0, WINDOW_HEIGHT), 2)
 
         # Header
-        title = self.font_header.render("SECURITY", True, COLOR_ACCENT)
-        subtitle = self.font_header.render("PROTOCOL", True, COLOR_ACCENT)
-        self.screen.blit(title, (VIDEO_SIZE + 20, 30))
-        self.screen.blit(subtitle, (VIDEO_SIZE + 20, 60))
+        bg.blit(self.font_header.render("SECURITY", True, COLOR_ACCENT), (20, 30))
+        bg.blit(self.font_header.render("PROTOCOL", True, COLOR_ACCENT), (20, 60))
+
+        # Status Label
+        bg.blit(self.font_body.render("STATUS:", True, COLOR_TEXT), (20, 120))
 
-        # Status
-        status_text = "STATUS:"
-        if self.state == 'MENU': status_val = "WAITING"
-        elif self.state == 'PLAYING': status_val = "SCANNING..."
-        elif self.state == 'WON': status_val = "VERIFIED"
-        else: status_val = "DENIED"
-        
-        color = COLOR_SUCCESS if self.state == 'WON' else (COLOR_FAIL if self.state == 'LOST' else COLOR_TEXT)
-        self.screen.blit(self.font_body.render(status_text, True, COLOR_TEXT), (VIDEO_SIZE + 20, 120))
-        self.screen.blit(self.font_body.render(status_val, True, color), (VIDEO_SIZE + 20, 145))
-        
         # Control Mode Indicator
-        mode_txt = "INPUT: MOUSE + HAND"
-        self.screen.blit(self.font_body.render(mode_txt, True, (150, 150, 150)), (VIDEO_SIZE + 20, 175))
-
-        # Timer
-        if self.state == 'PLAYING':
-            remaining = max(0, TIME_LIMIT - int(self.elapsed_time))
-            timer_color = COLOR_FAIL if remaining < 10 else COLOR_ACCENT
-            time_surf = self.font_big.render(f"00:{remaining:02}", True, timer_color)
-            self.screen.blit(time_surf, (VIDEO_SIZE + 20, 200))
-            
-            bar_width = 200
-            fill_width = int((remaining / TIME_LIMIT) * bar_width)
-            pygame.draw.rect(self.screen, (50,50,50), (VIDEO_SIZE + 25, 260, bar_width, 10))
-            pygame.draw.rect(self.screen, timer_color, (VIDEO_SIZE + 25, 260, fill_width, 10))
-            
-            if remaining == 0: self.state = 'LOST'
+        if self.hand_status == 'READY': mode_txt = "INPUT: MOUSE + HAND"
+        elif self.hand_status == 'LOADING': mode_txt = "INPUT: MOUSE | HAND..."
+        else: mode_txt = "INPUT: MOUSE ONLY"
+        bg.blit(self.font_body.render(mode_txt, True, (150, 150, 150)), (20, 175))
+        return bg
 
-        # Button
+    def draw_sidebar(self):
+        """Redraws whatever changed in the UI panel on the right. Returns the screen rects to update."""
         mx, my = pygame.mouse.get_pos()
         # Overwrite mouse pos if hand is active and hovering button
         if self.hand_cursor_pos:
             mx, my = self.hand_cursor_pos
-            
-        hover = self.btn_rect.collidepoint((mx, my))
+        hover = self.hitmap.at(mx, my) == HIT_BUTTON
+
+        remaining = self.session.remaining() if self.session.state == 'PLAYING' else None
+        key = (self.session.state, hover, self.session.grid.in_place, remaining)
+        if key == self.sidebar_key:
+            return []
+        # Once a second only the countdown changes: repaint just that region
+        timer_only = self.sidebar_key is not None and key[:3] == self.sidebar_key[:3]
+        self.sidebar_key = key
+
+        if timer_only:
+            self.draw_timer(remaining)
+            return [self.cache_sidebar(TIMER_RECT)]
+
+        self.screen.blit(self.sidebar_bg, SIDEBAR_RECT)
+
+        # Status
+        if self.session.state == 'MENU': status_val = "WAITING"
+        elif self.session.state == 'PLAYING': status_val = "SCANNING..."
+        elif self.session.state == 'WON': status_val = "VERIFIED"
+        else: status_val = "DENIED"
+        
+        color = COLOR_SUCCESS if self.session.state == 'WON' else (COLOR_FAIL if self.session.state == 'LOST' else COLOR_TEXT)
+        self.screen.blit(self.text.render(self.font_body, status_val, color), (VIDEO_SIZE + 20, 145))
+
+        # Timer + Progress
+        if self.session.state == 'PLAYING':
+            self.draw_timer(remaining)
+            progress = f"IN PLACE: {self.session.grid.in_place}/{self.session.grid.size}"
+            self.screen.blit(self.text.render(self.font_body, progress, COLOR_TEXT), (VIDEO_SIZE + 20, 285))
+
+        # Button
         btn_color = COLOR_ACCENT if hover else (50, 50, 50)
-        btn_text = "RESET SYSTEM" if self.state in ['WON', 'LOST'] else "INITIATE"
+        btn_text = "RESET SYSTEM" if self.session.state in ['WON', 'LOST'] else "INITIATE"
+        if self.hand_status == 'LOADING':
+            btn_color, hover, btn_text = (50, 50, 50), False, "LOADING..."  # Disabled until warm-up ends
         
-        if self.state != 'PLAYING':
+        if self.session.state != 'PLAYING':
             pygame.draw.rect(self.screen, btn_color, self.btn_rect)
             pygame.draw.rect(self.screen, COLOR_ACCENT, self.btn_rect, 2)
-            lbl = self.font_body.render(btn_text, True, (0,0,0) if hover else COLOR_TEXT)
+            lbl = self.text.render(self.font_body, btn_text, (0,0,0) if hover else COLOR_TEXT)
             lbl_x = self.btn_rect.x + (self.btn_rect.width - lbl.get_width()) // 2
             lbl_y = self.btn_rect.y + (self.btn_rect.height - lbl.get_height()) // 2
             self.screen.blit(lbl, (lbl_x, lbl_y))
 
-    def handle_input_logic(self, input_pos, is_click_start, is_click_release, is_holding):
-        """Unified logic for both Mouse and Hand inputs."""
+        if self.show_hud:
+            self.draw_hud()
+        return [self.cache_sidebar(SIDEBAR_RECT)]
+
+    def draw_hud(self):
+        """Frame-time overlay: rolling p50/p95/p99 per stage. Returns the rect drawn."""
+        self.screen.blit(self.sidebar_bg, HUD_RECT, HUD_RECT.move(-VIDEO_SIZE, 0))
+        x, y = HUD_RECT.x + 18, HUD_RECT.y
+        header = f"{'STAGE':<9}{'p50':>6}{'p95':>6}{'p99':>6}  ms"
+        self.screen.blit(self.text.render(self.font_hud, header, COLOR_ACCENT), (x, y))
+        for name in HUD_STAGES:
+            y += 14
+            p50, p95, p99 = self.profiler.stats(name)
+            line = f"{name:<9}{p50:6.1f}{p95:6.1f}{p99:6.1f}"
+            color = COLOR_FAIL if p95 > 1000 / self.fps else (150, 150, 150)
+            self.screen.blit(self.font_hud.render(line, True, color), (x, y))
+        footer = f"FPS {self.clock.get_fps():4.1f} OVR {self.profiler.overruns} Q {self.governor.tier['name']}"
+        self.screen.blit(self.font_hud.render(footer, True, COLOR_TEXT), (x, y + 16))
+        self.hud_drawn_at = time.time()
+        return HUD_RECT
+
+    def draw_timer(self, remaining):
+        """Repaints the whole TIMER_RECT (background, digits, bar); nothing is drawn outside it."""
+        timer_color = COLOR_FAIL if remaining < 10 else COLOR_ACCENT
+        self.screen.blit(self.sidebar_bg, TIMER_RECT, TIMER_RECT.move(-VIDEO_SIZE, 0))
+        self.screen.set_clip(TIMER_RECT)  # A tall fallback font must not leave pixels outside the dirty rect
+        self.timer_digits.draw(self.screen, f"00:{remaining:02}", timer_color, (VIDEO_SIZE + 20, 200))
+        
+        bar_width = 200
+        fill_width = int((remaining / TIME_LIMIT) * bar_width)
+        pygame.draw.rect(self.screen, (50,50,50), (VIDEO_SIZE + 25, 260, bar_width, 10))
+        pygame.draw.rect(self.screen, timer_color, (VIDEO_SIZE + 25, 260, fill_width, 10))
+        self.screen.set_clip(None)
+
+    def cache_sidebar(self, rect):
+        """Copies a freshly drawn sidebar region into the cache used to erase overlays."""
+        self.sidebar_cache.blit(self.screen, rect.move(-VIDEO_SIZE, 0), rect)
+        return rect
+
+    def handle_input_logic(self, input_pos, is_click_start, is_click_release, is_holding, from_hand=False):
+        """Unified logic for both Mouse and Hand inputs. Returns True if tiles were swapped."""
         mx, my = input_pos
+        target = self.hitmap.at(mx, my)
         
         # Button Logic
         if is_click_start:
-            if self.state != 'PLAYING' and self.btn_rect.collidepoint((mx, my)):
-                self.state = 'PLAYING'
-                self.shuffle_grid()
-                self.start_time = time.time()
-                return
-
-        # Game Logic
-        if self.state == 'PLAYING' and mx < VIDEO_SIZE:
-            col = mx // TILE_SIZE
-            row = my // TILE_SIZE
-            index = row * GRID_SIZE + col
-            
-            # Start Drag
-            if is_click_start:
-                if 0 <= index < 16:
-                    self.dragging = True
-                    self.selected_tile = index
-                    self.mouse_offset = (mx - col * TILE_SIZE, my - row * TILE_SIZE)
-
-            # Drop / Swap
-            elif is_click_release and self.dragging:
-                # Target
-                t_col = mx // TILE_SIZE
-                t_row = my // TILE_SIZE
-                t_index = t_row * GRID_SIZE + t_col
-                
-                # Perform Swap
-                if 0 <= t_index < 16 and self.selected_tile is not None:
-                    self.current_order[self.selected_tile], self.current_order[t_index] = \
-                    self.current_order[t_index], self.current_order[self.selected_tile]
-                    
-                    if self.current_order == self.correct_order:
-                        self.state = 'WON'
-                
-                self.dragging = False
-                self.selected_tile = None
+            if self.session.state != 'PLAYING' and self.hand_status != 'LOADING' and target == HIT_BUTTON:
+                self.session.start()
+                self.liveness.reset()
+                if self.telemetry_sink: self.telemetry = SessionTelemetry(self.session.session_id, self.session.attempts)
+                if self.recorder: self.recorder.start(self.session.current_order)
+                return False
+
+        if self.recorder: self.recorder.pointer(input_pos, is_click_start, is_click_release, is_holding, from_hand)
+        # Game Logic (drag / drop / swap / win check)
+        picked = self.session.selected_tile
+        index = target if target < self.session.grid.size else None
+        swapped = self.session.handle_pointer((mx, my), is_click_start, is_click_release, index)
+        if self.telemetry:
+            now = time.perf_counter()
+            if is_click_start and self.session.dragging: self.telemetry.drag_start(now)
+            elif is_click_release and picked is not None: self.telemetry.drop(now)
+            if swapped: self.telemetry.swap(now, picked, index)
+        return swapped
+
+    def check_hand_status(self):
+        """'READY', 'LOADING', or 'MOUSE ONLY' if the model failed or is taking too long."""
+        ready = getattr(self.hands, 'ready', None)
+        if ready is None or ready.is_set():
+            return 'READY'
+        if getattr(self.hands, 'error', None) or time.perf_counter() - self.started_at > HAND_WARMUP_TIMEOUT:
+            return 'MOUSE ONLY'
+        return 'LOADING'
+
+    def update_hand_status(self):
+        status = self.check_hand_status()
+        if status == self.hand_status:
+            return
+        self.hand_status = status
+        self.sidebar_bg = self.build_sidebar_background()  # Input-mode line lives in the static layer
+        self.sidebar_key = None
+        if status == 'READY':
+            self.startup['hands_ready'] = time.perf_counter() - self.started_at
+            self.startup.update(getattr(self.hands, 'timings', {}))
+            print("[startup]", self.startup_report())
+        elif getattr(self.hands, 'error', None):
+            print("[startup] hand tracking unavailable, mouse only:", self.hands.error)
+
+    def apply_tier(self, tier):
+        """Applies a governor quality tier: frame-rate target, inference size/stride, hand model."""
+        self.fps = tier['fps']
+        self.tracker.set_quality(tier['infer_size'], tier['every_n'])
+        complexity = tier['model_complexity']
+        if self.hand_models and complexity not in self.hand_models:
+            # Built in the background; the tracker keeps the current model until it's ready
+            self.hand_models[complexity] = LazyHands(warmup_size=tier['infer_size'], model_complexity=complexity,
+                                                     **self.hand_kwargs)
+        print("[quality]", tier['name'], tier)
+
+    def update_hand_model(self):
+        """Switches the tracker to the model the current tier wants once it has loaded."""
+        model = self.hand_models.get(self.governor.tier['model_complexity']) if self.hand_models else None
+        if model is not None and model is not self.tracker.hands and model.ready.is_set():
+            self.tracker.hands = model
+
+    def credit_stall(self, lost):
+        """Gives stall time back to the countdown, and records it so replays keep the same countdown."""
+        if self.session.compensate(lost) and self.recorder:
+            self.recorder.compensate(self.session.compensated)
+
+    def startup_report(self):
+        return " ".join(f"{k}={v:.2f}s" for k, v in self.startup.items())
+
+    def finish_telemetry(self, state):
+        """Queues the current attempt's telemetry for the background writer."""
+        if self.telemetry:
+            self.telemetry_sink.submit(self.telemetry.record(state))
+            self.telemetry = None
 
     def run(self):
+        # Camera + MediaPipe run on worker threads; this loop only picks up their latest output
+        prof = self.profiler
+        pipeline = FramePipeline(self.cap, self.prepare_frame, self.detect_hands, profiler=prof).start()
+
+        hands_seen_at = None
+        inference_seen = 0
+        scored_frame = None
+        streamed_frame = None
         running = True
         while running:
-            # 1. Capture Data
-            frame_rgb, hand_pos, is_pinching = self.get_live_frame_and_hands()
-            if frame_rgb is None: break
+            # 1. Capture Data (non-blocking)
+            if pipeline.finished: break
+            frame_start = prof.start()
+            self.update_hand_status()
+            self.update_hand_model()
+            frame_rgb = pipeline.latest_frame()
+            if frame_rgb is None:
+                # Camera still warming up: keep the window responsive
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT: running = False
+                    elif event.type == pygame.VIDEOEXPOSE: self.sidebar_key = None
+                self.credit_stall(self.governor.track(frame_start, False))
+                self.clock.tick(self.fps)
+                continue
+            # Time lost to a frozen loop or a stalled camera doesn't count against the player
+            self.credit_stall(self.governor.track(frame_start, frame_rgb is not scored_frame))
+            hand_pos, is_pinching = pipeline.latest_hands()
+            if pipeline.hands_captured_at != hands_seen_at:
+                hands_seen_at = pipeline.hands_captured_at
+                if self.recorder: self.recorder.hand(hand_pos, is_pinching, hands_seen_at)
+            # Jitter entropy needs the raw landmark of a real inference: smoothing and
+            # skipped-frame prediction remove exactly the micro-motion it measures
+            inference, raw_tip = self.tracker.last_inference
+            if inference != inference_seen:
+                inference_seen = inference
+                self.liveness.add_landmark(frame_to_screen(raw_tip) if raw_tip else None)
             
-            full_surf = pygame.surfarray.make_surface(frame_rgb)
+            if frame_rgb is not scored_frame:
+                t = prof.start()
+                scored_frame = frame_rgb
+                self.liveness.add_frame(frame_rgb)
+                prof.stop('liveness', t)
             self.hand_cursor_pos = hand_pos # Update global state
 
+            t = prof.start()
+
             # 2. Prepare Input Flags
             # Mouse Flags
             m_click_start = False
@@ -494,6 +685,10 @@ class LiveJigsawCaptcha:
                 if event.type == pygame.QUIT: running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN: m_click_start = True
                 elif event.type == pygame.MOUSEBUTTONUP: m_click_release = True
+                elif event.type == pygame.VIDEOEXPOSE: self.sidebar_key = None # Window damaged: repaint all
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.show_hud = not self.show_hud
+                    self.sidebar_key = None
             
             # Hand Flags
             h_click_start = False
@@ -507,76 +702,173 @@ class LiveJigsawCaptcha:
             mx, my = pygame.mouse.get_pos()
             
             # Priority: Mouse Click -> Hand -> Mouse Move
+            swapped = False
             if m_click_start or m_click_release or (pygame.mouse.get_pressed()[0]):
-                self.handle_input_logic((mx, my), m_click_start, m_click_release, True)
-                current_cursor = (mx, my)
+                swapped = self.handle_input_logic((mx, my), m_click_start, m_click_release, True)
+                current_cursor, from_hand, pressed = (mx, my), False, True
             elif hand_pos:
-                self.handle_input_logic(hand_pos, h_click_start, h_click_release, is_pinching)
-                current_cursor = hand_pos
+                swapped = self.handle_input_logic(hand_pos, h_click_start, h_click_release, is_pinching, from_hand=True)
+                current_cursor, from_hand, pressed = hand_pos, True, is_pinching
             else:
-                current_cursor = (mx, my)
+                current_cursor, from_hand, pressed = (mx, my), False, False
+            if self.telemetry and self.session.state == 'PLAYING':
+                now = time.perf_counter()
+                self.telemetry.pointer(now, current_cursor[0], current_cursor[1], from_hand, pressed)
+                if m_click_start or h_click_start: self.telemetry.press(now, True)
+                if m_click_release or h_click_release: self.telemetry.press(now, False)
+            if swapped and self.session.state == 'WON':
+                self.session.liveness = self.liveness.result()
+                print("[liveness]", self.session.liveness)
+                if self.tokens:
+                    self.session.token = self.tokens.issue(self.session)
+                    # Claims only: the token itself is a single-use bearer credential, keep it out of logs
+                    print("[token]", self.tokens.verify(self.session.token, consume=False))
 
             # 4. Update Time
-            if self.state == 'PLAYING':
-                self.elapsed_time = time.time() - self.start_time
-
-            # 5. Drawing
-            self.screen.fill((0,0,0))
+            self.session.tick()
+            if self.session.state in ('WON', 'LOST'): self.finish_telemetry(self.session.state)
+            if self.recorder: self.recorder.frame(pipeline.frames_captured)
+            prof.stop('input', t)
+
+            # Hand the newest frame (or just a swap) to the stream encoder thread
+            if self.streamer and (frame_rgb is not streamed_frame or swapped):
+                fresh = frame_rgb if frame_rgb is not streamed_frame else None
+                streamed_frame = frame_rgb
+                self.streamer.submit(fresh, self.unscrambled if self.session.state == 'MENU' else self.session.current_order)
+
+            # 5. Drawing (retained mode: only changed regions are pushed to the display)
+            # The video area is live, so it's redrawn every frame and fully covers itself.
+            dirty = [VIDEO_RECT]
             
             # Draw Game Grid
-            if self.state == 'MENU':
+            t = prof.start()
+            if self.session.state == 'MENU':
+                full_surf = self.video_sink.update(frame_rgb)
+                prof.stop('surface', t)
                 self.screen.blit(full_surf, (0,0))
-                s = pygame.Surface((VIDEO_SIZE, VIDEO_SIZE))
-                s.set_alpha(100); s.fill((0,0,0))
-                self.screen.blit(s, (0,0))
+                self.screen.blit(self.menu_overlay, (0,0))
             else:
-                for i in range(16):
-                    if self.dragging and i == self.selected_tile: continue
-                    dx, dy = (i % GRID_SIZE) * TILE_SIZE, (i // GRID_SIZE) * TILE_SIZE
-                    val = self.current_order[i]
-                    sx, sy = (val % GRID_SIZE) * TILE_SIZE, (val // GRID_SIZE) * TILE_SIZE
-                    self.screen.blit(full_surf, (dx, dy), (sx, sy, TILE_SIZE, TILE_SIZE))
-                    pygame.draw.rect(self.screen, COLOR_GRID_LINES, (dx, dy, TILE_SIZE, TILE_SIZE), 1)
-
-            # Draw Dragged Piece
-            if self.dragging and self.selected_tile is not None:
+                # The whole scrambled board (tiles, grid lines, margins) in one vectorized pass
+                self.compositor.compose(frame_rgb, self.session.grid, out=self.video_sink.buffer)
+                full_surf = self.video_sink.surface
+                prof.stop('surface', t)
+                self.screen.blit(full_surf, (0,0))
+                if self.session.dragging and self.session.selected_tile is not None:
+                    self.screen.fill((0,0,0), self.session.tile_rect(self.session.selected_tile)) # Empty slot
+
+            # Draw Dragged Piece (the sidebar is drawn on top of it, so keep it in the video area)
+            if self.session.dragging and self.session.selected_tile is not None:
                 # Use current cursor position (Mouse or Hand)
                 cx, cy = current_cursor
-                val = self.current_order[self.selected_tile]
-                sx, sy = (val % GRID_SIZE) * TILE_SIZE, (val // GRID_SIZE) * TILE_SIZE
-                self.screen.blit(full_surf, (cx - self.mouse_offset[0], cy - self.mouse_offset[1]), (sx, sy, TILE_SIZE, TILE_SIZE))
-                pygame.draw.rect(self.screen, COLOR_ACCENT, (cx - self.mouse_offset[0], cy - self.mouse_offset[1], TILE_SIZE, TILE_SIZE), 3)
-
-            # Draw Sidebar
-            self.draw_sidebar()
+                tile_w, tile_h = self.session.tile_w, self.session.tile_h
+                self.screen.set_clip(VIDEO_RECT)
+                # The composed board already shows the dragged tile at its grid slot
+                self.screen.blit(full_surf, (cx - self.session.mouse_offset[0], cy - self.session.mouse_offset[1]), self.session.tile_rect(self.session.selected_tile))
+                pygame.draw.rect(self.screen, COLOR_ACCENT, (cx - self.session.mouse_offset[0], cy - self.session.mouse_offset[1], tile_w, tile_h), 3)
+                self.screen.set_clip(None)
+            prof.stop('tiles', t)
+
+            # Draw Sidebar (only what changed), then erase last frame's overlays from it
+            t = prof.start()
+            dirty.extend(self.draw_sidebar())
+            if self.show_hud and time.time() - self.hud_drawn_at > HUD_INTERVAL:
+                dirty.append(self.cache_sidebar(self.draw_hud()))
+            for r in self.overlay_rects:
+                self.screen.blit(self.sidebar_cache, r, r.move(-VIDEO_SIZE, 0))
+                dirty.append(r)
+            self.overlay_rects = []
+            prof.stop('sidebar', t)
 
             # --- HAND CURSOR VISUALS ---
+            t = prof.start()
             if hand_pos:
                 hx, hy = hand_pos
                 # Draw a target reticle on the hand
                 color = COLOR_SUCCESS if is_pinching else COLOR_HAND_CURSOR
-                pygame.draw.circle(self.screen, color, (hx, hy), 10, 2)
+                cursor_rect = pygame.draw.circle(self.screen, color, (hx, hy), 10, 2)
                 pygame.draw.circle(self.screen, color, (hx, hy), 4)
                 if is_pinching:
-                    pygame.draw.circle(self.screen, color, (hx, hy), 20, 1)
+                    cursor_rect = pygame.draw.circle(self.screen, color, (hx, hy), 20, 1)
+                dirty.append(cursor_rect)
+                if cursor_rect.colliderect(SIDEBAR_RECT):
+                    self.overlay_rects.append(cursor_rect.clip(SIDEBAR_RECT))
 
             # Win/Loss Overlays
-            if self.state == 'WON':
+            if self.session.state == 'WON':
                 pygame.draw.rect(self.screen, COLOR_SUCCESS, (0, 0, VIDEO_SIZE, VIDEO_SIZE), 5)
-                msg = self.font_big.render("ACCESS GRANTED", True, COLOR_SUCCESS)
+                msg = self.text.render(self.font_big, "ACCESS GRANTED", COLOR_SUCCESS)
                 self.screen.blit(msg, (VIDEO_SIZE//2 - msg.get_width()//2, VIDEO_SIZE//2))
-            elif self.state == 'LOST':
+                if self.session.liveness:
+                    live = self.session.liveness
+                    sub = self.text.render(self.font_body, f"LIVENESS {live['score']:.2f}", COLOR_SUCCESS if live['live'] else COLOR_FAIL)
+                    self.screen.blit(sub, (VIDEO_SIZE//2 - sub.get_width()//2, VIDEO_SIZE//2 + 60))
+            elif self.session.state == 'LOST':
                 pygame.draw.rect(self.screen, COLOR_FAIL, (0, 0, VIDEO_SIZE, VIDEO_SIZE), 5)
-                msg = self.font_big.render("ACCESS DENIED", True, COLOR_FAIL)
+                msg = self.text.render(self.font_big, "ACCESS DENIED", COLOR_FAIL)
                 self.screen.blit(msg, (VIDEO_SIZE//2 - msg.get_width()//2, VIDEO_SIZE//2))
-
-            pygame.display.flip()
-            self.clock.tick(FPS)
-
+            prof.stop('overlays', t)
+
+            t = prof.start()
+            pygame.display.update(dirty)
+            prof.stop('display', t)
+            if 'first_frame' not in self.startup:
+                self.startup['first_frame'] = time.perf_counter() - self.started_at
+            if swapped and self.recorder: self.recorder.swap(self.session.grid.in_place, self.session.swaps)
+            if self.station: self.station.tick(self, pipeline, frame_rgb)
+
+            # Work done this frame, excluding the frame-cap sleep
+            work = prof.stop('frame', frame_start)
+            if work > 1 / self.fps: prof.overruns += 1
+            tier = self.governor.update(time.perf_counter(), work, self.clock.get_fps())
+            if tier: self.apply_tier(tier)
+            t = prof.start()
+            self.clock.tick(self.fps)
+            prof.stop('tick_wait', t)
+
+        pipeline.stop()
+        if self.station: self.station.close(self, pipeline)
+        if self.streamer:
+            self.streamer.stop()
+            self.stream.close()
+            print("[stream]", self.streamer.report(), "|", self.stream.report())
+        if self.recorder:
+            self.recorder.close(self.session.state)
+            print(f"[trace] {self.recorder.records} records written to {self.recorder.path}")
+        print("[startup]", self.startup_report())
+        if hasattr(self.cap, 'report'): print("[camera]", self.cap.report())
+        print("[pipeline]", pipeline.report())
+        print("[hands]", self.tracker.report(), "| pinch", self.pinch.report())
+        print("[quality]", self.governor.report())
+        print("[text cache]", self.text.report())
+        print("[liveness]", self.liveness.report())
+        if self.telemetry_sink:
+            self.finish_telemetry('ABANDONED')
+            self.telemetry_sink.close()
+            print("[telemetry]", self.telemetry_sink.report())
+        print("[profile]\n" + self.profiler.summary())
+        if self.profile_out:
+            self.profiler.dump(self.profile_out)
+            print(f"[profile] written to {self.profile_out}")
         self.cap.release()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = LiveJigsawCaptcha()
+    parser = argparse.ArgumentParser(description="Live Jigsaw CAPTCHA")
+    parser.add_argument('--source', default='camera:0',
+                        help="camera:N, a video file, an image folder/glob, or synthetic:WxH")
+    parser.add_argument('--hud', action='store_true', help="Show the frame-time overlay (toggle with F3)")
+    parser.add_argument('--telemetry', metavar='PATH', help="Append interaction telemetry (.jsonl, or .db for SQLite)")
+    parser.add_argument('--record', metavar='PATH', help="Record an input trace for replay.py")
+    parser.add_argument('--stream', type=int, metavar='PORT', help="Serve encoded tiles to remote viewers at GET /stream")
+    parser.add_argument('--stream-host', default='127.0.0.1',
+                        help="Interface for --stream; the feed is unauthenticated, so only widen this on a trusted network")
+    parser.add_argument('--stream-codec', choices=('jpeg', 'webp'), default='jpeg')
+    parser.add_argument('--quality', choices=['auto'] + [t['name'].lower() for t in TIERS], default='auto',
+                        help="Fixed quality tier, or auto to adapt to load")
+    parser.add_argument('--profile-out', metavar='PATH', help="Write stage timings on exit (.csv, or .json for a Chrome trace)")
+    args = parser.parse_args()
+    game = LiveJigsawCaptcha(source=args.source, hud=args.hud, profile_out=args.profile_out, record=args.record,
+                              telemetry=args.telemetry, stream_port=args.stream, stream_host=args.stream_host,
+                              stream_codec=args.stream_codec, quality=args.quality)
     game.run()
\ No newline at end of file
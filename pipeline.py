@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import deque
+
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item when full (never blocks the producer)."""
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.put_count = 0
+        self.dropped = 0
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get_latest(self, timeout=0):
+        """Returns the newest item and discards older ones. None if nothing arrived in time."""
+        with self._cond:
+            if not self._items and timeout:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            self._items.clear()
+            return item
+
+
+class FramePipeline:
+    """
+    Producer/consumer split of the old get_live_frame_and_hands():
+      capture thread -> [frame queue] -> render loop
+                     -> [hand queue]  -> hand worker -> [result queue] -> render loop
+    The render loop only ever calls latest_frame()/latest_hands(), which never block.
+    """
+
+    def __init__(self, cap, prepare_frame, detect_hands, queue_size=2, profiler=None):
+        self.cap = cap
+        self.prepare_frame = prepare_frame
+        self.detect_hands = detect_hands
+        self.profiler = profiler  # Optional StageProfiler: times 'capture', 'prepare', 'hands'
+
+        self.frame_q = LatestQueue(queue_size)
+        self.hand_q = LatestQueue(queue_size)
+        self.result_q = LatestQueue(queue_size)
+
+        self._stop = threading.Event()
+        self.finished = False  # Camera stopped delivering frames
+        self.frames_captured = 0
+        self.frames_inferred = 0
+
+        self._last_frame = None
+        self._last_hands = (None, False)
+        self.hands_captured_at = None  # perf_counter time of the frame behind latest_hands()
+
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._hand_loop, name="hands", daemon=True),
+        ]
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=1.0)
+
+    # --- WORKERS ---
+    def _capture_loop(self):
+        prof = self.profiler
+        while not self._stop.is_set():
+            t = prof.start() if prof else 0
+            ret, frame = self.cap.read()
+            captured_at = time.perf_counter()
+            if prof: prof.stop('capture', t)
+            if not ret:
+                self.finished = True
+                break
+            t = prof.start() if prof else 0
+            frame_rgb = self.prepare_frame(frame)
+            if prof: prof.stop('prepare', t)
+            self.frames_captured += 1
+            self.frame_q.put(frame_rgb)
+            self.hand_q.put((frame_rgb, captured_at))
+
+    def _hand_loop(self):
+        prof = self.profiler
+        while not self._stop.is_set():
+            item = self.hand_q.get_latest(timeout=0.1)
+            if item is None:
+                if self.finished: break
+                continue
+            frame_rgb, captured_at = item
+            t = prof.start() if prof else 0
+            result = self.detect_hands(frame_rgb)
+            if prof: prof.stop('hands', t)
+            self.result_q.put((result, captured_at))
+            self.frames_inferred += 1
+
+    # --- RENDER-SIDE ACCESS (non-blocking) ---
+    def latest_frame(self):
+        """Newest prepared frame, or the previous one if the camera hasn't delivered since."""
+        frame = self.frame_q.get_latest()
+        if frame is not None:
+            self._last_frame = frame
+        return self._last_frame
+
+    def latest_hands(self):
+        """Newest (hand_pos, pinching) result, or the previous one if inference is still running."""
+        item = self.result_q.get_latest()
+        if item is not None:
+            self._last_hands, self.hands_captured_at = item
+        return self._last_hands
+
+    def stats(self):
+        """Per-stage queue depth and dropped-frame counters."""
+        return {
+            'capture': {'frames': self.frames_captured},
+            'render_queue': {'depth': len(self.frame_q), 'dropped': self.frame_q.dropped},
+            'hand_queue': {'depth': len(self.hand_q), 'dropped': self.hand_q.dropped},
+            'result_queue': {'depth': len(self.result_q), 'dropped': self.result_q.dropped},
+            'hands': {'frames': self.frames_inferred},
+        }
+
+    def report(self):
+        s = self.stats()
+        return (f"captured={s['capture']['frames']} inferred={s['hands']['frames']} | "
+                f"render q={s['render_queue']['depth']} drop={s['render_queue']['dropped']} | "
+                f"hand q={s['hand_queue']['depth']} drop={s['hand_queue']['dropped']} | "
+                f"result q={s['result_queue']['depth']} drop={s['result_queue']['dropped']}")
@@ -0,0 +1,114 @@
+"""
+Frame-time instrumentation: per-stage timers with rolling percentiles, plus
+CSV / Chrome-trace (chrome://tracing, ui.perfetto.dev) export.
+
+    prof = StageProfiler()
+    t = prof.start()
+    ...work...
+    prof.stop('tiles', t)
+
+or `with prof.stage('tiles'): ...`. Safe to call from the capture and hand
+worker threads as well as the render loop.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+
+WINDOW = 300                # Samples kept per stage for the rolling stats (~5 s at 60 FPS)
+MAX_TRACE_EVENTS = 500000   # Cap on Chrome-trace events held in memory
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(p / 100 * len(sorted_vals)))]
+
+
+class StageProfiler:
+    def __init__(self, window=WINDOW, trace=False):
+        self.window = window
+        self.trace = trace
+        self._samples = {}    # stage -> deque of durations (seconds)
+        self._counts = {}     # stage -> total samples ever
+        self._events = deque(maxlen=MAX_TRACE_EVENTS) if trace else None
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self.overruns = 0     # Frames whose work exceeded the frame budget
+
+    start = staticmethod(time.perf_counter)
+
+    def stop(self, stage, started):
+        """Records the time since `started` (from start()) under `stage`; returns the duration."""
+        end = time.perf_counter()
+        duration = end - started
+        samples = self._samples.get(stage)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(stage, deque(maxlen=self.window))
+                self._counts.setdefault(stage, 0)
+        samples.append(duration)
+        self._counts[stage] += 1
+        if self._events is not None:
+            self._events.append((stage, started, duration, threading.get_ident()))
+        return duration
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stop(name, started)
+
+    def stats(self, stage, last=None):
+        """(p50, p95, p99) in milliseconds over the rolling window, or only its newest `last` samples."""
+        samples = self._samples.get(stage, ())
+        vals = sorted(samples if last is None else islice(reversed(samples), last))
+        return tuple(percentile(vals, p) * 1000 for p in (50, 95, 99))
+
+    def count(self, stage):
+        """Samples ever recorded for `stage` (not capped by the window)."""
+        return self._counts.get(stage, 0)
+
+    def stages(self):
+        return list(self._samples)
+
+    def summary(self):
+        lines = []
+        for name in self.stages():
+            p50, p95, p99 = self.stats(name)
+            lines.append(f"{name:<10} n={self._counts[name]:<7} p50={p50:7.2f}ms p95={p95:7.2f}ms p99={p99:7.2f}ms")
+        lines.append(f"overruns={self.overruns}")
+        return "\n".join(lines)
+
+    # --- EXPORT ---
+    def dump(self, path):
+        """Writes a Chrome-trace JSON for *.json paths, a per-stage CSV otherwise."""
+        if os.path.splitext(path)[1].lower() == '.json':
+            self.dump_chrome_trace(path)
+        else:
+            self.dump_csv(path)
+
+    def dump_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'count', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+            for name in self.stages():
+                vals = self._samples[name]
+                writer.writerow([name, self._counts[name], *(f"{v:.3f}" for v in self.stats(name)),
+                                 f"{max(vals) * 1000:.3f}" if vals else "0"])
+
+    def dump_chrome_trace(self, path):
+        if self._events is None:
+            raise RuntimeError("profiler was created without trace=True")
+        pid = os.getpid()
+        events = [{'name': stage, 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': (start - self._t0) * 1e6, 'dur': duration * 1e6}
+                  for stage, start, duration, tid in list(self._events)]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,136 @@
+"""
+Headless replay of recorded input traces (see input_trace.py).
+
+Feeds each trace's START / POINTER / COMPENSATE / FRAME records back through PuzzleSession
+- the same state machine the game uses - with no display, camera or
+MediaPipe, then checks the replayed swaps against the recorded ones. Reports
+input-to-swap latency twice: end to end as it happened live (camera capture
+or mouse event -> swap on screen) and for the state machine alone.
+
+    python main.py --record run.jtr                 # record a session
+    python replay.py run.jtr                        # as fast as possible
+    python replay.py run.jtr --realtime             # at recorded speed
+    python replay.py traces/*.jtr --repeat 2000 --workers 8
+"""
+import argparse
+import glob
+import multiprocessing
+import time
+from collections import deque
+
+from engine import PuzzleSession
+from input_trace import (COMPENSATE, END, FRAME, HAND, HAND_PRESENT, POINTER, PTR_HAND, PTR_RELEASE,
+                         PTR_START, START, STATES, SWAP, load_trace)
+from profiler import percentile
+
+_traces = {}  # Per-process cache: path -> loaded trace
+
+
+def replay(path, realtime=False, speed=1.0):
+    """Replays one trace; returns a summary dict."""
+    trace = _traces.get(path)
+    if trace is None:
+        trace = _traces[path] = load_trace(path)
+    header, records = trace
+    session = PuzzleSession(grid_size=(header['cols'], header['rows']),
+                            board_size=header['board'], time_limit=header['time_limit'])
+
+    hand_t = None                 # Capture time of the latest hand result
+    inputs = deque()              # Input times of swaps not yet matched to a SWAP record
+    live_latency, engine_latency = [], []
+    replayed, recorded = [], []
+    recorded_state = None
+    wall0 = time.perf_counter()
+
+    for kind, t, x, y, flags, order in records:
+        if realtime:
+            delay = wall0 + t / speed - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+
+        if kind == POINTER:
+            t0 = time.perf_counter()
+            swapped = session.handle_pointer((x, y), bool(flags & PTR_START), bool(flags & PTR_RELEASE))
+            if swapped:
+                engine_latency.append(time.perf_counter() - t0)
+                replayed.append((session.grid.in_place, session.swaps))
+                inputs.append(hand_t if flags & PTR_HAND and hand_t is not None else t)
+        elif kind == FRAME:
+            session.tick(t)
+        elif kind == COMPENSATE:
+            # Stall credit the live countdown got, so a run saved by it doesn't replay as LOST
+            session.compensate((x * 1000 + y) / 1e6 - session.compensated)
+        elif kind == HAND:
+            hand_t = t if flags & HAND_PRESENT else None
+        elif kind == START:
+            session.start(now=t, order=order)
+            inputs.clear()
+        elif kind == SWAP:
+            recorded.append((x, y))
+            if inputs:
+                live_latency.append(t - inputs.popleft())
+        elif kind == END:
+            recorded_state = STATES[flags]
+
+    return {
+        'path': path,
+        'state': session.state,
+        'swaps': session.swaps,
+        'match': replayed == recorded and recorded_state in (None, session.state),
+        'live_latency': live_latency,
+        'engine_latency': engine_latency,
+        'elapsed': time.perf_counter() - wall0,
+    }
+
+
+def _replay_job(job):
+    path, realtime, speed = job
+    return replay(path, realtime, speed)
+
+
+def replay_many(paths, repeat=1, workers=None, realtime=False, speed=1.0):
+    """Replays every trace `repeat` times across worker processes; returns (results, elapsed)."""
+    jobs = [(p, realtime, speed) for _ in range(repeat) for p in paths]
+    workers = workers or multiprocessing.cpu_count()
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [_replay_job(j) for j in jobs]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_replay_job, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+    return results, time.perf_counter() - t0
+
+
+def fmt_ms(vals):
+    vals = sorted(vals)
+    return "p50={:.3f} p95={:.3f} p99={:.3f} ms".format(*(percentile(vals, p) * 1000 for p in (50, 95, 99)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded input traces through the puzzle state machine")
+    parser.add_argument('traces', nargs='+', help="Trace files or glob patterns")
+    parser.add_argument('--repeat', type=int, default=1, help="Replays per trace")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--realtime', action='store_true', help="Honour recorded timing instead of max speed")
+    parser.add_argument('--speed', type=float, default=1.0, help="Time scale for --realtime")
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.traces for p in (glob.glob(pattern) or [pattern])})
+    results, elapsed = replay_many(paths, args.repeat, args.workers, args.realtime, args.speed)
+
+    mismatched = sorted({r['path'] for r in results if not r['match']})
+    states = {}
+    for r in results:
+        states[r['state']] = states.get(r['state'], 0) + 1
+    print(f"replays: {len(results)} of {len(paths)} trace(s) in {elapsed:.2f}s "
+          f"-> {len(results) / elapsed:.0f} replays/s   final states {states}")
+    # Live latency is a property of the recording, so count each trace once
+    first = {r['path']: r for r in results}
+    print("input->swap (live, recorded):", fmt_ms([l for r in first.values() for l in r['live_latency']]))
+    print("input->swap (state machine): ", fmt_ms([l for r in results for l in r['engine_latency']]))
+    if mismatched:
+        print("replay diverged from recording:", ", ".join(mismatched))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
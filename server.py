@@ -0,0 +1,199 @@
+"""
+Headless multi-session CAPTCHA server.
+
+Speaks newline-delimited JSON over a plain asyncio TCP socket, and also accepts
+HTTP `POST /rpc` with a JSON body on the same port (handy for curl). See
+SessionEngine.handle() in engine.py for the message set; on top of those the
+server adds the video ops that need OpenCV:
+  {"op": "frame",  "session": id, "jpeg": <base64>}  -> stores the client's latest frame
+  {"op": "render", "session": id}                    -> {"jpeg": <base64 scrambled board>}
+
+With --tokens, a WON reply carries a signed result token, and backends check
+it with {"op": "verify", "token": ...} (single use; see tokens.py).
+
+    python server.py --port 8765
+"""
+import argparse
+import asyncio
+import base64
+import json
+import secrets
+
+from engine import SessionEngine, render_scrambled
+from telemetry import TelemetrySink
+from tokens import SECRET_ENV, ResultTokens, load_secret
+
+REAP_INTERVAL = 1.0  # Seconds between countdown/idle sweeps
+JPEG_QUALITY = 80
+MAX_BODY = 2 ** 22   # Largest JSON line or HTTP body accepted (bytes)
+
+
+def decode_frame(b64, width, height):
+    import cv2
+    import numpy as np
+    frame = cv2.imdecode(np.frombuffer(base64.b64decode(b64), np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+    if frame.shape[:2] != (height, width):
+        frame = cv2.resize(frame, (width, height))
+    return frame
+
+
+def encode_scrambled(frame, order, cols, rows):
+    import cv2
+    ok, buf = cv2.imencode('.jpg', render_scrambled(frame, order, cols, rows),
+                           [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    return base64.b64encode(buf.tobytes()).decode('ascii') if ok else None
+
+
+class CaptchaServer:
+    def __init__(self, engine=None):
+        self.engine = engine or SessionEngine()
+        self.connections = 0
+
+    async def dispatch(self, msg):
+        op = msg.get('op')
+        if op not in ('frame', 'render'):
+            return self.engine.handle(msg)
+
+        # Video ops: decode/encode off the event loop so pointer traffic stays responsive
+        session = self.engine.sessions.get(msg.get('session'))
+        if session is None:
+            return {'error': 'unknown session'}
+        loop = asyncio.get_running_loop()
+        if op == 'frame':
+            frame = await loop.run_in_executor(None, decode_frame, msg.get('jpeg', ''),
+                                               session.board_w, session.board_h)
+            if frame is None:
+                return {'error': 'bad frame'}
+            self.engine.set_frame(session.session_id, frame)
+            return {'ok': True}
+
+        frame = self.engine.frames.get(session.session_id)
+        if frame is None:
+            return {'error': 'no frame'}
+        order = session.grid.tolist()
+        jpeg = await loop.run_in_executor(None, encode_scrambled, frame, order,
+                                          session.grid.cols, session.grid.rows)
+        return {'state': session.state, 'order': order, 'jpeg': jpeg}
+
+    async def _reply(self, raw):
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            return {'error': 'bad json'}
+        if not isinstance(msg, dict):
+            return {'error': 'bad request: expected a JSON object'}
+        try:
+            return await self.dispatch(msg)
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            return {'error': f'bad request: {e}'}
+
+    async def _handle_http(self, first_line, reader, writer):
+        # Minimal HTTP/1.1 keep-alive: only POST with Content-Length is supported
+        while True:
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                headers[key.strip().lower()] = value.strip()
+            close = headers.get('connection', '').lower() == 'close'
+            try:
+                length = int(headers.get('content-length', 0))
+            except ValueError:
+                length = -1
+            if not first_line.startswith(b'POST '):
+                body = json.dumps({'error': 'use POST /rpc'}).encode()
+                status = b'405 Method Not Allowed'
+            elif length < 0:
+                body = json.dumps({'error': 'bad Content-Length'}).encode()
+                status, close = b'400 Bad Request', True
+            elif length > MAX_BODY:
+                # The body is left unread, so the connection can't be reused
+                body = json.dumps({'error': f'body over {MAX_BODY} bytes'}).encode()
+                status, close = b'413 Payload Too Large', True
+            else:
+                raw = await reader.readexactly(length)
+                body = json.dumps(await self._reply(raw)).encode()
+                status = b'200 OK'
+            writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Type: application/json\r\n'
+                         b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+            await writer.drain()
+            if close:
+                return
+            first_line = await reader.readline()
+            if not first_line:
+                return
+
+    async def handle_client(self, reader, writer):
+        self.connections += 1
+        try:
+            first_line = await reader.readline()
+            if first_line[:5] in (b'POST ', b'GET /'):
+                await self._handle_http(first_line, reader, writer)
+                return
+            line = first_line
+            while line:
+                if line.strip():
+                    writer.write(json.dumps(await self._reply(line)).encode() + b'\n')
+                    await writer.drain()
+                line = await reader.readline()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass        # ValueError: a line longer than MAX_BODY
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def reaper(self):
+        while True:
+            await asyncio.sleep(REAP_INTERVAL)
+            self.engine.reap()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_BODY)
+        reaper = asyncio.create_task(self.reaper())
+        print(f"[server] listening on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reaper.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless multi-session Live Jigsaw CAPTCHA server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--grid-size', type=int, nargs='+', default=[4], help="N, or COLS ROWS")
+    parser.add_argument('--pool-size', type=int, default=4096, help="Boards pre-generated per grid size")
+    parser.add_argument('--telemetry', metavar='PATH', help="Append interaction telemetry (.jsonl, or .db for SQLite)")
+    parser.add_argument('--memory-mb', type=float, default=256,
+                        help="Session memory budget; least recently used sessions are evicted past it")
+    parser.add_argument('--tokens', action='store_true', help=f"Issue signed result tokens (key from ${SECRET_ENV})")
+    args = parser.parse_args()
+    grid_size = args.grid_size[0] if len(args.grid_size) == 1 else args.grid_size[:2]
+    sink = TelemetrySink(args.telemetry) if args.telemetry else None
+    tokens = None
+    if args.tokens:
+        secret = load_secret()
+        if secret is None:
+            print(f"[server] ${SECRET_ENV} not set: using a random key, tokens only verify against this process")
+            secret = secrets.token_bytes(32)
+        tokens = ResultTokens(secret)
+    try:
+        engine = SessionEngine(grid_size=grid_size, pool_size=args.pool_size, telemetry=sink, tokens=tokens,
+                               memory_budget=int(args.memory_mb * 1024 * 1024))
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        asyncio.run(CaptchaServer(engine).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if sink: sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Memory-bounded session store for the headless engine.
+
+Sessions live in an OrderedDict kept in least-recently-used order: every
+lookup moves the session to the back and stamps its last_seen, so the front is
+always the session that has been idle longest and last_seen only grows from
+front to back. That makes both limits cheap:
+
+  * TTL expiry pops from the front until it reaches a session seen within
+    `ttl` - O(expired), not a sweep over every session;
+  * the memory budget is enforced on insert: while the estimated total is
+    over budget, the least recently used session is evicted, preferring ones
+    that aren't mid-attempt (MENU / WON / LOST) within the first EVICT_SCAN.
+
+Sizes are estimates: one measurement of a session's objects per grid size
+(sessions of the same grid are the same size) plus whatever the caller
+charges on top, such as a stored video frame. bench_sessions.py measures the
+real footprint with tracemalloc.
+"""
+import sys
+import time
+from collections import OrderedDict
+
+SESSION_TTL = 300               # Seconds without a lookup before a session expires
+MEMORY_BUDGET = 256 * 1024 * 1024
+EVICT_SCAN = 32                 # LRU entries inspected for a non-PLAYING session before taking the oldest
+ENTRY_OVERHEAD = 100            # OrderedDict slot + link node per entry (CPython, 64-bit)
+
+
+def session_size(session):
+    """Approximate bytes held by one PuzzleSession (shared shuffle pools excluded)."""
+    grid = session.grid
+    return (sys.getsizeof(session) + sys.getsizeof(session.session_id) + sys.getsizeof(grid) +
+            sys.getsizeof(grid.order) + 2 * sys.getsizeof(0.0) + ENTRY_OVERHEAD)
+
+
+class SessionStore:
+    def __init__(self, ttl=SESSION_TTL, memory_budget=MEMORY_BUDGET, on_evict=None):
+        self.ttl = ttl
+        self.memory_budget = memory_budget
+        self.on_evict = on_evict    # on_evict(session_id, session) for sessions dropped to stay in budget
+        self._sessions = OrderedDict()
+        self._charged = {}          # session_id -> extra bytes charged on top of the session itself
+        self._sizes = {}            # (cols, rows) -> estimated session size
+        self.bytes = 0
+
+        # Counters
+        self.expired = 0
+        self.evicted = 0
+        self.evicted_playing = 0    # Evictions that had to take a session mid-attempt
+
+    # --- MAPPING ---
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def __iter__(self):
+        return iter(self._sessions)
+
+    def items(self):
+        return self._sessions.items()
+
+    def values(self):
+        return self._sessions.values()
+
+    def get(self, session_id, default=None, now=None):
+        """Looks a session up and marks it most recently used (back of the LRU, last_seen = now)."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return default
+        self._sessions.move_to_end(session_id)
+        session.last_seen = time.time() if now is None else now
+        return session
+
+    def peek(self, session_id, default=None):
+        """Looks a session up without touching its LRU position."""
+        return self._sessions.get(session_id, default)
+
+    def _size(self, session):
+        key = (session.grid.cols, session.grid.rows)
+        size = self._sizes.get(key)
+        if size is None:
+            size = self._sizes[key] = session_size(session)
+        return size
+
+    def add(self, session, now=None):
+        if session.session_id in self._sessions:
+            self.pop(session.session_id)
+        session.last_seen = time.time() if now is None else now
+        self._sessions[session.session_id] = session
+        self.bytes += self._size(session)
+        self._enforce_budget(keep=session.session_id)
+        return session
+
+    def pop(self, session_id, default=None):
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return default
+        self.bytes -= self._size(session) + self._charged.pop(session_id, 0)
+        return session
+
+    # --- LIMITS ---
+    def charge(self, session_id, nbytes):
+        """Sets the extra bytes attributed to a session (e.g. its latest video frame); may evict others."""
+        if session_id not in self._sessions:
+            return False
+        self.bytes += nbytes - self._charged.get(session_id, 0)
+        self._charged[session_id] = nbytes
+        self._enforce_budget(keep=session_id)
+        return session_id in self._sessions
+
+    def _enforce_budget(self, keep=None):
+        while self.memory_budget is not None and self.bytes > self.memory_budget and len(self._sessions) > 1:
+            victim = None
+            for i, (sid, session) in enumerate(self._sessions.items()):
+                if i >= EVICT_SCAN:
+                    break
+                if sid != keep and session.state != 'PLAYING':
+                    victim = sid
+                    break
+            if victim is None:
+                victim = next(sid for sid in self._sessions if sid != keep)
+                self.evicted_playing += 1
+            session = self.pop(victim)
+            self.evicted += 1
+            if self.on_evict: self.on_evict(victim, session)
+
+    def expire(self, now):
+        """
+        Removes and returns [(session_id, session)] not looked up for `ttl` seconds.
+        Stops at the first fresh session: only get() / add() stamp last_seen, and they
+        also move the session to the back, so everything behind it is fresher still.
+        """
+        out = []
+        sessions = self._sessions
+        while sessions:
+            sid = next(iter(sessions))
+            session = sessions[sid]
+            if now - session.last_seen <= self.ttl:
+                break
+            self.pop(sid)
+            out.append((sid, session))
+        self.expired += len(out)
+        return out
+
+    def stats(self):
+        return {
+            'sessions': len(self._sessions),
+            'bytes': self.bytes,
+            'budget': self.memory_budget,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'evicted_playing': self.evicted_playing,
+        }
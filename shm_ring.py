@@ -0,0 +1,128 @@
+"""
+Single-producer ring buffers in multiprocessing.shared_memory.
+
+Used by stations.py so worker processes can hand preview frames and result
+records to the supervisor without pickling them through a Queue/Pipe: the
+writer copies its bytes straight into a slot of a shared block, the reader
+copies them straight out.
+
+Layout: a 16-byte header (next sequence number, slot count, slot size), then
+`slots` slots of [sequence + 1 (u64), length (u32), pad (u32), payload].
+Each slot works like a seqlock: the writer zeroes the slot's sequence, copies
+the payload, then publishes the sequence. A reader that sees a different
+sequence after copying knows the slot was overwritten under it and drops the
+record. Writers never wait for readers; a slow reader just loses the oldest
+records (counted in RingReader.missed).
+
+    ring = ShmRing.create(slots=64, slot_size=64)     # supervisor
+    ring = ShmRing.attach(ring.name)                  # worker (by name)
+    ring.write(payload)
+    for payload in RingReader(ring).poll(): ...
+"""
+import struct
+from multiprocessing import shared_memory
+
+HEADER = struct.Struct('<QII')      # next seq, slots, slot size
+SLOT_HEADER = struct.Struct('<QI4x')  # seq + 1 (0 while being written), payload length
+SEQ = struct.Struct('<Q')
+
+
+class ShmRing:
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        _, self.slots, self.slot_size = HEADER.unpack_from(self.buf, 0)
+        self.stride = SLOT_HEADER.size + self.slot_size
+
+    @classmethod
+    def create(cls, slots, slot_size, name=None):
+        stride = SLOT_HEADER.size + slot_size
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER.size + slots * stride)
+        shm.buf[:HEADER.size + slots * stride] = bytes(HEADER.size + slots * stride)
+        HEADER.pack_into(shm.buf, 0, 0, slots, slot_size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def next_seq(self):
+        return SEQ.unpack_from(self.buf, 0)[0]
+
+    def _slot(self, seq):
+        return HEADER.size + (seq % self.slots) * self.stride
+
+    # --- WRITER (one process only) ---
+    def write(self, payload):
+        """Copies a bytes-like payload (bytes, array, C-contiguous ndarray) into the next slot; returns its seq."""
+        data = memoryview(payload).cast('B')
+        n = len(data)
+        if n > self.slot_size:
+            raise ValueError(f"payload of {n} bytes does not fit a {self.slot_size}-byte slot")
+        seq = self.next_seq
+        off = self._slot(seq)
+        SEQ.pack_into(self.buf, off, 0)
+        start = off + SLOT_HEADER.size
+        self.buf[start:start + n] = data
+        SLOT_HEADER.pack_into(self.buf, off, seq + 1, n)
+        SEQ.pack_into(self.buf, 0, seq + 1)
+        return seq
+
+    # --- READERS ---
+    def read(self, seq):
+        """The payload written as `seq`, or None if it isn't there (not yet written, or overwritten)."""
+        off = self._slot(seq)
+        tag, n = SLOT_HEADER.unpack_from(self.buf, off)
+        if tag != seq + 1:
+            return None
+        start = off + SLOT_HEADER.size
+        data = bytes(self.buf[start:start + n])
+        if SEQ.unpack_from(self.buf, off)[0] != tag:
+            return None     # Torn: the writer lapped us mid-copy
+        return data
+
+    def latest(self):
+        """(seq, payload) of the newest complete record, or None."""
+        seq = self.next_seq
+        while seq > 0:
+            seq -= 1
+            data = self.read(seq)
+            if data is not None:
+                return seq, data
+            if self.next_seq - seq >= self.slots:
+                break
+        return None
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingReader:
+    """In-order consumer with its own cursor. Records overwritten before it got to them are counted, not returned."""
+
+    def __init__(self, ring, from_start=True):
+        self.ring = ring
+        self.cursor = 0 if from_start else ring.next_seq
+        self.missed = 0
+
+    def poll(self, limit=None):
+        out = []
+        head = self.ring.next_seq
+        if head - self.cursor > self.ring.slots:
+            self.missed += head - self.cursor - self.ring.slots
+            self.cursor = head - self.ring.slots
+        while self.cursor < head and (limit is None or len(out) < limit):
+            data = self.ring.read(self.cursor)
+            if data is None: self.missed += 1
+            else: out.append(data)
+            self.cursor += 1
+        return out
@@ -0,0 +1,194 @@
+"""
+Difficulty-calibrated, solvability-aware board shuffles.
+
+Every permutation is solvable by swaps, and the minimum number of swaps
+needed is `n - cycles`. That distance is the difficulty knob: we build
+permutations with an exact distance by starting from the solved board and
+applying transpositions that each merge two cycles (+1 swap each), so we
+never emit solved or nearly-solved boards by accident.
+
+Randomness comes from the OS CSPRNG (random.SystemRandom, the generator the
+`secrets` module uses). Pass a seed to get a reproducible HMAC-SHA256 DRBG
+instead, e.g. for replays and tests.
+
+Pools (a stock of boards plus a refill thread) are only built for the grid
+sizes a process configures at startup with shuffle_pool(); shuffler() hands
+any other size a plain generator, so client-chosen sizes can't pile up
+threads and boards.
+"""
+import hashlib
+import hmac
+import math
+import random
+import threading
+from array import array
+from collections import deque
+
+MIN_MISPLACED = 0.75    # Reject boards with more than 25% of tiles already home
+MIN_DIFFICULTY = 0.6    # Default distance range, as a fraction of the max (n - 1)
+POOL_SIZE = 256
+POOL_LOW_WATER = 64
+
+
+class HmacDrbg(random.Random):
+    """Deterministic, cryptographically strong random.Random driven by HMAC-SHA256 in counter mode."""
+
+    def __init__(self, seed):
+        self._key = hashlib.sha256(str(seed).encode() if not isinstance(seed, bytes) else seed).digest()
+        self._counter = 0
+        super().__init__(0)
+
+    def seed(self, *args, **kwargs):
+        # random.Random.__init__ calls seed(); our state is the HMAC key + counter
+        pass
+
+    def getrandbits(self, k):
+        nbytes = (k + 7) // 8
+        out = b''
+        while len(out) < nbytes:
+            out += hmac.new(self._key, self._counter.to_bytes(8, 'big'), hashlib.sha256).digest()
+            self._counter += 1
+        return int.from_bytes(out[:nbytes], 'big') >> (nbytes * 8 - k)
+
+    def random(self):
+        return self.getrandbits(53) / (1 << 53)
+
+
+def min_swap_distance(order):
+    """Minimum number of swaps that solve `order` (n minus its cycle count)."""
+    n = len(order)
+    seen = bytearray(n)
+    cycles = 0
+    for start in range(n):
+        if seen[start]:
+            continue
+        cycles += 1
+        pos = start
+        while not seen[pos]:
+            seen[pos] = 1
+            pos = order[pos]
+    return n - cycles
+
+
+class PermutationGenerator:
+    """Produces permutations of `n` tiles whose min-swap distance lies in [min_distance, max_distance]."""
+
+    def __init__(self, n, min_distance=None, max_distance=None, min_misplaced=MIN_MISPLACED, seed=None):
+        if n < 2:
+            raise ValueError("need at least 2 tiles to shuffle")
+        self.n = n
+        self.max_distance = n - 1 if max_distance is None else min(max_distance, n - 1)
+        # A board d swaps away moves at most 2d tiles, so the misplaced floor implies a distance floor
+        floor = math.ceil(min_misplaced * n / 2)
+        if self.max_distance < floor:
+            raise ValueError(f"max_distance {self.max_distance} can't misplace {min_misplaced:.0%} of {n} tiles")
+        if min_distance is None:
+            min_distance = math.ceil(MIN_DIFFICULTY * (n - 1))
+        self.min_distance = min(max(1, floor, min_distance), self.max_distance)
+        self.max_fixed = n - math.ceil(min_misplaced * n)
+        self.rng = random.SystemRandom() if seed is None else HmacDrbg(seed)
+        self.typecode = 'H' if n <= 0xFFFF else 'I'
+
+    def _build(self, distance):
+        n, rng = self.n, self.rng
+        order = list(range(n))
+        parent = list(range(n))  # Union-find over positions: one set per cycle
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        merges = 0
+        while merges < distance:
+            a, b = rng.randrange(n), rng.randrange(n)
+            ra, rb = find(a), find(b)
+            if ra == rb:
+                continue
+            # Swapping entries from two different cycles merges them: distance + 1
+            order[a], order[b] = order[b], order[a]
+            parent[ra] = rb
+            merges += 1
+        return order
+
+    def generate(self):
+        while True:
+            order = self._build(self.rng.randint(self.min_distance, self.max_distance))
+            fixed = sum(1 for pos, tile in enumerate(order) if pos == tile)
+            if fixed <= self.max_fixed:
+                return array(self.typecode, order)
+
+    def generate_batch(self, count):
+        """Many puzzles at once, e.g. to pre-seed the server."""
+        return [self.generate() for _ in range(count)]
+
+    def take(self):
+        """Same interface as ShufflePool.take(), drawn on the spot."""
+        return self.generate()
+
+
+class ShufflePool:
+    """Keeps a stock of ready permutations, refilled by a background thread, so take() is O(1)."""
+
+    def __init__(self, generator, size=POOL_SIZE, low_water=POOL_LOW_WATER, background=True):
+        self.generator = generator
+        self.size = size
+        self.low_water = low_water
+        self._ready = deque(generator.generate_batch(size))
+        self._wake = threading.Event()
+        self._lock = threading.Lock()  # Generators are not thread-safe (HMAC counter)
+        self.misses = 0
+        if background:
+            threading.Thread(target=self._refill_loop, name="shuffle-pool", daemon=True).start()
+
+    def __len__(self):
+        return len(self._ready)
+
+    def _refill_loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while len(self._ready) < self.size:
+                with self._lock:
+                    order = self.generator.generate()
+                self._ready.append(order)
+
+    def take(self):
+        try:
+            order = self._ready.popleft()
+        except IndexError:
+            self.misses += 1
+            with self._lock:
+                order = self.generator.generate()
+        if len(self._ready) < self.low_water:
+            self._wake.set()
+        return order
+
+
+_pools = {}
+_generators = {}    # Unpooled, per tile count; bounded by the grid size limit
+_pools_lock = threading.Lock()
+
+
+def shuffle_pool(n, size=POOL_SIZE):
+    """
+    Shared pool for boards of `n` tiles (`size` applies when the pool is first created).
+    Call at startup for the configured grid sizes: creating one blocks while it fills.
+    """
+    with _pools_lock:
+        pool = _pools.get(n)
+        if pool is None:
+            pool = _pools[n] = ShufflePool(PermutationGenerator(n), size=size, low_water=size // 4)
+        return pool
+
+
+def shuffler(n):
+    """The pool for `n` tiles if one was configured, else a shared unpooled generator (never blocks on a batch)."""
+    with _pools_lock:
+        source = _pools.get(n)
+        if source is None:
+            source = _generators.get(n)
+        if source is None:
+            source = _generators[n] = PermutationGenerator(n)
+        return source
@@ -0,0 +1,400 @@
+"""
+Multi-station launcher: one LiveJigsawCaptcha per process, one supervisor.
+
+A single game process keeps frame conversion, MediaPipe and pygame rendering
+behind one GIL. Here every station (a camera, video file or synthetic source)
+runs in its own process, optionally pinned to its own cores, and talks to the
+supervisor only through shared-memory rings (shm_ring.py):
+
+  * a frame ring per station carrying small RGB previews (no pickling, one
+    memcpy each side), used for the supervisor's mosaic window;
+  * a result ring per station carrying fixed-size binary records: verification
+    outcomes (WON / LOST / ABANDONED, duration, swaps, liveness) and a health
+    heartbeat (FPS, frame p95, frames captured, overruns, hand-model status).
+
+The supervisor aggregates outcomes and health across stations, flags stations
+that stop sending heartbeats, and can restart ones that exit.
+
+Hand tracking is shared: the supervisor runs a hand_service with
+--hand-workers model processes, and each station sends its inference frames
+there over a Pipe instead of loading a MediaPipe model of its own
+(--hand-workers 0 goes back to one model per station).
+
+    python stations.py camera:0 camera:1 --pin --preview
+    python stations.py synthetic:1280x720 -n 4 --headless --duration 30 --json stations.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import struct
+import threading
+import time
+from collections import Counter
+
+from hand_service import HandInferenceService, PipeHandClient, serve_client
+from shm_ring import RingReader, ShmRing
+
+# --- DEFAULTS ---
+PREVIEW_SIZE = 160          # Preview thumbnails are PREVIEW_SIZE^2 RGB
+PREVIEW_INTERVAL = 0.1      # Seconds between previews a station publishes
+HEALTH_INTERVAL = 1.0       # Seconds between heartbeats
+STALE_AFTER = 3.0           # Heartbeat age after which a station is reported STALE
+REPORT_EVERY = 5.0          # Seconds between supervisor status lines
+FRAME_SLOTS = 4
+RESULT_SLOTS = 256
+WINDOW_SIZE = (850, 600)    # Station window (mirrors main.WINDOW_WIDTH x WINDOW_HEIGHT), for tiling
+HAND_WORKERS = 1            # Shared hand-model processes in the supervisor (0: one model per station)
+
+# --- RECORDS ---
+KIND_OUTCOME = 1
+KIND_HEALTH = 2
+STATES = ('MENU', 'PLAYING', 'WON', 'LOST', 'ABANDONED', 'EXITED')
+HAND_STATUSES = ('LOADING', 'READY', 'MOUSE ONLY')
+# kind, state, swaps, attempt, wall time, duration (s), liveness score (-1 if none), live
+OUTCOME = struct.Struct('<BBHIdffB')
+# kind, state, hand status, frames captured, overruns, wall time, fps, frame p95 (ms)
+HEALTH = struct.Struct('<BBBxIIdff')
+RECORD_SIZE = max(OUTCOME.size, HEALTH.size)
+
+
+def decode(record):
+    """Result-ring record -> dict."""
+    if record[0] == KIND_OUTCOME:
+        _, state, swaps, attempt, t, duration, score, live = OUTCOME.unpack_from(record)
+        return {'kind': 'outcome', 'state': STATES[state], 'swaps': swaps, 'attempt': attempt, 't': t,
+                'duration': round(duration, 3), 'liveness': None if score < 0 else round(score, 3), 'live': bool(live)}
+    _, state, hand, frames, overruns, t, fps, p95 = HEALTH.unpack_from(record)
+    return {'kind': 'health', 'state': STATES[state], 'hands': HAND_STATUSES[hand], 'frames': frames,
+            'overruns': overruns, 't': t, 'fps': round(fps, 1), 'frame_p95_ms': round(p95, 2)}
+
+
+# --- WORKER SIDE ---
+class Station:
+    """Hook LiveJigsawCaptcha calls once per rendered frame (see main.py's `station` argument)."""
+
+    def __init__(self, index, frames, results, stop_event=None, preview_size=PREVIEW_SIZE,
+                 preview_interval=PREVIEW_INTERVAL, health_interval=HEALTH_INTERVAL):
+        import numpy as np
+        self.index = index
+        self.frames = frames
+        self.results = results
+        self.stop_event = stop_event    # Set by the supervisor to ask for a clean exit
+        self._stopping = False
+        self.preview_size = preview_size
+        self.preview_interval = preview_interval
+        self.health_interval = health_interval
+        self._thumb = np.empty((preview_size, preview_size, 3), dtype=np.uint8)
+        self._state = 'MENU'
+        self._preview_at = 0.0
+        self._health_at = 0.0
+
+    def tick(self, game, pipeline, frame_rgb):
+        if self.stop_event is not None and self.stop_event.is_set() and not self._stopping:
+            # Leave through the normal QUIT path so the game loop shuts down and reports
+            import pygame
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+            self._stopping = True
+        now = time.time()
+        state = game.session.state
+        if state != self._state:
+            if state in ('WON', 'LOST'): self.outcome(game.session, state, now)
+            self._state = state
+        if frame_rgb is not None and now - self._preview_at >= self.preview_interval:
+            import cv2
+            cv2.resize(frame_rgb, self._thumb.shape[1::-1], dst=self._thumb, interpolation=cv2.INTER_AREA)
+            self.frames.write(self._thumb)
+            self._preview_at = now
+        if now - self._health_at >= self.health_interval:
+            self.health(game, pipeline, state, now)
+
+    def outcome(self, session, state, now):
+        live = session.liveness
+        self.results.write(OUTCOME.pack(KIND_OUTCOME, STATES.index(state), min(session.swaps, 0xFFFF),
+                                        session.attempts, now, session.elapsed_time,
+                                        live['score'] if live else -1.0, bool(live and live['live'])))
+
+    def health(self, game, pipeline, state, now):
+        hand = game.hand_status if game.hand_status in HAND_STATUSES else 'MOUSE ONLY'
+        self.results.write(HEALTH.pack(KIND_HEALTH, STATES.index(state), HAND_STATUSES.index(hand),
+                                       pipeline.frames_captured & 0xFFFFFFFF, game.profiler.overruns,
+                                       now, game.clock.get_fps(), game.profiler.stats('frame')[1]))
+        self._health_at = now
+
+    def close(self, game, pipeline):
+        """Game loop ended: an attempt still in progress counts as ABANDONED, then a final EXITED heartbeat."""
+        now = time.time()
+        if game.session.state == 'PLAYING': self.outcome(game.session, 'ABANDONED', now)
+        self.health(game, pipeline, 'EXITED', now)
+        self.frames.close()
+        self.results.close()
+
+
+def station_main(index, source, frames_name, results_name, stop_event=None, headless=False, window_pos=None,
+                 cpus=None, telemetry=None, hands_conn=None):
+    """Worker process entry point: one source, one LiveJigsawCaptcha (hands from the supervisor's service if given a pipe)."""
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    elif window_pos:
+        os.environ['SDL_VIDEO_WINDOW_POS'] = "%d,%d" % window_pos
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    import cv2
+    # The station already has its own core(s); OpenCV's own thread pool would just contend with the others
+    cv2.setNumThreads(1)
+    from main import LiveJigsawCaptcha
+
+    station = Station(index, ShmRing.attach(frames_name), ShmRing.attach(results_name), stop_event)
+    hands = PipeHandClient(hands_conn) if hands_conn is not None else None
+    game = LiveJigsawCaptcha(source=source, station=station, hands=hands,
+                             telemetry=telemetry.format(station=index) if telemetry else None)
+    try:
+        game.run()
+    except SystemExit:
+        pass
+    finally:
+        if hands: hands.close()
+
+
+# --- SUPERVISOR SIDE ---
+class StationHandle:
+    """Supervisor's view of one station: its process, rings and aggregated results."""
+
+    def __init__(self, index, source):
+        self.index = index
+        self.source = source
+        self.process = None
+        self.hands_conn = None      # Supervisor end of the station's hand-inference pipe
+        self.frames = ShmRing.create(FRAME_SLOTS, PREVIEW_SIZE * PREVIEW_SIZE * 3)
+        self.results = ShmRing.create(RESULT_SLOTS, RECORD_SIZE)
+        self.reader = RingReader(self.results)
+        self.health = None
+        self.outcomes = Counter()
+        self.won_time = 0.0
+        self.live_passed = 0
+        self.restarts = 0
+        self.exited = False
+
+    def status(self, now):
+        if self.process is not None and not self.process.is_alive():
+            return 'EXITED' if self.exited else 'DEAD'
+        if self.health is None:
+            return 'STARTING'
+        return 'STALE' if now - self.health['t'] > STALE_AFTER else 'OK'
+
+    def summary(self, now):
+        h = self.health or {}
+        won = self.outcomes['WON']
+        return {'station': self.index, 'source': self.source, 'status': self.status(now),
+                'restarts': self.restarts, 'outcomes': dict(self.outcomes),
+                'won_mean_s': round(self.won_time / won, 2) if won else None,
+                'liveness_pass': self.live_passed, 'fps': h.get('fps'), 'frame_p95_ms': h.get('frame_p95_ms'),
+                'frames': h.get('frames'), 'overruns': h.get('overruns'), 'hands': h.get('hands'),
+                'state': h.get('state'), 'missed_records': self.reader.missed}
+
+    def close(self):
+        self.frames.close()
+        self.results.close()
+
+
+class Supervisor:
+    def __init__(self, sources, headless=False, pin=False, restart=False, telemetry=None, hand_workers=HAND_WORKERS):
+        # spawn, not fork: cv2 / SDL / MediaPipe threads don't survive a fork
+        self.ctx = multiprocessing.get_context('spawn')
+        self.headless = headless
+        self.restart = restart
+        self.telemetry = telemetry
+        self.stations = [StationHandle(i, s) for i, s in enumerate(sources)]
+        self.cpus = self._plan_cpus(len(sources)) if pin else [None] * len(sources)
+        self.stop_event = self.ctx.Event()
+        self.started = time.time()
+        self.hand_workers = hand_workers
+        self.hands = None           # Shared HandInferenceService, once started
+
+    @staticmethod
+    def _plan_cpus(n):
+        """Splits the CPUs this process may use evenly between stations."""
+        if not hasattr(os, 'sched_getaffinity'):
+            return [None] * n
+        cpus = sorted(os.sched_getaffinity(0))
+        per = max(1, len(cpus) // n)
+        return [set(cpus[(i * per) % len(cpus):(i * per) % len(cpus) + per]) for i in range(n)]
+
+    def _start_hands(self):
+        """The shared hand models; None (each station loads its own) if they can't be loaded here."""
+        service = HandInferenceService(workers=self.hand_workers, backend='process')
+        try:
+            return service.start()
+        except (EOFError, OSError) as e:
+            service.stop()
+            print(f"[stations] shared hand models unavailable ({e!r}), stations load their own")
+            return None
+
+    def _connect_hands(self, st):
+        """A pipe for the station's PipeHandClient, answered by a serve_client thread here."""
+        if st.hands_conn is not None:
+            st.hands_conn.close()     # Restart: the old serve_client thread exits on EOF
+        ours, theirs = self.ctx.Pipe()
+        st.hands_conn = ours
+        threading.Thread(target=serve_client, args=(self.hands.client(f"station-{st.index}"), ours),
+                         name=f"hands-station-{st.index}", daemon=True).start()
+        return theirs
+
+    def _spawn(self, st):
+        cols = max(1, int(len(self.stations) ** 0.5 + 0.999))
+        pos = ((st.index % cols) * WINDOW_SIZE[0], (st.index // cols) * WINDOW_SIZE[1])
+        hands_conn = self._connect_hands(st) if self.hands else None
+        st.process = self.ctx.Process(
+            target=station_main, name=f"station-{st.index}", daemon=True,
+            args=(st.index, st.source, st.frames.name, st.results.name, self.stop_event, self.headless, pos,
+                  self.cpus[st.index], self.telemetry, hands_conn))
+        st.process.start()
+        if hands_conn is not None:
+            hands_conn.close()      # The station holds its own copy now
+
+    def start(self):
+        if self.hand_workers:
+            self.hands = self._start_hands()
+        for st in self.stations:
+            self._spawn(st)
+        return self
+
+    def poll(self):
+        """Drains every result ring into the aggregates; restarts dead stations if asked to."""
+        now = time.time()
+        for st in self.stations:
+            for raw in st.reader.poll():
+                rec = decode(raw)
+                if rec['kind'] == 'health':
+                    st.health = rec
+                    st.exited = rec['state'] == 'EXITED'
+                    continue
+                st.outcomes[rec['state']] += 1
+                if rec['state'] == 'WON':
+                    st.won_time += rec['duration']
+                    st.live_passed += rec['live']
+            if self.restart and not self.stop_event.is_set() and st.status(now) == 'DEAD':
+                st.restarts += 1
+                st.health = None
+                self._spawn(st)
+
+    def running(self):
+        return any(st.process.is_alive() for st in self.stations)
+
+    def summary(self):
+        now = time.time()
+        stations = [st.summary(now) for st in self.stations]
+        total = Counter()
+        for st in self.stations:
+            total.update(st.outcomes)
+        fps = [s['fps'] for s in stations if s['status'] == 'OK' and s['fps'] is not None]
+        return {'uptime_s': round(now - self.started, 1), 'stations': stations, 'outcomes': dict(total),
+                'liveness_pass': sum(st.live_passed for st in self.stations),
+                'healthy': sum(s['status'] == 'OK' for s in stations),
+                'mean_fps': round(sum(fps) / len(fps), 1) if fps else None,
+                'hands': self.hands.stats() if self.hands else None}
+
+    def status_line(self):
+        s = self.summary()
+        parts = [f"#{st['station']} {st['status']} {st['fps'] or 0:.0f}fps W{st['outcomes'].get('WON', 0)}"
+                 f"/L{st['outcomes'].get('LOST', 0)}" for st in s['stations']]
+        return f"[{s['uptime_s']:.0f}s] healthy {s['healthy']}/{len(self.stations)} | " + " | ".join(parts)
+
+    def mosaic(self):
+        """Latest preview of every station side by side (BGR, for cv2.imshow)."""
+        import cv2
+        import numpy as np
+        cols = max(1, int(len(self.stations) ** 0.5 + 0.999))
+        rows = (len(self.stations) + cols - 1) // cols
+        out = np.zeros((rows * PREVIEW_SIZE, cols * PREVIEW_SIZE, 3), dtype=np.uint8)
+        now = time.time()
+        for st in self.stations:
+            y, x = (st.index // cols) * PREVIEW_SIZE, (st.index % cols) * PREVIEW_SIZE
+            latest = st.frames.latest()
+            if latest:
+                thumb = np.frombuffer(latest[1], dtype=np.uint8).reshape(PREVIEW_SIZE, PREVIEW_SIZE, 3)
+                cv2.cvtColor(thumb, cv2.COLOR_RGB2BGR, dst=out[y:y + PREVIEW_SIZE, x:x + PREVIEW_SIZE])
+            status = st.status(now)
+            cv2.putText(out, f"#{st.index} {status}", (x + 4, y + 14), cv2.FONT_HERSHEY_SIMPLEX, 0.4,
+                        (0, 255, 0) if status == 'OK' else (0, 0, 255), 1)
+        return out
+
+    def stop(self, timeout=5.0):
+        """Asks every station to quit cleanly; terminates the ones that haven't within `timeout`."""
+        self.stop_event.set()
+        deadline = time.time() + timeout
+        for st in self.stations:
+            if st.process is not None:
+                st.process.join(max(0.0, deadline - time.time()))
+        for st in self.stations:
+            if st.process is not None and st.process.is_alive():
+                st.process.terminate()
+                st.process.join()
+        self.poll()
+        if self.hands:
+            self.hands.stop()
+        for st in self.stations:
+            if st.hands_conn is not None:
+                st.hands_conn.close()
+            st.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several CAPTCHA stations, one process each, under a supervisor")
+    parser.add_argument('sources', nargs='+', help="One source per station (camera:N, video file, folder, synthetic:WxH)")
+    parser.add_argument('-n', '--stations', type=int, help="Number of stations (sources are cycled)")
+    parser.add_argument('--headless', action='store_true', help="No station windows (SDL dummy driver)")
+    parser.add_argument('--pin', action='store_true', help="Pin each station to its own share of the CPUs")
+    parser.add_argument('--restart', action='store_true', help="Restart stations whose process dies")
+    parser.add_argument('--preview', action='store_true', help="Show a mosaic of all stations (q to quit)")
+    parser.add_argument('--duration', type=float, help="Stop after this many seconds")
+    parser.add_argument('--report-every', type=float, default=REPORT_EVERY)
+    parser.add_argument('--telemetry', metavar='PATH', help="Per-station telemetry path; {station} is replaced by the index")
+    parser.add_argument('--hand-workers', type=int, default=HAND_WORKERS,
+                        help="Hand-model processes shared by all stations (0: each station loads its own)")
+    parser.add_argument('--json', metavar='PATH', help="Write the final summary as JSON")
+    args = parser.parse_args()
+
+    n = args.stations or len(args.sources)
+    sources = [args.sources[i % len(args.sources)] for i in range(n)]
+    if args.telemetry and n > 1 and '{station}' not in args.telemetry:
+        parser.error("--telemetry needs a {station} placeholder when running several stations")
+
+    sup = Supervisor(sources, headless=args.headless, pin=args.pin, restart=args.restart,
+                     telemetry=args.telemetry, hand_workers=args.hand_workers).start()
+    print(f"[stations] {n} stations started: " + ", ".join(sources))
+    reported = time.time()
+    try:
+        while True:
+            sup.poll()
+            if not sup.running(): break
+            if args.preview:
+                import cv2
+                cv2.imshow("stations", sup.mosaic())
+                if cv2.waitKey(30) & 0xFF == ord('q'): break
+            else:
+                time.sleep(0.05)
+            now = time.time()
+            if now - reported >= args.report_every:
+                print(sup.status_line())
+                reported = now
+            if args.duration and now - sup.started >= args.duration: break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sup.stop()
+
+    summary = sup.summary()
+    print("[stations]", json.dumps({k: v for k, v in summary.items() if k != 'stations'}))
+    if sup.hands: print("[hands]", sup.hands.report())
+    for st in summary['stations']:
+        print(f"  #{st['station']} {st['source']}: {st['status']} outcomes={st['outcomes']} fps={st['fps']} "
+              f"p95={st['frame_p95_ms']}ms restarts={st['restarts']} missed={st['missed_records']}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Interaction telemetry for telling people from scripted solvers.
+
+Per attempt, SessionTelemetry keeps the pointer / hand trajectory in a fixed
+array-backed ring buffer and updates kinematic features as samples arrive:
+speed, acceleration and jerk statistics, path length, the distribution of
+pauses, press/pinch hold times, drag durations and the intervals between
+swaps, plus the solve order. Nothing is recomputed at the end.
+
+Finished attempts go to a TelemetrySink, which appends them in batches to a
+JSON-lines file or an SQLite database from its own thread. submit() is a
+deque append and the trajectory is packed on the writer thread, so the game
+loop and the server never wait on disk or serialization.
+
+    sink = TelemetrySink('telemetry.db')            # or .jsonl
+    tel = SessionTelemetry(session_id)
+    tel.pointer(t, x, y) ... tel.swap(t, a, b)
+    sink.submit(tel.record('WON'))
+"""
+import base64
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import deque
+
+TRAJECTORY_CAPACITY = 4096  # Samples kept per attempt (~68 s at 60 FPS); older ones are overwritten
+PAUSE_SPEED = 20.0          # px/s below which the pointer counts as resting
+PAUSE_MIN = 0.1             # Seconds of rest before it counts as a pause
+PAUSE_BINS = (0.25, 0.5, 1.0, 2.0, 4.0)  # Upper edges (s); the last bucket is open-ended
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 1.0        # Seconds between background flushes
+MAX_QUEUE = 10000           # Records held for the writer before the oldest are dropped
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+# Trajectory sample flags
+FLAG_HAND = 1
+FLAG_PRESSED = 2
+
+
+class Welford:
+    """Exact running mean / variance / max."""
+    __slots__ = ('n', 'mean', 'm2', 'max')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = 0.0
+
+    def add(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        if x > self.max: self.max = x
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def summary(self):
+        return {'n': self.n, 'mean': round(self.mean, 4), 'std': round(self.std, 4), 'max': round(self.max, 4)}
+
+
+class TrajectoryRing:
+    """Fixed-capacity ring of (t, x, y, flags) samples in typed arrays."""
+
+    def __init__(self, capacity=TRAJECTORY_CAPACITY):
+        self.capacity = capacity
+        self.t = array('d', bytes(8 * capacity))
+        self.x = array('h', bytes(2 * capacity))
+        self.y = array('h', bytes(2 * capacity))
+        self.flags = array('B', bytes(capacity))
+        self.head = 0       # Next slot to write
+        self.count = 0
+        self.overwritten = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, t, x, y, flags):
+        i = self.head
+        self.t[i] = t
+        self.x[i] = x
+        self.y[i] = y
+        self.flags[i] = flags
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.overwritten += 1
+
+    def _ordered(self, a):
+        """Oldest-first copy of one column (two slices, no per-sample Python work)."""
+        if self.count < self.capacity:
+            return a[:self.count]
+        return a[self.head:] + a[:self.head]
+
+    def pack(self):
+        """Oldest-first samples as bytes: float32 offsets from the first sample, then int16 x, int16 y, uint8 flags."""
+        t = self._ordered(self.t)
+        t0 = t[0] if t else 0.0
+        return (array('f', [v - t0 for v in t]).tobytes() + self._ordered(self.x).tobytes() +
+                self._ordered(self.y).tobytes() + self._ordered(self.flags).tobytes())
+
+
+class KinematicFeatures:
+    """Features of a pointer trajectory, updated one sample at a time."""
+
+    def __init__(self):
+        self.speed = Welford()
+        self.accel = Welford()
+        self.jerk = Welford()
+        self.path_length = 0.0
+        self.pauses = [0] * (len(PAUSE_BINS) + 1)
+        self.swap_intervals = Welford()
+        self.press_hold = Welford()
+        self.drag_time = Welford()
+        self._prev = None           # (t, x, y)
+        self._vel = None            # (vx, vy)
+        self._acc = None            # (ax, ay)
+        self._pause_start = None
+        self._last_swap = None
+        self._press_start = None
+        self._drag_start = None
+
+    def add(self, t, x, y):
+        prev, self._prev = self._prev, (t, x, y)
+        if prev is None:
+            return
+        dt = t - prev[0]
+        if dt <= 0:
+            self._prev = prev
+            return
+        dx, dy = x - prev[1], y - prev[2]
+        dist = math.hypot(dx, dy)
+        self.path_length += dist
+        speed = dist / dt
+        self.speed.add(speed)
+
+        vel = (dx / dt, dy / dt)
+        if self._vel is not None:
+            acc = ((vel[0] - self._vel[0]) / dt, (vel[1] - self._vel[1]) / dt)
+            self.accel.add(math.hypot(*acc))
+            if self._acc is not None:
+                self.jerk.add(math.hypot(acc[0] - self._acc[0], acc[1] - self._acc[1]) / dt)
+            self._acc = acc
+        self._vel = vel
+
+        if speed < PAUSE_SPEED:
+            if self._pause_start is None:
+                self._pause_start = prev[0]
+        elif self._pause_start is not None:
+            self._end_pause(prev[0])
+
+    def _end_pause(self, t):
+        length = t - self._pause_start
+        self._pause_start = None
+        if length < PAUSE_MIN:
+            return
+        for i, edge in enumerate(PAUSE_BINS):
+            if length < edge:
+                self.pauses[i] += 1
+                return
+        self.pauses[-1] += 1
+
+    def press(self, t, down):
+        if down:
+            self._press_start = t
+        elif self._press_start is not None:
+            self.press_hold.add(t - self._press_start)
+            self._press_start = None
+
+    def drag(self, t, start):
+        if start:
+            self._drag_start = t
+        elif self._drag_start is not None:
+            self.drag_time.add(t - self._drag_start)
+            self._drag_start = None
+
+    def swap(self, t):
+        if self._last_swap is not None:
+            self.swap_intervals.add(t - self._last_swap)
+        self._last_swap = t
+
+    def summary(self):
+        if self._pause_start is not None and self._prev is not None:
+            self._end_pause(self._prev[0])
+        iv = self.swap_intervals
+        return {
+            'speed': self.speed.summary(),
+            'accel': self.accel.summary(),
+            'jerk': self.jerk.summary(),
+            'path_length': round(self.path_length, 1),
+            'pauses': dict(zip([f"<{e}s" for e in PAUSE_BINS] + [f">={PAUSE_BINS[-1]}s"], self.pauses)),
+            'swap_interval': iv.summary(),
+            # Scripts tend to swap on a metronome: a low coefficient of variation is suspicious
+            'swap_interval_cv': round(iv.std / iv.mean, 4) if iv.n > 1 and iv.mean > 0 else None,
+            'press_hold': self.press_hold.summary(),
+            'drag_time': self.drag_time.summary(),
+        }
+
+
+class SessionTelemetry:
+    """Everything recorded for one attempt. Times are perf_counter seconds."""
+
+    def __init__(self, session_id, attempt=0, capacity=TRAJECTORY_CAPACITY):
+        self.session_id = session_id
+        self.attempt = attempt
+        self.started = time.time()
+        self.ring = TrajectoryRing(capacity)
+        self.features = KinematicFeatures()
+        self.solve_order = []
+        self.hand_samples = 0
+
+    def pointer(self, t, x, y, from_hand=False, pressed=False):
+        self.ring.append(t, x, y, (FLAG_HAND if from_hand else 0) | (FLAG_PRESSED if pressed else 0))
+        self.features.add(t, x, y)
+        self.hand_samples += from_hand
+
+    def press(self, t, down):
+        self.features.press(t, down)
+
+    def drag_start(self, t):
+        self.features.drag(t, True)
+
+    def drop(self, t):
+        self.features.drag(t, False)
+
+    def swap(self, t, a, b):
+        self.features.swap(t)
+        self.solve_order.append((a, b))
+
+    def record(self, state):
+        """
+        The finished attempt. The trajectory ring is handed over as is and packed
+        by TelemetrySink's writer thread, so don't add samples after this.
+        """
+        return {
+            'session': self.session_id,
+            'attempt': self.attempt,
+            'started': self.started,
+            'duration': round(time.time() - self.started, 3),
+            'state': state,
+            'samples': len(self.ring),
+            'hand_ratio': round(self.hand_samples / len(self.ring), 3) if len(self.ring) else 0.0,
+            'features': self.features.summary(),
+            'solve_order': self.solve_order,
+            'trajectory': self.ring,
+        }
+
+
+class TelemetrySink:
+    """Batched, append-only writer on a background thread (JSON lines, or SQLite for .db paths)."""
+
+    def __init__(self, path, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_queue=MAX_QUEUE):
+        self.path = path
+        self.sqlite = os.path.splitext(path)[1].lower() in SQLITE_EXTENSIONS
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._stop = False
+
+        # Counters
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+        self._thread = threading.Thread(target=self._writer_loop, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """Never blocks: if the writer has fallen far behind, the oldest record is dropped."""
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(record)
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def close(self):
+        self._stop = True
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+
+    # --- WRITER THREAD ---
+    def _writer_loop(self):
+        # SQLite connections must stay on the thread that made them
+        out = self._open()
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                stopping = self._stop
+                while self._queue:
+                    batch = []
+                    while self._queue and len(batch) < self.batch_size:
+                        batch.append(self._queue.popleft())
+                    self._write(out, batch)
+                if stopping:
+                    break
+        finally:
+            out.close()
+
+    def _open(self):
+        if not self.sqlite:
+            return open(self.path, 'a', encoding='utf-8')
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("""CREATE TABLE IF NOT EXISTS telemetry (
+            session TEXT, attempt INTEGER, started REAL, duration REAL, state TEXT,
+            samples INTEGER, hand_ratio REAL, features TEXT, solve_order TEXT, trajectory BLOB)""")
+        return db
+
+    def _write(self, out, batch):
+        for r in batch:
+            if isinstance(r['trajectory'], TrajectoryRing):
+                r['trajectory'] = r['trajectory'].pack()
+        if self.sqlite:
+            out.executemany("INSERT INTO telemetry VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+                (r['session'], r['attempt'], r['started'], r['duration'], r['state'], r['samples'],
+                 r['hand_ratio'], json.dumps(r['features']), json.dumps(r['solve_order']), r['trajectory'])
+                for r in batch])
+            out.commit()
+        else:
+            out.write(''.join(json.dumps(dict(r, trajectory=base64.b64encode(r['trajectory']).decode('ascii')))
+                              + '\n' for r in batch))
+            out.flush()
+        self.written += len(batch)
+        self.batches += 1
+
+    def report(self):
+        return f"{self.path}: written={self.written} batches={self.batches} dropped={self.dropped} queued={len(self._queue)}"
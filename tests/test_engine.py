@@ -0,0 +1,57 @@
+import pytest
+
+from engine import PuzzleSession, SessionEngine
+from telemetry import TelemetrySink
+
+
+@pytest.mark.parametrize('grid_size', [[60000, 60000], [17, 2], [1, 1], 'x', [1, 2, 3], {'a': 1}])
+def test_create_rejects_bad_grid_sizes(grid_size):
+    reply = SessionEngine(pool_size=4).handle({'op': 'create', 'grid_size': grid_size})
+    assert 'error' in reply
+
+
+def test_create_rejects_tiles_smaller_than_a_pixel():
+    reply = SessionEngine(board_size=10, pool_size=4).handle({'op': 'create', 'grid_size': 16})
+    assert 'error' in reply
+    with pytest.raises(ValueError):
+        PuzzleSession(grid_size=16, board_size=10)
+
+
+def test_create_accepts_non_square_grids():
+    reply = SessionEngine(pool_size=4).handle({'op': 'create', 'grid_size': [6, 3]})
+    assert reply['grid'] == [6, 3] and reply['tile'] == [100, 200]
+
+
+def test_off_board_pointers_are_clamped_for_telemetry(tmp_path):
+    sink = TelemetrySink(str(tmp_path / 't.jsonl'))
+    engine = SessionEngine(pool_size=4, telemetry=sink)
+    sid = engine.handle({'op': 'create'})['session']
+    engine.handle({'op': 'start', 'session': sid})
+    for x, y in ((10 ** 9, -10 ** 9), (-40000, 40000)):
+        reply = engine.handle({'op': 'pointer', 'session': sid, 'x': x, 'y': y, 'event': 'down'})
+        assert reply == {'state': 'PLAYING', 'swapped': False}
+    engine.close(sid)
+    sink.close()
+    assert sink.written == 1
+
+
+def test_idle_sessions_expire_and_active_ones_survive():
+    engine = SessionEngine(pool_size=4, idle_timeout=10)
+    a, b = engine.create(), engine.create()
+    now = b.last_seen
+    for t in range(1, 30):
+        engine.sessions.get(a.session_id, now=now + t)     # What the server's frame op does
+    assert engine.reap(now + 25) == 1
+    assert a.session_id in engine.sessions and b.session_id not in engine.sessions
+
+
+def test_stall_compensation_is_capped():
+    session = PuzzleSession()
+    session.start(0)
+    assert session.compensate(10) == 10
+    assert session.compensate(10) == 5
+    assert session.compensate(10) == 0
+    session.tick(70)
+    assert session.state == 'PLAYING'
+    session.tick(75)
+    assert session.state == 'LOST'
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip('numpy')    # gestures.HitMap needs numpy; PinchDetector itself is pure Python
+
+from gestures import PinchDetector  # noqa: E402
+
+WRIST, KNUCKLE = (0, 0), (0, 100)   # Hand size 100 px
+THUMB = (0, 0)
+
+
+def feed(detector, gap, frames=1):
+    for _ in range(frames):
+        state = detector.update((gap, 0), THUMB, WRIST, KNUCKLE)
+    return state
+
+
+def test_engages_only_after_debounce():
+    d = PinchDetector(debounce=2)
+    assert not feed(d, 10)
+    assert feed(d, 10)
+    assert d.engaged == 1
+
+
+def test_hysteresis_holds_between_thresholds():
+    d = PinchDetector(engage=0.30, release=0.45, debounce=1)
+    assert not feed(d, 40, 5)          # 0.40: not enough to engage
+    assert feed(d, 20)
+    assert feed(d, 40, 5)              # 0.40: not enough to release
+    assert not feed(d, 50)
+
+
+def test_single_frame_flicker_is_suppressed():
+    d = PinchDetector(debounce=2)
+    feed(d, 10, 2)
+    feed(d, 80)
+    assert feed(d, 10)
+    assert d.released == 0 and d.suppressed == 1
+
+
+def test_pinch_survives_short_dropouts():
+    d = PinchDetector(debounce=1, lost_grace=3)
+    feed(d, 10)
+    assert all(d.lost() for _ in range(3))
+    assert not d.lost()
+
+
+def test_scale_invariant():
+    near, far = PinchDetector(debounce=1), PinchDetector(debounce=1)
+    near.update((20, 0), THUMB, WRIST, (0, 100))
+    far.update((50, 0), THUMB, WRIST, (0, 250))
+    assert near.pinching and far.pinching and near.ratio == far.ratio
+
+
+def test_release_below_engage_is_rejected():
+    with pytest.raises(ValueError):
+        PinchDetector(engage=0.5, release=0.4)
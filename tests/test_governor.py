@@ -0,0 +1,47 @@
+from governor import COOLDOWN, HAND_BUDGET_MS, MIN_SAMPLES, TIERS, UP_AFTER, QualityGovernor
+from profiler import StageProfiler
+
+FPS = 60
+
+
+def run(gov, prof, start, frames, hands_ms, work_s=0.002):
+    """Feeds `frames` frames at 60 FPS, each with one hand inference; returns (tiers switched to, end time)."""
+    switched = []
+    for i in range(frames):
+        now = start + i / FPS
+        prof.stop('hands', prof.start() - hands_ms / 1000)
+        tier = gov.update(now, work_s, FPS)
+        if tier:
+            switched.append(tier['name'])
+    return switched, start + frames / FPS
+
+
+def test_one_slow_spell_steps_down_once():
+    prof = StageProfiler()
+    gov = QualityGovernor(profiler=prof)
+    switched, t = run(gov, prof, 0, MIN_SAMPLES, HAND_BUDGET_MS * 2)
+    assert switched == ['MEDIUM']
+    # Inference is fast again; the slow samples still in the profiler's window must not count
+    switched, _ = run(gov, prof, t, int(COOLDOWN * 2 * FPS), 5.0)
+    assert switched == [] and gov.tier['name'] == 'MEDIUM'
+
+
+def test_steps_back_up_after_headroom():
+    prof = StageProfiler()
+    gov = QualityGovernor(profiler=prof)
+    _, t = run(gov, prof, 0, MIN_SAMPLES, HAND_BUDGET_MS * 2)
+    switched, _ = run(gov, prof, t, int((UP_AFTER + 3) * FPS), 5.0)
+    assert switched == ['HIGH']
+
+
+def test_sustained_load_walks_down_every_tier():
+    prof = StageProfiler()
+    gov = QualityGovernor(profiler=prof)
+    switched, _ = run(gov, prof, 0, int(COOLDOWN * 6 * FPS), HAND_BUDGET_MS * 2)
+    assert switched == [t['name'] for t in TIERS[1:]]
+
+
+def test_manual_tier_never_switches():
+    prof = StageProfiler()
+    gov = QualityGovernor(tier=2, auto=False, profiler=prof)
+    assert run(gov, prof, 0, 5 * FPS, HAND_BUDGET_MS * 2)[0] == []
@@ -0,0 +1,46 @@
+import pytest
+
+from grid import MAX_SIDE, PuzzleGrid
+
+
+def test_new_grid_is_solved():
+    grid = PuzzleGrid(4)
+    assert grid.solved and grid.in_place == 16 and grid.tolist() == list(range(16))
+
+
+def test_swap_tracks_in_place_count():
+    grid = PuzzleGrid(3, 2)
+    grid.swap(0, 1)
+    assert grid.in_place == 4 and not grid.solved
+    grid.swap(0, 1)
+    assert grid.solved
+
+
+def test_set_order_recounts_and_checks_length():
+    grid = PuzzleGrid(2)
+    grid.set_order([1, 0, 2, 3])
+    assert grid.in_place == 2
+    with pytest.raises(ValueError):
+        grid.set_order([0, 1, 2])
+
+
+def test_version_changes_with_every_permutation_change():
+    grid = PuzzleGrid(2)
+    seen = {grid.version}
+    grid.swap(0, 3)
+    seen.add(grid.version)
+    grid.swap(1, 1)     # No-op swap keeps the version
+    seen.add(grid.version)
+    grid.reset()
+    seen.add(grid.version)
+    assert len(seen) == 3
+
+
+@pytest.mark.parametrize('size', [(1, 1), (2, 0), (MAX_SIDE + 1, 2), (2, MAX_SIDE + 1), (60000, 60000)])
+def test_rejects_sizes_out_of_range(size):
+    with pytest.raises(ValueError):
+        PuzzleGrid(*size)
+
+
+def test_accepts_the_largest_grid():
+    assert len(PuzzleGrid(MAX_SIDE, MAX_SIDE)) == MAX_SIDE * MAX_SIDE
@@ -0,0 +1,99 @@
+import multiprocessing
+import threading
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from hand_service import HandInferenceService, PipeHandClient, serve_client  # noqa: E402
+
+
+class FakeHands:
+    """Reports one hand whose landmarks all sit at (mean pixel value / 255, 0, 0)."""
+
+    def process(self, frame):
+        from hand_service import HandResults
+        v = float(frame.mean()) / 255
+        return HandResults([[(v, 0.0, 0.0)] * 21])
+
+
+def fake_hands():
+    return FakeHands()
+
+
+def connect(service, session):
+    ours, theirs = multiprocessing.Pipe()
+    threading.Thread(target=serve_client, args=(service.client(session), ours), daemon=True).start()
+    return PipeHandClient(theirs, timeout=5.0)
+
+
+@pytest.mark.parametrize('backend', ['thread', 'process'])
+def test_two_sessions_share_one_model(backend):
+    service = HandInferenceService(workers=1, backend=backend, model_factory=fake_hands).start()
+    try:
+        clients = [connect(service, f"station-{i}") for i in range(2)]
+        for step in range(5):
+            for i, client in enumerate(clients):
+                value = 40 * (i + 1) + step
+                results = client.process(np.full((32, 32, 3), value, dtype=np.uint8))
+                assert results.multi_hand_landmarks[0].landmark[8].x == pytest.approx(value / 255)
+        for client in clients:
+            client.close()
+        assert service.stats()['completed'] == 10
+    finally:
+        service.stop()
+
+
+def test_late_answer_is_not_taken_for_the_next_frame():
+    gate = threading.Event()
+
+    class SlowHands(FakeHands):
+        def process(self, frame):
+            gate.wait()
+            return super().process(frame)
+
+    service = HandInferenceService(model_factory=SlowHands).start()
+    try:
+        client = connect(service, 'slow')
+        client.timeout = 0.05
+        assert client.process(np.full((8, 8, 3), 10, dtype=np.uint8)) is None   # Times out
+        gate.set()
+        client.timeout = 5.0
+        results = client.process(np.full((8, 8, 3), 200, dtype=np.uint8))
+        assert results.multi_hand_landmarks[0].landmark[0].x == pytest.approx(200 / 255)
+        client.close()
+    finally:
+        service.stop()
+
+
+def test_newer_frame_replaces_queued_one_and_priority_goes_first():
+    gate = threading.Event()
+
+    class BlockedHands(FakeHands):
+        def process(self, frame):
+            gate.wait()
+            return super().process(frame)
+
+    service = HandInferenceService(model_factory=BlockedHands, batch_size=1).start()
+    try:
+        busy = service.submit('busy', np.zeros((4, 4, 3), dtype=np.uint8))     # Occupies the worker
+        while service.stats()['pending']:
+            pass
+        old = service.submit('a', np.zeros((4, 4, 3), dtype=np.uint8))
+        new = service.submit('a', np.ones((4, 4, 3), dtype=np.uint8))
+        urgent = service.submit('b', np.ones((4, 4, 3), dtype=np.uint8), priority=5)
+        assert old.result(1) is None and service.replaced == 1
+        done = []
+        urgent.add_done_callback(lambda f: done.append('b'))
+        new.add_done_callback(lambda f: done.append('a'))
+        gate.set()
+        assert busy.result(1) and new.result(1) and urgent.result(1)
+        assert done == ['b', 'a']
+    finally:
+        service.stop()
+
+
+def test_client_survives_the_service_going_away():
+    ours, theirs = multiprocessing.Pipe()
+    ours.close()
+    assert PipeHandClient(theirs, timeout=0.1).process(np.zeros((4, 4, 3), dtype=np.uint8)) is None
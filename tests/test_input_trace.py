@@ -0,0 +1,78 @@
+from engine import PuzzleSession
+from input_trace import COMPENSATE, END, FRAME, HAND, POINTER, PTR_HAND, PTR_START, START, SWAP, TraceRecorder, load_trace
+from replay import replay
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'run.jtr')
+    session = PuzzleSession(grid_size=(3, 2), board_size=(300, 200), time_limit=45)
+    rec = TraceRecorder(path, session)
+    t0 = rec._t0
+    rec.start([5, 4, 3, 2, 1, 0], t=t0 + 1)
+    rec.hand((12, 34), True, t=t0 + 1.5)
+    rec.pointer((50, 60), True, False, True, True, t=t0 + 2)
+    rec.swap(4, 1, t=t0 + 2.5)
+    rec.compensate(1.234567, t=t0 + 3)
+    rec.frame(70000, t=t0 + 4)
+    rec.close('WON')
+
+    header, records = load_trace(path)
+    assert header == {'cols': 3, 'rows': 2, 'board': (300, 200), 'time_limit': 45}
+    kinds = [r[0] for r in records]
+    assert kinds == [START, HAND, POINTER, SWAP, COMPENSATE, FRAME, END]
+    start, _, pointer, swap, comp = records[:5]
+    assert list(start[5]) == [5, 4, 3, 2, 1, 0] and start[1] == 1
+    assert pointer[2:5] == (50, 60, PTR_START | 4 | PTR_HAND)
+    assert swap[2:4] == (4, 1)
+    assert (comp[2] * 1000 + comp[3]) / 1e6 == 1.234567
+
+
+def solve(session, rec, t):
+    """Drags every misplaced tile home, recording the pointer input and swaps."""
+    tw, th = session.tile_w, session.tile_h
+    while not session.grid.solved:
+        home = next(p for p in range(session.grid.size) if session.grid[p] != p)
+        src = session.grid.order.index(home)
+        for pos, down in ((src, True), (home, False)):
+            xy = ((pos % session.grid.cols) * tw + 1, (pos // session.grid.cols) * th + 1)
+            rec.pointer(xy, down, not down, down, False, t=t)
+            session.handle_pointer(xy, down, not down)
+        rec.swap(session.grid.in_place, session.swaps, t=t)
+        session.tick(t)
+        rec.frame(0, t=t)
+
+
+def test_replay_reproduces_a_solve(tmp_path):
+    path = str(tmp_path / 'solve.jtr')
+    session = PuzzleSession(grid_size=(3, 2), board_size=(300, 200))
+    rec = TraceRecorder(path, session)
+    t0 = rec._t0
+    session.start(now=t0)
+    rec.start(session.current_order, t=t0)
+    solve(session, rec, t0 + 5)
+    rec.close(session.state)
+
+    result = replay(path)
+    assert result['state'] == 'WON' and result['match'] and result['swaps'] == session.swaps
+
+
+def test_replay_applies_stall_compensation(tmp_path):
+    # Solved 70 s into a 60 s attempt, thanks to 12 s of stall credit
+    path = str(tmp_path / 'stall.jtr')
+    session = PuzzleSession(grid_size=2, board_size=100, time_limit=60)
+    rec = TraceRecorder(path, session)
+    t0 = rec._t0
+    session.start(now=t0)
+    rec.start(session.current_order, t=t0)
+    for i in range(12):
+        session.compensate(1.0)
+        rec.compensate(session.compensated, t=t0 + i)
+    for i in range(0, 70, 5):
+        session.tick(t0 + i)
+        rec.frame(i, t=t0 + i)
+    solve(session, rec, t0 + 70)
+    rec.close(session.state)
+    assert session.state == 'WON'
+
+    result = replay(path)
+    assert result['state'] == 'WON' and result['match']
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+pytest.importorskip('cv2')
+
+from frame_path import FramePath  # noqa: E402
+from frame_source import SyntheticSource  # noqa: E402
+from liveness import MIN_LANDMARKS, LivenessScorer  # noqa: E402
+
+
+def feed_clip(scorer, frames=64, landmarks=False):
+    """A looping 16-frame synthetic clip, optionally with a trembling index tip."""
+    source, path = SyntheticSource(640, 480, variants=16), FramePath(300)
+    rng = random.Random(0)
+    for _ in range(frames):
+        scorer.add_frame(path.prepare(source.read()[1]))
+        if landmarks:
+            scorer.add_landmark((150 + rng.uniform(-3, 3), 150 + rng.uniform(-3, 3)))
+    return scorer.result()
+
+
+def test_looped_clip_without_landmarks_is_not_live():
+    result = feed_clip(LivenessScorer(4))
+    assert result['signals']['jitter'] == 0.0
+    assert not result['live']
+
+
+def test_moving_scene_with_hand_jitter_is_live():
+    scorer = LivenessScorer(4)
+    result = feed_clip(scorer, landmarks=True)
+    assert scorer.landmarks >= MIN_LANDMARKS
+    assert result['signals']['jitter'] > 0.8 and result['live']
+
+
+def test_reset_forgets_landmarks():
+    scorer = LivenessScorer(4)
+    feed_clip(scorer, frames=20, landmarks=True)
+    scorer.reset()
+    assert not feed_clip(scorer)['live']
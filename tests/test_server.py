@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import pytest
+
+from engine import SessionEngine
+from server import MAX_BODY, CaptchaServer
+
+
+def exchange(payloads, read_lines=True):
+    """Sends raw byte strings to a fresh server and returns everything it wrote back."""
+    async def run():
+        server = CaptchaServer(SessionEngine(pool_size=4))
+        listener = await asyncio.start_server(server.handle_client, '127.0.0.1', 0, limit=MAX_BODY)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for p in payloads:
+            writer.write(p)
+        await writer.drain()
+        writer.write_eof()
+        out = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return out
+    return asyncio.run(run())
+
+
+def http(body, length=None, extra=b''):
+    length = str(len(body)).encode() if length is None else length
+    return b'POST /rpc HTTP/1.1\r\nContent-Length: ' + length + b'\r\n' + extra + b'\r\n' + body
+
+
+@pytest.mark.parametrize('raw', [b'[]', b'"x"', b'3', b'null'])
+def test_non_object_json_lines_get_an_error_and_keep_the_connection(raw):
+    lines = exchange([raw + b'\n', b'{"op": "create"}\n']).splitlines()
+    assert 'error' in json.loads(lines[0])
+    assert 'session' in json.loads(lines[1])
+
+
+def test_http_round_trip_with_keep_alive():
+    out = exchange([http(b'{"op": "create"}'), http(b'[]', extra=b'Connection: close\r\n')])
+    assert out.count(b'200 OK') == 2 and b'expected a JSON object' in out
+
+
+@pytest.mark.parametrize('length', [b'abc', b'-5'])
+def test_bad_content_length_is_a_400(length):
+    out = exchange([http(b'{}', length=length)])
+    assert out.startswith(b'HTTP/1.1 400 ') and b'Content-Length' in out
+
+
+def test_oversized_body_is_a_413_without_reading_it():
+    out = exchange([http(b'', length=str(MAX_BODY + 1).encode())])
+    assert out.startswith(b'HTTP/1.1 413 ')
+
+
+def test_overlong_json_line_closes_quietly():
+    assert exchange([b'{"op": "' + b'x' * (MAX_BODY + 10) + b'"}\n']) == b''
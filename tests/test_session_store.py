@@ -0,0 +1,64 @@
+from engine import PuzzleSession
+from session_store import SessionStore, session_size
+
+T = 1000.0
+
+
+def store_with(n, ttl=10, budget=None):
+    store = SessionStore(ttl=ttl, memory_budget=budget)
+    sessions = [store.add(PuzzleSession(f's{i}', grid_size=2), now=T) for i in range(n)]
+    return store, sessions
+
+
+def test_get_moves_to_back_and_stamps_last_seen():
+    store, _ = store_with(3)
+    assert store.get('s0', now=T + 5).last_seen == T + 5
+    assert list(store) == ['s1', 's2', 's0']
+    assert store.get('missing') is None
+
+
+def test_peek_leaves_lru_order_alone():
+    store, _ = store_with(3)
+    store.peek('s0')
+    assert list(store) == ['s0', 's1', 's2']
+
+
+def test_expire_pops_only_idle_sessions():
+    store, _ = store_with(3)
+    store.get('s1', now=T + 8)
+    expired = store.expire(T + 12)
+    assert [sid for sid, _ in expired] == ['s0', 's2']
+    assert list(store) == ['s1'] and store.expired == 2
+
+
+def test_active_session_behind_idle_ones_is_kept():
+    # A session kept alive only through get() (e.g. frame uploads) must not expire
+    store, _ = store_with(2)
+    for t in range(1, 30):
+        store.get('s1', now=T + t)
+    assert [sid for sid, _ in store.expire(T + 30)] == ['s0']
+    assert 's1' in store
+
+
+def test_budget_evicts_lru_idle_sessions_first():
+    size = session_size(PuzzleSession(grid_size=2))
+    evicted = []
+    store = SessionStore(memory_budget=size * 3, on_evict=lambda sid, s: evicted.append(sid))
+    playing = store.add(PuzzleSession('p', grid_size=2))
+    playing.start()
+    for i in range(4):
+        store.add(PuzzleSession(f's{i}', grid_size=2))
+    assert evicted == ['s0', 's1'] and 'p' in store
+    assert store.evicted == 2 and store.evicted_playing == 0
+
+
+def test_charge_counts_against_budget_and_pop_refunds():
+    size = session_size(PuzzleSession(grid_size=2))
+    store = SessionStore(memory_budget=size * 2 + 100)
+    store.add(PuzzleSession('a', grid_size=2))
+    store.add(PuzzleSession('b', grid_size=2))
+    assert not store.charge('missing', 10)
+    assert store.charge('b', 1000)              # Keeps b, evicts a
+    assert list(store) == ['b']
+    store.pop('b')
+    assert store.bytes == 0
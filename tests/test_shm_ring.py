@@ -0,0 +1,48 @@
+import pytest
+
+from shm_ring import RingReader, ShmRing
+
+
+@pytest.fixture
+def ring():
+    ring = ShmRing.create(slots=4, slot_size=16)
+    yield ring
+    ring.close()
+
+
+def test_write_then_read_in_order(ring):
+    reader = RingReader(ring)
+    for i in range(3):
+        ring.write(bytes([i]) * 4)
+    assert reader.poll() == [b'\x00' * 4, b'\x01' * 4, b'\x02' * 4]
+    assert reader.poll() == [] and reader.missed == 0
+
+
+def test_overwritten_records_are_counted_not_returned(ring):
+    reader = RingReader(ring)
+    for i in range(10):
+        ring.write(bytes([i]))
+    assert reader.poll() == [bytes([i]) for i in range(6, 10)]
+    assert reader.missed == 6
+
+
+def test_lapped_slot_reads_as_missing(ring):
+    ring.write(b'old')
+    for _ in range(4):
+        ring.write(b'new')
+    assert ring.read(0) is None
+    assert ring.latest() == (4, b'new')
+
+
+def test_payload_larger_than_slot_is_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.write(b'x' * 17)
+
+
+def test_attached_ring_sees_writes(ring):
+    other = ShmRing.attach(ring.name)
+    try:
+        ring.write(b'hello')
+        assert other.latest() == (0, b'hello')
+    finally:
+        other.close()
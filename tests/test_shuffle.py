@@ -0,0 +1,47 @@
+import threading
+
+from shuffle import PermutationGenerator, ShufflePool, min_swap_distance, shuffle_pool, shuffler
+
+
+def test_min_swap_distance_counts_cycles():
+    assert min_swap_distance([0, 1, 2, 3]) == 0
+    assert min_swap_distance([1, 0, 2, 3]) == 1
+    assert min_swap_distance([1, 2, 3, 0]) == 3           # One 4-cycle
+    assert min_swap_distance([1, 0, 3, 2]) == 2           # Two 2-cycles
+
+
+def test_generated_boards_respect_distance_and_misplaced_floor():
+    gen = PermutationGenerator(16, seed='bounds')
+    for _ in range(200):
+        order = gen.generate()
+        assert sorted(order) == list(range(16))
+        assert gen.min_distance <= min_swap_distance(order) <= gen.max_distance
+        assert sum(pos == tile for pos, tile in enumerate(order)) <= gen.max_fixed
+
+
+def test_seeded_generators_are_deterministic():
+    a = PermutationGenerator(25, seed=7).generate_batch(20)
+    b = PermutationGenerator(25, seed=7).generate_batch(20)
+    c = PermutationGenerator(25, seed=8).generate_batch(20)
+    assert a == b
+    assert a != c
+
+
+def test_pool_serves_boards_without_background_thread():
+    pool = ShufflePool(PermutationGenerator(9, seed=1), size=4, low_water=1, background=False)
+    boards = [pool.take() for _ in range(6)]
+    assert pool.misses == 2 and all(sorted(b) == list(range(9)) for b in boards)
+
+
+def test_unconfigured_sizes_get_a_plain_generator():
+    before = threading.active_count()
+    source = shuffler(7 * 3)
+    assert isinstance(source, PermutationGenerator)
+    assert shuffler(7 * 3) is source
+    assert sorted(source.take()) == list(range(21))
+    assert threading.active_count() == before
+
+
+def test_configured_sizes_get_their_pool():
+    pool = shuffle_pool(5 * 5, size=8)
+    assert shuffler(5 * 5) is pool
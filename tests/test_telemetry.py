@@ -0,0 +1,13 @@
+from array import array
+
+from telemetry import TrajectoryRing
+
+
+def test_trajectory_ring_packs_oldest_first_after_wrap():
+    ring = TrajectoryRing(capacity=3)
+    for i in range(5):
+        ring.append(10.0 + i, i, -i, i % 2)
+    packed = ring.pack()
+    assert len(packed) == 3 * (4 + 2 + 2 + 1) and ring.overwritten == 2
+    assert array('f', packed[:12]).tolist() == [0.0, 1.0, 2.0]
+    assert array('h', packed[12:18]).tolist() == [2, 3, 4]
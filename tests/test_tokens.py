@@ -0,0 +1,70 @@
+import pytest
+
+from engine import PuzzleSession
+from tokens import ReplayCache, ResultTokens, b64decode, b64encode
+
+KEY = b'k' * 32
+NOW = 1_700_000_000
+
+
+def won_session():
+    session = PuzzleSession(grid_size=(5, 3))
+    session.start(NOW)
+    session.state = 'WON'
+    session.elapsed_time = 12.345
+    session.swaps = 9
+    session.liveness = {'score': 0.8, 'live': True}
+    return session
+
+
+def test_issue_and_verify_round_trip():
+    tokens = ResultTokens(KEY)
+    session = won_session()
+    claims = tokens.verify(tokens.issue(session, NOW), now=NOW + 1)
+    assert claims['valid']
+    assert claims['session'] == session.session_id
+    assert claims['grid'] == [5, 3]
+    assert claims['solve_time'] == 12.345 and claims['swaps'] == 9
+    assert claims['liveness'] == {'score': 0.8, 'live': True}
+
+
+def test_token_is_single_use():
+    tokens = ResultTokens(KEY)
+    token = tokens.issue(won_session(), NOW)
+    assert tokens.verify(token, now=NOW, consume=False)['valid']
+    assert tokens.verify(token, now=NOW)['valid']
+    assert tokens.verify(token, now=NOW) == {'valid': False, 'error': 'replayed'}
+
+
+def test_expired_token_is_rejected():
+    tokens = ResultTokens(KEY, ttl=60)
+    token = tokens.issue(won_session(), NOW)
+    assert tokens.verify(token, now=NOW + 60)['error'] == 'expired'
+
+
+def test_forged_claims_and_foreign_keys_are_rejected():
+    tokens = ResultTokens(KEY)
+    body, mac = tokens.issue(won_session(), NOW).split('.')
+    raw = bytearray(b64decode(body))
+    raw[-1] ^= 1                                    # Tamper with the session id
+    assert tokens.verify(b64encode(bytes(raw)) + '.' + mac, now=NOW)['error'] == 'bad signature'
+    other = ResultTokens(b'o' * 32).issue(won_session(), NOW)
+    assert tokens.verify(other, now=NOW)['error'] == 'unknown key'
+
+
+@pytest.mark.parametrize('token', [None, '', 'abc', 'abc.def', '!!!.???'])
+def test_malformed_tokens_are_rejected(token):
+    assert ResultTokens(KEY).verify(token, now=NOW)['error'] == 'malformed'
+
+
+def test_rotated_keys_still_verify():
+    old = ResultTokens(b'old' * 8)
+    token = old.issue(won_session(), NOW)
+    assert ResultTokens([b'new' * 8, b'old' * 8]).verify(token, now=NOW)['valid']
+
+
+def test_replay_cache_prunes_expired_nonces():
+    cache = ReplayCache()
+    assert cache.add(b'a', NOW + 10, NOW) and cache.add(b'b', NOW + 20, NOW)
+    assert not cache.add(b'a', NOW + 10, NOW)
+    assert cache.prune(NOW + 15) == 1 and len(cache) == 1
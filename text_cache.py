@@ -0,0 +1,72 @@
+from collections import OrderedDict
+
+DIGIT_GLYPHS = "0123456789:"
+
+
+class TextCache:
+    """LRU cache of rendered text Surfaces keyed by (font, text, color)."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Drop-in for font.render(text, antialias, color)."""
+        key = (font, text, tuple(color), antialias)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def report(self):
+        s = self.stats()
+        return (f"entries={s['entries']} hits={s['hits']} misses={s['misses']} "
+                f"evictions={s['evictions']} hit_rate={s['hit_rate']:.1%}")
+
+
+class DigitAtlas:
+    """
+    Pre-rendered digit/colon glyphs for one font, so a countdown like "00:59"
+    is composed from cached Surfaces instead of calling font.render each tick.
+    Every glyph is centred in a cell as wide as the widest one, so the text
+    never shifts or changes width even when SysFont falls back to a
+    proportional font (e.g. no Consolas on Linux).
+    """
+
+    def __init__(self, font, colors, antialias=True):
+        self.glyphs = {(tuple(color), ch): font.render(ch, antialias, color)
+                       for color in colors for ch in DIGIT_GLYPHS}
+        self.advance = max(g.get_width() for g in self.glyphs.values())
+        self.hits = 0
+
+    def draw(self, surface, text, color, pos):
+        """Blits `text` at `pos` from the pre-rendered glyphs, one fixed-width cell per character."""
+        color = tuple(color)
+        x, y = pos
+        for ch in text:
+            glyph = self.glyphs[(color, ch)]
+            surface.blit(glyph, (x + (self.advance - glyph.get_width()) // 2, y))
+            x += self.advance
+        self.hits += len(text)
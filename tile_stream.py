@@ -0,0 +1,483 @@
+"""
+Encoded tile streaming for remote / browser viewers.
+
+A raw 600x600 RGB board is ~1 MB per frame. Instead of shipping boards, the
+stream sends the three things a client needs to draw the board itself:
+
+  * LAYOUT - grid geometry, codec and the full permutation (order[pos] = tile);
+  * ORDER  - permutation deltas: (pos, tile) pairs for the positions that
+    changed. A swap is 11 bytes and re-encodes nothing, because a tile's
+    picture doesn't depend on where it currently sits;
+  * TILES  - JPEG or WebP images of only the tiles whose content changed
+    since they were last sent (compared on a small grayscale thumbnail).
+
+Wire format: every message is a little-endian u32 length followed by the
+message; the first byte is the message type.
+
+    LAYOUT  <B B B H H B>  type=1, cols, rows, tile_w, tile_h, codec  + u16 order[cols*rows]
+    ORDER   <B H>          type=2, count                              + count x <H H> (pos, tile)
+    TILES   <B I B H>      type=3, seq, quality, count                + count x (<H I> tile, length + image)
+
+Clients draw tile order[pos] at pos. A new client is only added to the
+broadcast at the next LAYOUT, so its stream always starts with one; a
+keyframe (LAYOUT + every tile) is sent whenever a client connects.
+
+Encoding runs on its own thread and only ever works on the newest frame,
+copied by submit() into a buffer the streamer owns (the caller's frame
+buffers are recycled by the capture path).
+Message buffers come from a reusable pool and are returned once every client
+has sent them. Quality (and, if that isn't enough, the change threshold and
+frame rate) adapts to the encoder's CPU time and to how far the slowest
+client's socket is falling behind.
+
+    stream = StreamServer(port=8766).start()
+    streamer = TileStreamer(600, 4, stream).start()
+    streamer.submit(frame_rgb, session.current_order)    # from the game loop, never blocks
+"""
+import socket
+import struct
+import threading
+import time
+from array import array
+from collections import deque
+
+import cv2
+import numpy as np
+
+from engine import as_pair
+from grid import check_size
+
+# --- DEFAULTS ---
+STREAM_PORT = 8766
+DEFAULT_QUALITY = 70
+MIN_QUALITY = 30
+MAX_QUALITY = 90
+QUALITY_DOWN = 10           # Multiplicative-ish decrease when over budget...
+QUALITY_UP = 2              # ...additive increase when comfortably under it
+CPU_BUDGET_MS = 8.0         # Encoder time per frame we're willing to spend
+BACKLOG_BUDGET = 256 * 1024  # Bytes queued for the slowest client before we back off
+CHANGE_THRESHOLD = 3.0      # Mean gray-level change per thumbnail pixel that makes a tile "changed"
+MAX_CHANGE_THRESHOLD = 24.0
+THUMB_PER_TILE = 8          # Thumbnail pixels per tile side used for change detection
+POOL_BUFFERS = 16
+CLIENT_TIMEOUT = 2.0        # Seconds to read a client's request headers
+
+CODECS = {'jpeg': (1, '.jpg', cv2.IMWRITE_JPEG_QUALITY), 'webp': (2, '.webp', cv2.IMWRITE_WEBP_QUALITY)}
+
+# --- MESSAGES ---
+MSG_LAYOUT = 1
+MSG_ORDER = 2
+MSG_TILES = 3
+LENGTH = struct.Struct('<I')
+LAYOUT = struct.Struct('<BBBHHB')
+ORDER = struct.Struct('<BH')
+TILES = struct.Struct('<BIBH')
+TILE = struct.Struct('<HI')
+PAIR = struct.Struct('<HH')
+
+
+class Packet:
+    """A length-prefixed message in a pooled buffer, returned to the pool after its last send."""
+    __slots__ = ('pool', 'buf', 'size', 'refs', '_lock')
+
+    def __init__(self, pool, buf):
+        self.pool = pool
+        self.buf = buf
+        self.size = 0
+        self.refs = 0
+        self._lock = threading.Lock()
+
+    def view(self):
+        return memoryview(self.buf)[:self.size]
+
+    def release(self):
+        with self._lock:
+            self.refs -= 1
+            last = self.refs <= 0
+        if last: self.pool.give_back(self)
+
+
+class BufferPool:
+    """Fixed set of reusable message buffers. Buffers grow to fit and keep their size."""
+
+    def __init__(self, count=POOL_BUFFERS, size=64 * 1024):
+        self._free = deque(Packet(self, bytearray(size)) for _ in range(count))
+        self._lock = threading.Lock()
+        self.misses = 0     # Times the pool was empty (a one-off buffer was allocated)
+
+    def take(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.misses += 1
+        return Packet(self, bytearray(64 * 1024))
+
+    def give_back(self, packet):
+        with self._lock:
+            self._free.append(packet)
+
+    def pack(self, parts):
+        """Concatenates `parts` behind a length prefix into a pooled buffer."""
+        packet = self.take()
+        total = LENGTH.size + sum(len(p) for p in parts)
+        if len(packet.buf) < total:
+            packet.buf.extend(bytes(total - len(packet.buf)))
+        view = memoryview(packet.buf)
+        LENGTH.pack_into(view, 0, total - LENGTH.size)
+        off = LENGTH.size
+        for p in parts:
+            n = len(p)
+            view[off:off + n] = p
+            off += n
+        packet.size = total
+        return packet
+
+
+class QualityController:
+    """AIMD on encoder CPU time and client backlog: quality first, then change threshold, then frames."""
+
+    def __init__(self, quality=DEFAULT_QUALITY, cpu_budget_ms=CPU_BUDGET_MS, backlog_budget=BACKLOG_BUDGET):
+        self.quality = quality
+        self.threshold = CHANGE_THRESHOLD
+        self.cpu_budget_ms = cpu_budget_ms
+        self.backlog_budget = backlog_budget
+        self.encode_ms = 0.0    # EWMA of encoder time per frame
+        self.skipped = 0
+
+    def skip(self, backlog):
+        """True if the slowest client is so far behind that this frame shouldn't be encoded at all."""
+        if backlog > 2 * self.backlog_budget:
+            self.skipped += 1
+            return True
+        return False
+
+    def update(self, encode_ms, backlog):
+        self.encode_ms += 0.1 * (encode_ms - self.encode_ms)
+        if self.encode_ms > self.cpu_budget_ms or backlog > self.backlog_budget:
+            if self.quality > MIN_QUALITY:
+                self.quality = max(MIN_QUALITY, self.quality - QUALITY_DOWN)
+            else:
+                self.threshold = min(MAX_CHANGE_THRESHOLD, self.threshold * 1.5)
+        elif self.encode_ms < 0.7 * self.cpu_budget_ms and backlog < self.backlog_budget // 4:
+            if self.threshold > CHANGE_THRESHOLD:
+                self.threshold = max(CHANGE_THRESHOLD, self.threshold / 1.5)
+            else:
+                self.quality = min(MAX_QUALITY, self.quality + QUALITY_UP)
+
+
+class TileStreamer:
+    def __init__(self, board_size, grid_size, server, codec='jpeg', pool=None, controller=None):
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {sorted(CODECS)}")
+        self.codec_id, self.ext, self.quality_flag = CODECS[codec]
+        self.w, self.h = as_pair(board_size)
+        self.cols, self.rows = as_pair(grid_size)
+        check_size(self.cols, self.rows)     # LAYOUT stores cols / rows in one byte
+        self.tw, self.th = self.w // self.cols, self.h // self.rows
+        self.n = self.cols * self.rows
+        self.server = server
+        self.pool = pool or BufferPool()
+        self.control = controller or QualityController()
+
+        # Change detection on a THUMB_PER_TILE^2 grayscale patch per tile
+        k = THUMB_PER_TILE
+        self._small = np.empty((self.rows * k, self.cols * k, 3), dtype=np.uint8)
+        self._gray = np.empty((self.rows * k, self.cols * k), dtype=np.uint8)
+        self._sent = np.zeros((self.rows * k, self.cols * k), dtype=np.int16)  # As last sent
+        self._diff = np.empty((self.rows * k, self.cols * k), dtype=np.int16)
+        self._tile_bgr = np.empty((self.th, self.tw, 3), dtype=np.uint8)
+
+        self._order = None          # Permutation as last sent
+        self._keyframe = True
+        self._seq = 0
+
+        # Double-buffered hand-over: submit() copies into _pending, the encoder swaps it with _working
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = None
+        self._working = None
+        self._fresh = False         # _pending holds a frame the encoder hasn't taken yet
+        self._pending_order = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._encode_loop, name="tile-stream", daemon=True)
+        server.on_connect = self.force_keyframe
+
+        # Counters
+        self.frames = 0
+        self.tiles_sent = 0
+        self.tile_bytes = 0
+        self.order_messages = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def force_keyframe(self):
+        self._keyframe = True
+
+    def submit(self, frame_rgb, order):
+        """
+        Game-loop side: hands over the newest frame (or None) and the current order.
+        The frame is copied (one memcpy), so the caller may reuse its buffer at once.
+        """
+        with self._lock:
+            if frame_rgb is not None:
+                if self._pending is None or self._pending.shape != frame_rgb.shape:
+                    self._pending = np.empty_like(frame_rgb)
+                np.copyto(self._pending, frame_rgb)
+                self._fresh = True
+            self._pending_order = array('H', order)
+        self._wake.set()
+
+    def _take(self):
+        """Encoder side: (frame or None, order or None) submitted since the last call."""
+        with self._lock:
+            order, self._pending_order = self._pending_order, None
+            if not self._fresh:
+                return None, order
+            self._pending, self._working = self._working, self._pending
+            self._fresh = False
+            return self._working, order
+
+    # --- ENCODER THREAD ---
+    def _encode_loop(self):
+        while not self._stop.is_set():
+            if not self._wake.wait(0.1):
+                continue
+            self._wake.clear()
+            frame_rgb, order = self._take()
+            if order is None or not self.server.has_viewers():
+                continue
+            for packet in self.encode(frame_rgb, order, self.server.backlog()):
+                self.server.publish(packet)
+
+    def encode(self, frame_rgb, order, backlog=0):
+        """Messages bringing clients up to date with `order` and `frame_rgb` (None: order only)."""
+        out = []
+        keyframe, self._keyframe = self._keyframe, False
+        if keyframe or self._order is None:
+            out.append(self._layout(order))
+        elif order != self._order:
+            out.append(self._order_delta(order))
+        self._order = order
+
+        if frame_rgb is None or (not keyframe and self.control.skip(backlog)):
+            if keyframe: self._keyframe = True   # Owe the tiles; send them with the next frame
+            return out
+        t0 = time.perf_counter()
+        tiles = self._changed_tiles(frame_rgb, keyframe)
+        if len(tiles):
+            out.append(self._encode_tiles(frame_rgb, tiles))
+        self.control.update((time.perf_counter() - t0) * 1000, backlog)
+        self.frames += 1
+        return out
+
+    def _layout(self, order):
+        head = LAYOUT.pack(MSG_LAYOUT, self.cols, self.rows, self.tw, self.th, self.codec_id)
+        return self.pool.pack([head, order.tobytes()])
+
+    def _order_delta(self, order):
+        old = self._order
+        changed = [i for i in range(self.n) if order[i] != old[i]]
+        # A full reshuffle is smaller as a LAYOUT than as (pos, tile) pairs
+        if 2 * len(changed) > self.n:
+            return self._layout(order)
+        self.order_messages += 1
+        return self.pool.pack([ORDER.pack(MSG_ORDER, len(changed))] + [PAIR.pack(i, order[i]) for i in changed])
+
+    def _changed_tiles(self, frame_rgb, keyframe):
+        """Tile ids whose thumbnail moved more than the threshold since it was last sent."""
+        k = THUMB_PER_TILE
+        board = frame_rgb[:self.th * self.rows, :self.tw * self.cols]
+        cv2.resize(board, self._small.shape[1::-1], dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_RGB2GRAY, dst=self._gray)
+        np.subtract(self._gray, self._sent, out=self._diff)
+        np.abs(self._diff, out=self._diff)
+        change = self._diff.reshape(self.rows, k, self.cols, k).mean(axis=(1, 3))
+        return np.arange(self.n) if keyframe else np.flatnonzero(change.ravel() > self.control.threshold)
+
+    def _encode_tiles(self, frame_rgb, tiles):
+        k = THUMB_PER_TILE
+        quality = self.control.quality
+        params = [self.quality_flag, quality]
+        self._seq += 1
+        parts = [None]
+        for t in tiles:
+            # Tile t's picture is the frame region at its solved position
+            r, c = divmod(int(t), self.cols)
+            cv2.cvtColor(frame_rgb[r * self.th:(r + 1) * self.th, c * self.tw:(c + 1) * self.tw],
+                         cv2.COLOR_RGB2BGR, dst=self._tile_bgr)
+            ok, buf = cv2.imencode(self.ext, self._tile_bgr, params)
+            if not ok:
+                continue    # Thumbnail left as it was, so the tile still counts as changed next frame
+            self._sent[r * k:(r + 1) * k, c * k:(c + 1) * k] = self._gray[r * k:(r + 1) * k, c * k:(c + 1) * k]
+            parts.append(TILE.pack(int(t), len(buf)))
+            parts.append(buf)
+            self.tile_bytes += len(buf)
+            self.tiles_sent += 1
+        parts[0] = TILES.pack(MSG_TILES, self._seq, quality, (len(parts) - 1) // 2)
+        return self.pool.pack(parts)
+
+    def report(self):
+        avg = self.tile_bytes / self.tiles_sent if self.tiles_sent else 0
+        return (f"frames={self.frames} tiles={self.tiles_sent} (avg {avg / 1024:.1f} KB) "
+                f"order deltas={self.order_messages} quality={self.control.quality} "
+                f"threshold={self.control.threshold:.1f} encode={self.control.encode_ms:.1f}ms "
+                f"skipped={self.control.skipped} pool misses={self.pool.misses}")
+
+
+class _Client:
+    """One viewer: a queue of packets and a sender thread, so a slow socket never stalls the others."""
+
+    def __init__(self, conn, addr):
+        self.conn = conn
+        self.addr = addr
+        self.queue = deque()
+        self.queued_bytes = 0
+        self.cond = threading.Condition()
+        self.alive = True
+        self.sent_bytes = 0
+        self.send_time = 0.0
+        threading.Thread(target=self._send_loop, name=f"stream-{addr[1]}", daemon=True).start()
+
+    def push(self, packet):
+        """False if the viewer has gone (the caller still owns its reference)."""
+        with self.cond:
+            if not self.alive:
+                return False
+            self.queue.append(packet)
+            self.queued_bytes += packet.size
+            self.cond.notify()
+        return True
+
+    def _send_loop(self):
+        try:
+            while self.alive:
+                with self.cond:
+                    while self.alive and not self.queue:
+                        self.cond.wait(0.5)
+                    if not self.queue:
+                        continue
+                    packet = self.queue.popleft()
+                t0 = time.perf_counter()
+                try:
+                    self.conn.sendall(packet.view())
+                finally:
+                    with self.cond:
+                        self.queued_bytes -= packet.size
+                    packet.release()
+                self.send_time += time.perf_counter() - t0
+                self.sent_bytes += packet.size
+        except OSError:
+            pass
+        self.close()
+
+    def close(self):
+        with self.cond:
+            self.alive = False
+            pending, self.queue = self.queue, deque()
+            self.queued_bytes = 0
+            self.cond.notify()
+        for packet in pending:
+            packet.release()
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+    def throughput_kbps(self):
+        return self.sent_bytes * 8 / 1000 / self.send_time if self.send_time else 0.0
+
+
+class StreamServer:
+    """
+    Broadcasts packets to every connected viewer over plain HTTP (`GET /stream`):
+    a streamed application/octet-stream body, readable with fetch() in a browser.
+    """
+
+    def __init__(self, host='127.0.0.1', port=STREAM_PORT):
+        self.host, self.port = host, port
+        self.clients = []
+        self.waiting = []           # Connected, but not sent anything until the next LAYOUT
+        self.on_connect = None      # Called for each new viewer (TileStreamer asks for a keyframe)
+        self._lock = threading.Lock()
+        self._sock = None
+        self.connections = 0
+
+    def start(self):
+        self._sock = socket.create_server((self.host, self.port))
+        threading.Thread(target=self._accept_loop, name="stream-accept", daemon=True).start()
+        return self
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, addr = self._sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handshake, args=(conn, addr), daemon=True).start()
+
+    def _handshake(self, conn, addr):
+        try:
+            conn.settimeout(CLIENT_TIMEOUT)
+            head = b''
+            while b'\r\n\r\n' not in head and len(head) < 8192:
+                chunk = conn.recv(1024)
+                if not chunk: raise OSError("closed during handshake")
+                head += chunk
+            if not head.startswith(b'GET /stream'):
+                conn.sendall(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                conn.close()
+                return
+            conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\n"
+                         b"Cache-Control: no-store\r\nAccess-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n")
+            conn.settimeout(None)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            conn.close()
+            return
+        with self._lock:
+            self.waiting.append(_Client(conn, addr))
+            self.connections += 1
+        if self.on_connect: self.on_connect()
+
+    def has_viewers(self):
+        return bool(self.clients or self.waiting)
+
+    def publish(self, packet):
+        """
+        Queues a packet for every live viewer; it goes back to its pool after the last send.
+        Waiting viewers join at a LAYOUT, so ORDER / TILES never reach one before its first layout.
+        """
+        with self._lock:
+            if self.waiting and packet.buf[LENGTH.size] == MSG_LAYOUT:
+                self.clients.extend(self.waiting)
+                self.waiting = []
+            self.clients = [c for c in self.clients if c.alive]
+            clients = list(self.clients)
+        packet.refs = len(clients)
+        if not clients:
+            packet.refs = 1
+            packet.release()
+            return
+        for c in clients:
+            if not c.push(packet): packet.release()
+
+    def backlog(self):
+        """Bytes queued for the slowest viewer."""
+        return max((c.queued_bytes for c in self.clients), default=0)
+
+    def close(self):
+        if self._sock: self._sock.close()
+        with self._lock:
+            clients, self.clients, self.waiting = self.clients + self.waiting, [], []
+        for c in clients:
+            c.close()
+
+    def report(self):
+        rates = ", ".join(f"{c.addr[0]}:{c.addr[1]} {c.throughput_kbps():.0f}kbps" for c in self.clients if c.alive)
+        return f"port={self.port} viewers={len(self.clients)} connections={self.connections}" + (f" ({rates})" if rates else "")
@@ -0,0 +1,188 @@
+"""
+Signed result tokens, so a backend can check a CAPTCHA pass without asking us.
+
+When a session is WON the engine issues a short-lived token:
+
+    base64url(claims) "." base64url(HMAC-SHA256(key, claims)[:16])
+
+claims is a fixed binary header (version, key id, issued / expiry time, grid
+size, solve time, swaps, liveness score and pass flag, a random nonce)
+followed by the UTF-8 session id; ~60 bytes before encoding, no JSON.
+
+verify() is pure CPU: decode, one HMAC, constant-time compare, unpack, and a
+lookup in an in-memory replay cache so each token is accepted once. The cache
+evicts entries once their token has expired (an expired token is rejected
+anyway), so its size is bounded by verification rate x TTL.
+
+Several keys can be configured for rotation: the first issues, all verify.
+
+    tokens = ResultTokens(load_secret())
+    token = tokens.issue(session)
+    tokens.verify(token)  # -> {'valid': True, 'session': ..., 'solve_time': ...} or {'valid': False, 'error': ...}
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import secrets
+import struct
+import time
+
+TOKEN_TTL = 120             # Seconds a token stays valid
+REPLAY_CACHE_SIZE = 1000000  # Most token nonces remembered at once
+MAC_SIZE = 16               # Truncated HMAC-SHA256 tag (128 bits)
+VERSION = 1
+SECRET_ENV = 'CAPTCHA_TOKEN_SECRET'
+
+# version, key id, issued, expires, cols, rows, solve time (ms), swaps, liveness (x1000, 0xFFFF = none), flags, nonce
+# cols / rows are one byte each: grid.check_size keeps every grid within grid.MAX_SIDE
+CLAIMS = struct.Struct('<BBIIBBIHHB8s')
+FLAG_LIVE = 1
+
+
+def load_secret(env=SECRET_ENV):
+    """Token key from the environment (hex or raw text), or None."""
+    value = os.environ.get(env)
+    if not value:
+        return None
+    try:
+        return bytes.fromhex(value)
+    except ValueError:
+        return value.encode('utf-8')
+
+
+def key_id(key):
+    return hashlib.sha256(key).digest()[0]
+
+
+def b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class ReplayCache:
+    """Nonces of accepted tokens until their expiry. Dict order ~ expiry order, so eviction pops from the front."""
+
+    def __init__(self, max_size=REPLAY_CACHE_SIZE):
+        self.max_size = max_size
+        self._seen = {}     # nonce -> expires
+        self.evicted_early = 0  # Dropped before expiry because the cache was full (size it up if this grows)
+
+    def __len__(self):
+        return len(self._seen)
+
+    def add(self, nonce, expires, now):
+        """Records `nonce`; False if it was already there (a replay)."""
+        seen = self._seen
+        if nonce in seen:
+            return False
+        # Amortized eviction: check the oldest couple of entries on every insert
+        for _ in range(2):
+            if not seen:
+                break
+            oldest = next(iter(seen))
+            if seen[oldest] <= now:
+                del seen[oldest]
+            elif len(seen) >= self.max_size:
+                del seen[oldest]
+                self.evicted_early += 1
+            else:
+                break
+        seen[nonce] = expires
+        return True
+
+    def prune(self, now):
+        """Drops every expired nonce at the front of the cache; returns how many."""
+        seen = self._seen
+        dropped = 0
+        while seen:
+            oldest = next(iter(seen))
+            if seen[oldest] > now:
+                break
+            del seen[oldest]
+            dropped += 1
+        return dropped
+
+
+class ResultTokens:
+    def __init__(self, keys, ttl=TOKEN_TTL, cache=None):
+        keys = [keys] if isinstance(keys, (bytes, bytearray)) else list(keys)
+        if not keys:
+            raise ValueError("at least one token key is required")
+        if len({key_id(k) for k in keys}) != len(keys):
+            raise ValueError("token keys must have distinct key ids")
+        self.key = bytes(keys[0])
+        self.kid = key_id(self.key)
+        self.keys = {key_id(k): bytes(k) for k in keys}
+        self.ttl = ttl
+        self.cache = cache or ReplayCache()
+
+        # Counters
+        self.issued = 0
+        self.accepted = 0
+        self.rejected = {}
+
+    # --- ISSUE ---
+    def issue(self, session, now=None):
+        """Token for a WON PuzzleSession (liveness included if it was scored)."""
+        now = int(time.time() if now is None else now)
+        live = session.liveness
+        score = 0xFFFF if not live else min(1000, int(round(live['score'] * 1000)))
+        flags = FLAG_LIVE if live and live['live'] else 0
+        body = CLAIMS.pack(VERSION, self.kid, now, now + self.ttl, session.grid.cols, session.grid.rows,
+                           min(int(session.elapsed_time * 1000), 0xFFFFFFFF), min(session.swaps, 0xFFFF),
+                           score, flags, secrets.token_bytes(8)) + session.session_id.encode('utf-8')
+        self.issued += 1
+        return b64encode(body) + '.' + b64encode(hmac.digest(self.key, body, 'sha256')[:MAC_SIZE])
+
+    # --- VERIFY ---
+    def _reject(self, reason):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return {'valid': False, 'error': reason}
+
+    def verify(self, token, now=None, consume=True):
+        """
+        Checks signature, expiry and (with consume=True) single use.
+        Returns the claims with 'valid': True, or {'valid': False, 'error': reason}.
+        """
+        now = time.time() if now is None else now
+        if not isinstance(token, str):
+            return self._reject('malformed')
+        body_b64, _, mac_b64 = token.partition('.')
+        try:
+            body, mac = b64decode(body_b64), b64decode(mac_b64)
+        except (binascii.Error, ValueError):
+            return self._reject('malformed')
+        if len(body) <= CLAIMS.size or len(mac) != MAC_SIZE:
+            return self._reject('malformed')
+        key = self.keys.get(body[1])
+        if key is None:
+            return self._reject('unknown key')
+        if not hmac.compare_digest(hmac.digest(key, body, 'sha256')[:MAC_SIZE], mac):
+            return self._reject('bad signature')
+        version, _, issued, expires, cols, rows, solve_ms, swaps, score, flags, nonce = CLAIMS.unpack_from(body)
+        if version != VERSION:
+            return self._reject('unsupported version')
+        if now >= expires:
+            return self._reject('expired')
+        if consume and not self.cache.add(nonce, expires, now):
+            return self._reject('replayed')
+        self.accepted += 1
+        return {
+            'valid': True,
+            'session': body[CLAIMS.size:].decode('utf-8', 'replace'),
+            'grid': [cols, rows],
+            'solve_time': solve_ms / 1000,
+            'swaps': swaps,
+            'liveness': None if score == 0xFFFF else {'score': score / 1000, 'live': bool(flags & FLAG_LIVE)},
+            'issued': issued,
+            'expires': expires,
+        }
+
+    def stats(self):
+        return {'issued': self.issued, 'accepted': self.accepted, 'rejected': dict(self.rejected),
+                'replay_cache': len(self.cache), 'evicted_early': self.cache.evicted_early}